@@ -15,3 +15,41 @@ from app.models.base import BaseModel
 
 # Les modèles seront créés selon vos besoins spécifiques
 # et uniquement après validation explicite
+
+
+class TableMetadata(BaseModel):
+    """
+    Métadonnées des tables de la base (catalogue du module 12.1)
+    - created_at : date d'enregistrement de la table
+    - row_count : nombre de lignes, tenu à jour par des triggers SQLite
+    """
+    __tablename__ = 'table_metadata'
+
+    table_name = db.Column(db.String(100), nullable=False, unique=True)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TableMetadata {self.table_name}: {self.row_count}>'
+
+
+class Job(BaseModel):
+    """
+    Tâche de fond (imports en masse, reconstructions de tables...)
+    Statuts : pending, running, succeeded, failed, cancelled
+    """
+    __tablename__ = 'jobs'
+
+    job_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=True)
+    message = db.Column(db.String(255), nullable=True)
+    params = db.Column(db.Text, nullable=True)  # JSON
+    result = db.Column(db.Text, nullable=True)  # JSON
+    error = db.Column(db.Text, nullable=True)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.job_type}: {self.status}>'
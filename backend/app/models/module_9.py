@@ -21,17 +21,21 @@ class Ville(BaseModel):
     code_insee = db.Column(db.Integer)
     departement = db.Column(db.Integer)
     
-    # Coordonnées géographiques (gestion des virgules françaises)
-    latitude = db.Column(db.String(20))  # Changé en String pour éviter les erreurs de conversion
-    longitude = db.Column(db.String(20))  # Changé en String pour éviter les erreurs de conversion
+    # Coordonnées géographiques (degrés décimaux, index spatial villes_rtree)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
     
     # Zone climatique
     zone_nv = db.Column(db.Integer)
     
-    # Distances et temps (gestion des virgules françaises)
-    distance_km_oiseau = db.Column(db.String(20))  # Changé en String
-    distance_km_routes = db.Column(db.String(20))   # Changé en String
-    temps_route_min = db.Column(db.String(20))      # Changé en String
+    # Distances et temps
+    distance_km_oiseau = db.Column(db.Float)
+    distance_km_routes = db.Column(db.Float)
+    temps_route_min = db.Column(db.Float)
+    
+    # Coordonnées utilisées par le dernier calcul des distances au dépôt
+    latitude_calcul = db.Column(db.Float)
+    longitude_calcul = db.Column(db.Float)
     
     def __repr__(self):
         return f'<Ville {self.communes} ({self.code_postal})>'
@@ -9,14 +9,25 @@ Date: 2025
 Version: 2.0 - Architecture unifiée
 """
 
-from flask import Blueprint, request, jsonify
+import json
+import os
+import shutil
+import tempfile
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from app.services.bulk_loader import DEFAULT_CHUNK_SIZE, INSERT_MODES, MAX_CHUNK_SIZE
 from app.services.database_manager import database_manager
-from sqlalchemy import inspect
+from app.services.job_runner import SPOOL_PREFIX, job_runner
+from app.services.schema_catalog import schema_catalog
+from app.utils.stream_parsers import iter_csv_records, iter_ndjson_records, open_text_stream
+from app.routes.jobs import is_async_request, job_accepted_response
 from app import db
 
 # Blueprint pour l'API unifiée de base de données
 database_api_bp = Blueprint('database_api', __name__)
 
+# Taille des blocs de copie du corps d'un import en tâche de fond
+SPOOL_BUFFER_SIZE = 1024 * 1024
+
 
 # ============================================================================
 # ROUTES POUR LES TABLES
@@ -35,6 +46,19 @@ def list_tables():
         }), 500
 
 
+@database_api_bp.route('/api/database/catalog', methods=['GET'])
+def get_catalog():
+    """Catalogue complet des tables (structure, date de création, nombre de lignes)"""
+    try:
+        result = database_manager.get_catalog()
+        return jsonify(result), 200 if result['success'] else 500
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erreur serveur : {str(e)}'
+        }), 500
+
+
 @database_api_bp.route('/api/database/tables/<table_name>', methods=['GET'])
 def get_table_info(table_name):
     """Récupérer les informations détaillées d'une table"""
@@ -118,7 +142,14 @@ def delete_table(table_name):
 
 @database_api_bp.route('/api/database/tables/<table_name>/bulk-insert', methods=['POST'])
 def bulk_insert_data(table_name):
-    """Insérer des données en masse dans une table dynamique"""
+    """
+    Insérer des données en masse dans une table dynamique
+    
+    Body: {"data": [...], "mode": "insert|merge", "key": "colonne" ou ["col1", "col2"], "dry_run": false}
+    En mode merge, les lignes existantes (même clé unique) ne sont mises à jour que si elles ont changé
+    dry_run : diagnostic ligne par ligne sans insertion
+    async (ou ?async=true) : exécution en tâche de fond, réponse 202 et suivi via /api/jobs/{id}
+    """
     try:
         data = request.get_json()
         
@@ -135,11 +166,36 @@ def bulk_insert_data(table_name):
                 'message': 'Champ "data" requis avec une liste de données'
             }), 400
         
-        # Insertion via le service
-        result = database_manager.bulk_insert(table_name, data['data'])
+        mode = data.get('mode', 'insert')
+        if mode not in INSERT_MODES:
+            return jsonify({
+                'success': False,
+                'message': 'Champ "mode" invalide (insert ou merge)'
+            }), 400
+        
+        dry_run = bool(data.get('dry_run'))
+        
+        if is_async_request(data):
+            rows = data['data']
+            key = data.get('key')
+            job = job_runner.submit(
+                'bulk_insert',
+                lambda context: database_manager.bulk_insert(
+                    table_name, rows, mode=mode, key=key, dry_run=dry_run,
+                    progress=context.progress_callback(len(rows))
+                ),
+                params={'table': table_name, 'mode': mode, 'key': key, 'dry_run': dry_run, 'rows': len(rows)},
+                total=len(rows)
+            )
+            return job_accepted_response(job)
+        
+        # Insertion (ou validation à blanc) via le service
+        result = database_manager.bulk_insert(
+            table_name, data['data'], mode=mode, key=data.get('key'), dry_run=dry_run
+        )
         
         if result['success']:
-            return jsonify(result), 201
+            return jsonify(result), 200 if dry_run else 201
         else:
             return jsonify(result), 400
             
@@ -150,6 +206,112 @@ def bulk_insert_data(table_name):
         }), 500
 
 
+@database_api_bp.route('/api/database/tables/<table_name>/stream-insert', methods=['POST'])
+def stream_insert_data(table_name):
+    """
+    Importer un flux NDJSON ou CSV dans une table dynamique
+    
+    POST /api/database/tables/{table_name}/stream-insert?format=ndjson|csv&chunk_size=1000&mode=insert|merge&key=col&dry_run=true
+    Body: une ligne JSON par enregistrement, ou un CSV avec ligne d'en-tête
+    Réponse: flux NDJSON, un état par lot puis un résumé final
+    ?async=true : corps enregistré dans un fichier temporaire puis importé en tâche de fond (202)
+    """
+    try:
+        if not schema_catalog.has_table(table_name):
+            return jsonify({
+                'success': False,
+                'message': f"Table '{table_name}' n'existe pas"
+            }), 404
+        
+        # Format : paramètre explicite sinon déduit du Content-Type
+        data_format = request.args.get('format') or (
+            'csv' if request.mimetype in ('text/csv', 'application/csv') else 'ndjson'
+        )
+        if data_format not in ('ndjson', 'csv'):
+            return jsonify({
+                'success': False,
+                'message': 'Format non supporté (ndjson ou csv)'
+            }), 400
+        
+        chunk_size = request.args.get('chunk_size', DEFAULT_CHUNK_SIZE, type=int)
+        if chunk_size <= 0:
+            return jsonify({
+                'success': False,
+                'message': 'Paramètre "chunk_size" invalide'
+            }), 400
+        # Lot borné : une transaction et ses recherches de clés restent de taille raisonnable
+        chunk_size = min(chunk_size, MAX_CHUNK_SIZE)
+        
+        mode = request.args.get('mode', 'insert')
+        if mode not in INSERT_MODES:
+            return jsonify({
+                'success': False,
+                'message': 'Paramètre "mode" invalide (insert ou merge)'
+            }), 400
+        key = request.args.get('key')
+        key = [col.strip() for col in key.split(',')] if key else None
+        dry_run = request.args.get('dry_run') == 'true'
+        
+        charset = request.mimetype_params.get('charset', 'utf-8')
+        delimiter = request.args.get('delimiter')
+        
+        def read_records(raw_stream):
+            text_stream = open_text_stream(raw_stream, charset)
+            if data_format == 'csv':
+                return iter_csv_records(text_stream, delimiter)
+            return iter_ndjson_records(text_stream)
+        
+        if is_async_request():
+            # Le corps de la requête n'est plus lisible après la réponse : copie sur disque
+            spool = tempfile.NamedTemporaryFile(prefix=SPOOL_PREFIX, suffix=f'.{data_format}', delete=False)
+            
+            def remove_spool():
+                try:
+                    os.remove(spool.name)
+                except FileNotFoundError:
+                    pass
+            
+            def run_import(context):
+                with open(spool.name, 'rb') as raw_stream:
+                    for state in database_manager.stream_insert(table_name, read_records(raw_stream), chunk_size,
+                                                                mode=mode, key=key, dry_run=dry_run):
+                        if state['type'] == 'progress':
+                            context.report(state['processed'])
+                        else:
+                            return state
+            
+            try:
+                with spool:
+                    shutil.copyfileobj(request.stream, spool, SPOOL_BUFFER_SIZE)
+                # Suppression à la fin de la tâche, y compris si elle est annulée avant son démarrage
+                job = job_runner.submit(
+                    'stream_insert', run_import,
+                    params={'table': table_name, 'format': data_format, 'mode': mode, 'key': key,
+                            'dry_run': dry_run, 'chunk_size': chunk_size},
+                    on_done=remove_spool
+                )
+            except Exception:
+                remove_spool()
+                raise
+            return job_accepted_response(job)
+        
+        records = read_records(request.stream)
+        
+        def generate():
+            for state in database_manager.stream_insert(table_name, records, chunk_size,
+                                                        mode=mode, key=key, dry_run=dry_run):
+                yield json.dumps(state, ensure_ascii=False, default=str) + '\n'
+        
+        return Response(stream_with_context(generate()), status=200,
+                        mimetype='application/x-ndjson')
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erreur serveur : {str(e)}'
+        }), 500
+
+
 # ============================================================================
 # ROUTES POUR LES RELATIONS
 # ============================================================================
@@ -324,9 +486,11 @@ def test_route():
             'version': '2.0',
             'endpoints': [
                 'GET /api/database/tables',
+                'GET /api/database/catalog',
                 'POST /api/database/tables',
                 'DELETE /api/database/tables/<table_name>',
                 'POST /api/database/tables/<table_name>/bulk-insert',
+                'POST /api/database/tables/<table_name>/stream-insert',
                 'GET /api/database/relations',
                 'POST /api/database/relations',
                 'POST /api/database/relations/validate',
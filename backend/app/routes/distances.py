@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - ROUTES DES DISTANCES
+Matrice des distances entre dépôt, domiciles des salariés et communes de chantier
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+from flask import Blueprint, request, jsonify
+from app.services.depot_distances import depot_distances
+from app.services.distance_matrix import distance_matrix, np
+from app.utils.response_cache import cached_response
+
+# Blueprint des distances (planning)
+distances_bp = Blueprint('distances', __name__, url_prefix='/api/distances')
+
+
+def _split(value):
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def _rounded(matrix, decimals):
+    """Matrice NumPy -> listes JSON (NaN -> null)"""
+    rounded = np.round(matrix, decimals).astype(object)
+    rounded[np.isnan(matrix)] = None
+    return rounded.tolist()
+
+
+def _requested_sources():
+    return _split(request.args.get('sources', 'salaries'))
+
+
+def _matrix_tables():
+    """Tables lues par la requête en cours : villes et tables des sources demandées"""
+    return ['villes', *distance_matrix.source_tables(_requested_sources())]
+
+
+def _matrix_vary():
+    """Date du jour si une source demandée en dépend (salariés présents)"""
+    return distance_matrix.cache_key(_requested_sources())
+
+
+@distances_bp.route('/matrix', methods=['GET'])
+@cached_response(_matrix_tables, vary=_matrix_vary)
+def get_matrix():
+    """
+    Distances deux à deux entre points du planning (tableaux compacts)
+
+    GET /api/distances/matrix?sources=salaries,clients&ville_ids=12,48&depot=true&times=true
+
+    - sources : points à inclure (salaries par défaut)
+    - ville_ids : communes supplémentaires (chantiers)
+    - depot : inclure le dépôt en premier point (true par défaut)
+    - times : ajouter les temps de trajet estimés (minutes)
+
+    Réponse : colonnes des points (kind, id, ville_id, label) et matrices
+    distances_km[i][j] (null si une commune est sans coordonnées)
+    """
+    try:
+        if np is None:
+            return jsonify({'success': False, 'message': 'NumPy requis pour le calcul des distances'}), 500
+
+        sources = _requested_sources()
+        try:
+            ville_ids = [int(value) for value in _split(request.args.get('ville_ids'))]
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Paramètre "ville_ids" invalide (ids séparés par des virgules)'}), 400
+        depot = request.args.get('depot', 'true') != 'false'
+
+        points = distance_matrix.load_points(sources, ville_ids, depot=depot)
+        matrix = distance_matrix.matrix(points)
+
+        kinds, ids, villes, labels = (list(column) for column in zip(*points)) if points else ([], [], [], [])
+        data = {
+            'points': {'kind': kinds, 'id': ids, 'ville_id': villes, 'label': labels},
+            'distances_km': _rounded(matrix, 2),
+        }
+        if request.args.get('times') == 'true':
+            minutes = depot_distances.get_travel_time_model().minutes_for_distance(matrix)
+            data['temps_min'] = _rounded(minutes, 1)
+
+        return jsonify({
+            'success': True,
+            'data': data,
+            'message': f'Matrice de {len(points)} points'
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Erreur lors du calcul des distances: {str(e)}'}), 500
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - ROUTES DES TÂCHES DE FOND
+Suivi et annulation des opérations longues exécutées hors requête HTTP
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+from flask import Blueprint, request, jsonify, url_for
+from app.schemas.module_12 import JobSchema
+from app.services.job_runner import JOB_STATUSES, job_runner
+
+# Blueprint pour le suivi des tâches
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+job_schema = JobSchema()
+jobs_schema = JobSchema(many=True)
+
+
+def job_accepted_response(job):
+    """
+    Réponse 202 d'une route qui confie son traitement au gestionnaire de tâches
+
+    L'en-tête Location pointe vers la route de suivi de la tâche.
+    """
+    response = jsonify({
+        'success': True,
+        'data': job_schema.dump(job),
+        'message': f'Tâche {job.id} planifiée'
+    })
+    response.status_code = 202
+    response.headers['Location'] = url_for('jobs.get_job', job_id=job.id)
+    return response
+
+
+def is_async_request(data=None) -> bool:
+    """Exécution en tâche de fond demandée (?async=true ou "async": true dans le corps)"""
+    if request.args.get('async') == 'true':
+        return True
+    return bool(isinstance(data, dict) and data.get('async'))
+
+
+@jobs_bp.route('/', methods=['GET'])
+def list_jobs():
+    """
+    Lister les tâches les plus récentes
+
+    GET /api/jobs/?status=running&limit=50
+    """
+    try:
+        status = request.args.get('status')
+        if status and status not in JOB_STATUSES:
+            return jsonify({
+                'success': False,
+                'message': f'Statut invalide ({", ".join(JOB_STATUSES)})'
+            }), 400
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+
+        jobs = job_runner.list_jobs(status=status, limit=limit)
+        return jsonify({
+            'success': True,
+            'data': jobs_schema.dump(jobs),
+            'message': f'{len(jobs)} tâches trouvées'
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erreur serveur : {str(e)}'
+        }), 500
+
+
+@jobs_bp.route('/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Statut, avancement et résultat d'une tâche
+
+    GET /api/jobs/{job_id}
+    """
+    try:
+        job = job_runner.get(job_id)
+        if job is None:
+            return jsonify({
+                'success': False,
+                'message': f'Tâche {job_id} introuvable'
+            }), 404
+        return jsonify({
+            'success': True,
+            'data': job_schema.dump(job),
+            'message': job.message or f'Tâche {job.status}'
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erreur serveur : {str(e)}'
+        }), 500
+
+
+@jobs_bp.route('/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Demander l'annulation d'une tâche
+
+    POST /api/jobs/{job_id}/cancel
+    Une tâche en cours s'arrête à la fin du lot en cours (lots déjà validés conservés)
+    """
+    try:
+        job = job_runner.cancel(job_id)
+        if job is None:
+            return jsonify({
+                'success': False,
+                'message': f'Tâche {job_id} introuvable'
+            }), 404
+        if job.status in ('succeeded', 'failed'):
+            return jsonify({
+                'success': False,
+                'data': job_schema.dump(job),
+                'message': f'Tâche {job_id} déjà terminée'
+            }), 409
+        return jsonify({
+            'success': True,
+            'data': job_schema.dump(job),
+            'message': f'Annulation de la tâche {job_id} demandée'
+        }), 202 if job.status != 'cancelled' else 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erreur serveur : {str(e)}'
+        }), 500
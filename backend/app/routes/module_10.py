@@ -10,6 +10,11 @@ from flask import Blueprint, jsonify, request
 from app.models.module_10 import ModeleArdoises 
 from app.models.module_10 import Villes
 from app import db
+from app.services.write_queue import create_item, delete_item, update_item, write_queue
+from app.utils.pagination import paginate
+from app.utils.query_shaping import shape_query, sparse_schema
+from app.utils.response_cache import cached_response
+from app.utils.serializer_compiler import row_query, serialize
 from marshmallow import Schema, fields
 
 
@@ -26,13 +31,17 @@ modele_ardoises_schema = ModeleArdoisesSchema()
 modele_ardoises_schemas = ModeleArdoisesSchema(many=True)
 
 @module_10_bp.route('/api/modele_ardoises/', methods=['GET'])
+@cached_response('modele_ardoises')
 def list_modele_ardoises():
     try:
-        items = ModeleArdoises.query.all()
+        schema = sparse_schema(modele_ardoises_schemas)
+        page = paginate(shape_query(ModeleArdoises.query, schema), ModeleArdoises,
+                        sort_fields=('modele_ardoises', 'created_at'))
         return jsonify({
             'success': True,
-            'data': modele_ardoises_schemas.dump(items),
-            'message': f'{len(items)} modele_ardoises trouvés'
+            'data': serialize(schema, page.items),
+            'message': f'{len(page.items)} modele_ardoises trouvés',
+            'pagination': page.meta
         })
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
@@ -44,12 +53,10 @@ def create_modele_ardoises():
         errors = modele_ardoises_schema.validate(data)
         if errors:
             return jsonify({'success': False, 'message': errors}), 400
-        new_item = ModeleArdoises(**data)
-        db.session.add(new_item)
-        db.session.commit()
+        new_item = write_queue.run(create_item, ModeleArdoises, data, modele_ardoises_schema)
         return jsonify({
             'success': True,
-            'data': modele_ardoises_schema.dump(new_item),
+            'data': new_item,
             'message': 'ModeleArdoises créé avec succès'
         })
     except Exception as e:
@@ -59,17 +66,14 @@ def create_modele_ardoises():
 @module_10_bp.route('/api/modele_ardoises/<int:item_id>', methods=['PUT'])
 def update_modele_ardoises(item_id):
     try:
-        item = ModeleArdoises.query.get_or_404(item_id)
         data = request.get_json()
         errors = modele_ardoises_schema.validate(data)
         if errors:
             return jsonify({'success': False, 'message': errors}), 400
-        for key, value in data.items():
-            setattr(item, key, value)
-        db.session.commit()
+        item = write_queue.run(update_item, ModeleArdoises, item_id, data, modele_ardoises_schema)
         return jsonify({
             'success': True,
-            'data': modele_ardoises_schema.dump(item),
+            'data': item,
             'message': 'ModeleArdoises modifié avec succès'
         })
     except Exception as e:
@@ -79,9 +83,7 @@ def update_modele_ardoises(item_id):
 @module_10_bp.route('/api/modele_ardoises/<int:item_id>', methods=['DELETE'])
 def delete_modele_ardoises(item_id):
     try:
-        item = ModeleArdoises.query.get_or_404(item_id)
-        db.session.delete(item)
-        db.session.commit()
+        write_queue.run(delete_item, ModeleArdoises, item_id)
         return jsonify({
             'success': True,
             'message': 'ModeleArdoises supprimé avec succès'
@@ -99,13 +101,18 @@ villes_schema = VillesSchema()
 villes_schemas = VillesSchema(many=True)
 
 @module_10_bp.route('/api/villes/', methods=['GET'])
+@cached_response('villes')
 def list_villes():
     try:
-        items = Villes.query.all()
+        schema = sparse_schema(villes_schemas)
+        page = paginate(row_query(Villes, schema) or Villes.query, Villes,
+                        sort_fields=('communes', 'code_postal', 'code_insee', 'departement'),
+                        default_limit=50)
         return jsonify({
             'success': True,
-            'data': villes_schemas.dump(items),
-            'message': f'{len(items)} villes trouvés'
+            'data': serialize(schema, page.items),
+            'message': f'{len(page.items)} villes trouvés',
+            'pagination': page.meta
         })
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
@@ -117,12 +124,12 @@ def create_villes():
         errors = villes_schema.validate(data)
         if errors:
             return jsonify({'success': False, 'message': errors}), 400
-        new_item = Villes(**data)
-        db.session.add(new_item)
-        db.session.commit()
+        # Valeurs converties (coordonnées et distances saisies avec une virgule)
+        data = villes_schema.load(data)
+        new_item = write_queue.run(create_item, Villes, data, villes_schema)
         return jsonify({
             'success': True,
-            'data': villes_schema.dump(new_item),
+            'data': new_item,
             'message': 'Villes créé avec succès'
         })
     except Exception as e:
@@ -132,17 +139,16 @@ def create_villes():
 @module_10_bp.route('/api/villes/<int:item_id>', methods=['PUT'])
 def update_villes(item_id):
     try:
-        item = Villes.query.get_or_404(item_id)
         data = request.get_json()
         errors = villes_schema.validate(data)
         if errors:
             return jsonify({'success': False, 'message': errors}), 400
-        for key, value in data.items():
-            setattr(item, key, value)
-        db.session.commit()
+        # Valeurs converties (coordonnées et distances saisies avec une virgule)
+        data = villes_schema.load(data)
+        item = write_queue.run(update_item, Villes, item_id, data, villes_schema)
         return jsonify({
             'success': True,
-            'data': villes_schema.dump(item),
+            'data': item,
             'message': 'Villes modifié avec succès'
         })
     except Exception as e:
@@ -152,9 +158,7 @@ def update_villes(item_id):
 @module_10_bp.route('/api/villes/<int:item_id>', methods=['DELETE'])
 def delete_villes(item_id):
     try:
-        item = Villes.query.get_or_404(item_id)
-        db.session.delete(item)
-        db.session.commit()
+        write_queue.run(delete_item, Villes, item_id)
         return jsonify({
             'success': True,
             'message': 'Villes supprimé avec succès'
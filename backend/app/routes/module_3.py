@@ -10,6 +10,10 @@ from flask import Blueprint, request, jsonify
 from app.models.module_3 import Clients
 from app.schemas.module_3 import ClientsSchema
 from app import db
+from app.services.write_queue import create_item, delete_item, update_item, write_queue
+from app.utils.pagination import paginate
+from app.utils.query_shaping import shape_query, sparse_schema
+from app.utils.serializer_compiler import serialize
 
 module_3_bp = Blueprint('module_3', __name__)
 
@@ -23,13 +27,16 @@ clients_schemas = ClientsSchema(many=True)
 
 @module_3_bp.route('/api/clients/', methods=['GET'])
 def list_clients():
-    """Récupérer tous les clients avec leurs villes"""
+    """Récupérer les clients avec leurs villes (paginé : limit, sort, cursor, total ; fields, expand)"""
     try:
-        clients = Clients.query.all()
+        schema = sparse_schema(clients_schemas)
+        page = paginate(shape_query(Clients.query, schema), Clients,
+                        sort_fields=('nom', 'prenom', 'code_postal', 'created_at'))
         return jsonify({
             'success': True,
-            'data': clients_schemas.dump(clients),
-            'message': f'{len(clients)} clients trouvés'
+            'data': serialize(schema, page.items),
+            'message': f'{len(page.items)} clients trouvés',
+            'pagination': page.meta
         })
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
@@ -44,21 +51,19 @@ def create_client():
         if errors:
             return jsonify({'success': False, 'message': errors}), 400
         
-        new_client = Clients(**data)
-        db.session.add(new_client)
-        db.session.commit()
+        new_client = write_queue.run(create_item, Clients, data, clients_schema)
         
         # TODO: DÉCLENCHEUR AUTOMATIQUE - À IMPLÉMENTER
         # Lors de la création d'un client, déclencher les tâches automatiques
         # service = TacheAutomatiqueService()
-        # contexte = {'client_id': new_client.id}
+        # contexte = {'client_id': new_client['id']}
         # taches_creees = service.declencher_taches(
         #     'client_creation', contexte
         # )
         
         return jsonify({
             'success': True,
-            'data': clients_schema.dump(new_client),
+            'data': new_client,
             'message': 'Client créé avec succès'
         })
     except Exception as e:
@@ -70,19 +75,16 @@ def create_client():
 def update_client(client_id):
     """Modifier un client existant"""
     try:
-        client = Clients.query.get_or_404(client_id)
         data = request.get_json()
         errors = clients_schema.validate(data)
         if errors:
             return jsonify({'success': False, 'message': errors}), 400
         
-        for key, value in data.items():
-            setattr(client, key, value)
-        db.session.commit()
+        client = write_queue.run(update_item, Clients, client_id, data, clients_schema)
         
         return jsonify({
             'success': True,
-            'data': clients_schema.dump(client),
+            'data': client,
             'message': 'Client modifié avec succès'
         })
     except Exception as e:
@@ -94,9 +96,7 @@ def update_client(client_id):
 def delete_client(client_id):
     """Supprimer un client"""
     try:
-        client = Clients.query.get_or_404(client_id)
-        db.session.delete(client)
-        db.session.commit()
+        write_queue.run(delete_item, Clients, client_id)
         
         return jsonify({
             'success': True,
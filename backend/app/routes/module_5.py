@@ -12,6 +12,11 @@ from flask import Blueprint, jsonify, request
 from app import db
 from app.models.module_5 import FamilleOuvrages
 from app.schemas.module_5 import FamilleOuvragesSchema
+from app.services.write_queue import create_item, delete_item, update_item, write_queue
+from app.utils.pagination import paginate
+from app.utils.query_shaping import shape_query, sparse_schema
+from app.utils.response_cache import cached_response
+from app.utils.serializer_compiler import serialize
 
 module_5_bp = Blueprint('module_5', __name__)
 
@@ -24,13 +29,17 @@ famille_ouvrages_schemas = FamilleOuvragesSchema(many=True)
 # ---------------------------------------------------------------------------
 
 @module_5_bp.route('/api/famille_ouvrages/', methods=['GET'])
+@cached_response('famille_ouvrages')
 def list_famille_ouvrages():
     try:
-        items = FamilleOuvrages.query.all()
+        schema = sparse_schema(famille_ouvrages_schemas)
+        page = paginate(shape_query(FamilleOuvrages.query, schema), FamilleOuvrages,
+                        sort_fields=('num_bd_atarys', 'libelle', 'created_at'))
         return jsonify({
             'success': True,
-            'data': famille_ouvrages_schemas.dump(items),
-            'message': f"{len(items)} famille_ouvrages trouvés"
+            'data': serialize(schema, page.items),
+            'message': f"{len(page.items)} famille_ouvrages trouvés",
+            'pagination': page.meta
         })
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
@@ -43,12 +52,10 @@ def create_famille_ouvrages():
         errors = famille_ouvrages_schema.validate(data)
         if errors:
             return jsonify({'success': False, 'message': errors}), 400
-        new_item = FamilleOuvrages(**data)
-        db.session.add(new_item)
-        db.session.commit()
+        new_item = write_queue.run(create_item, FamilleOuvrages, data, famille_ouvrages_schema)
         return jsonify({
             'success': True,
-            'data': famille_ouvrages_schema.dump(new_item),
+            'data': new_item,
             'message': 'FamilleOuvrages créé avec succès'
         })
     except Exception as e:
@@ -59,17 +66,14 @@ def create_famille_ouvrages():
 @module_5_bp.route('/api/famille_ouvrages/<int:item_id>', methods=['PUT'])
 def update_famille_ouvrages(item_id):
     try:
-        item = FamilleOuvrages.query.get_or_404(item_id)
         data = request.get_json()
         errors = famille_ouvrages_schema.validate(data)
         if errors:
             return jsonify({'success': False, 'message': errors}), 400
-        for key, value in data.items():
-            setattr(item, key, value)
-        db.session.commit()
+        item = write_queue.run(update_item, FamilleOuvrages, item_id, data, famille_ouvrages_schema)
         return jsonify({
             'success': True,
-            'data': famille_ouvrages_schema.dump(item),
+            'data': item,
             'message': 'FamilleOuvrages modifié avec succès'
         })
     except Exception as e:
@@ -80,9 +84,7 @@ def update_famille_ouvrages(item_id):
 @module_5_bp.route('/api/famille_ouvrages/<int:item_id>', methods=['DELETE'])
 def delete_famille_ouvrages(item_id):
     try:
-        item = FamilleOuvrages.query.get_or_404(item_id)
-        db.session.delete(item)
-        db.session.commit()
+        write_queue.run(delete_item, FamilleOuvrages, item_id)
         return jsonify({'success': True, 'message': 'FamilleOuvrages supprimé avec succès'})
     except Exception as e:
         db.session.rollback()
@@ -13,7 +13,19 @@ from marshmallow import Schema, fields
 from app import db
 from app.models.module_9 import NiveauQualification, Salaries, Ville
 from app.schemas.module_9 import NiveauQualificationSchema, SalariesSchema, VilleSchema
+from app.routes.jobs import job_accepted_response
+from app.services.depot_distances import DEPOT_DISTANCES_JOB, depot_distances
+from app.services.job_runner import job_runner
+from app.services.m2m_sync import SYNC_MODES, m2m_sync
+from app.services.ville_geo import MAX_RADIUS_KM, MAX_RESULTS, parse_point, ville_geo
+from app.services.ville_index import ville_index
+from app.services.ville_search import SEARCH_LIMIT, ville_search
+from app.services.write_queue import create_item, delete_item, update_item, write_queue
 from app.utils.onedrive_detector import onedrive_detector
+from app.utils.pagination import paginate, parse_limit
+from app.utils.query_shaping import shape_query, sparse_schema
+from app.utils.response_cache import cached_response
+from app.utils.serializer_compiler import row_query, serialize
 
 module_9_bp = Blueprint('module_9', __name__)
 
@@ -30,13 +42,17 @@ ville_schemas = VilleSchema(many=True)
 
 # Routes CRUD pour NiveauQualification
 @module_9_bp.route('/api/niveau_qualification/', methods=['GET'])
+@cached_response('niveau_qualification')
 def list_niveau_qualification():
     try:
-        items = NiveauQualification.query.all()
+        schema = sparse_schema(niveau_qualification_schemas)
+        page = paginate(shape_query(NiveauQualification.query, schema), NiveauQualification,
+                        sort_fields=('niveau', 'categorie', 'created_at'))
         return jsonify({
             'success': True,
-            'data': niveau_qualification_schemas.dump(items),
-            'message': f'{len(items)} niveau_qualification trouvés'
+            'data': serialize(schema, page.items),
+            'message': f'{len(page.items)} niveau_qualification trouvés',
+            'pagination': page.meta
         })
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
@@ -48,12 +64,10 @@ def create_niveau_qualification():
         errors = niveau_qualification_schema.validate(data)
         if errors:
             return jsonify({'success': False, 'message': errors}), 400
-        new_item = NiveauQualification(**data)
-        db.session.add(new_item)
-        db.session.commit()
+        new_item = write_queue.run(create_item, NiveauQualification, data, niveau_qualification_schema)
         return jsonify({
             'success': True,
-            'data': niveau_qualification_schema.dump(new_item),
+            'data': new_item,
             'message': 'NiveauQualification créé avec succès'
         })
     except Exception as e:
@@ -63,17 +77,14 @@ def create_niveau_qualification():
 @module_9_bp.route('/api/niveau_qualification/<int:item_id>', methods=['PUT'])
 def update_niveau_qualification(item_id):
     try:
-        item = NiveauQualification.query.get_or_404(item_id)
         data = request.get_json()
         errors = niveau_qualification_schema.validate(data)
         if errors:
             return jsonify({'success': False, 'message': errors}), 400
-        for key, value in data.items():
-            setattr(item, key, value)
-        db.session.commit()
+        item = write_queue.run(update_item, NiveauQualification, item_id, data, niveau_qualification_schema)
         return jsonify({
             'success': True,
-            'data': niveau_qualification_schema.dump(item),
+            'data': item,
             'message': 'NiveauQualification modifié avec succès'
         })
     except Exception as e:
@@ -83,9 +94,7 @@ def update_niveau_qualification(item_id):
 @module_9_bp.route('/api/niveau_qualification/<int:item_id>', methods=['DELETE'])
 def delete_niveau_qualification(item_id):
     try:
-        item = NiveauQualification.query.get_or_404(item_id)
-        db.session.delete(item)
-        db.session.commit()
+        write_queue.run(delete_item, NiveauQualification, item_id)
         return jsonify({
             'success': True,
             'message': 'NiveauQualification supprimé avec succès'
@@ -102,22 +111,26 @@ def list_salaries():
         # Récupérer le paramètre actif depuis la requête
         actif = request.args.get('actif', type=str)
         
+        # ?fields= / ?expand= : colonnes lues et relations chargées limitées aux champs demandés
+        schema = sparse_schema(salaries_schemas)
+        # ville et famille_ouvrages chargés en amont (nombre de requêtes constant)
+        query = shape_query(Salaries.query, schema)
         if actif == 'true':
             # Filtrer les salariés actifs (sans date de sortie ou date de sortie dans le futur)
             from datetime import date
             today = date.today()
-            items = Salaries.query.filter(
+            query = query.filter(
                 (Salaries.date_sortie.is_(None)) | 
                 (Salaries.date_sortie > today)
-            ).all()
-        else:
-            # Retourner tous les salariés
-            items = Salaries.query.all()
+            )
         
+        page = paginate(query, Salaries,
+                        sort_fields=('nom', 'prenom', 'date_entree', 'date_sortie', 'created_at'))
         return jsonify({
             'success': True,
-            'data': salaries_schemas.dump(items),
-            'message': f'{len(items)} salaries trouvés'
+            'data': serialize(schema, page.items),
+            'message': f'{len(page.items)} salaries trouvés',
+            'pagination': page.meta
         })
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
@@ -162,22 +175,10 @@ def create_salaries():
         # Gestion des familles d'ouvrages (relation many-to-many)
         famille_ouvrages_ids = data.pop('famille_ouvrages_ids', [])
         
-        new_item = Salaries(**data)
-        db.session.add(new_item)
-        db.session.flush()  # Pour obtenir l'ID du nouveau salarié
-        
-        # Ajouter les familles d'ouvrages
-        if famille_ouvrages_ids:
-            from app.models.module_5 import FamilleOuvrages
-            for famille_id in famille_ouvrages_ids:
-                famille = FamilleOuvrages.query.get(famille_id)
-                if famille:
-                    new_item.famille_ouvrages.append(famille)
-        
-        db.session.commit()
+        new_item = write_queue.run(_create_salarie, data, famille_ouvrages_ids)
         return jsonify({
             'success': True,
-            'data': salaries_schema.dump(new_item),
+            'data': new_item,
             'message': 'Salaries créé avec succès'
         })
     except Exception as e:
@@ -187,10 +188,11 @@ def create_salaries():
 @module_9_bp.route('/api/salaries/<int:item_id>', methods=['GET'])
 def get_salary(item_id):
     try:
-        item = Salaries.query.get_or_404(item_id)
+        schema = sparse_schema(salaries_schema)
+        item = shape_query(Salaries.query, schema).filter_by(id=item_id).first_or_404()
         return jsonify({
             'success': True,
-            'data': salaries_schema.dump(item),
+            'data': serialize(schema, item),
             'message': 'Salarié récupéré avec succès'
         })
     except Exception as e:
@@ -199,7 +201,6 @@ def get_salary(item_id):
 @module_9_bp.route('/api/salaries/<int:item_id>', methods=['PUT'])
 def update_salaries(item_id):
     try:
-        item = Salaries.query.get_or_404(item_id)
         data = request.get_json()
         
         # DEBUG: Afficher les données reçues
@@ -244,35 +245,91 @@ def update_salaries(item_id):
         # Gestion des familles d'ouvrages (relation many-to-many)
         famille_ouvrages_ids = data.pop('famille_ouvrages_ids', [])
         
-        # Mettre à jour les champs du salarié
-        for key, value in data.items():
-            setattr(item, key, value)
-        
-        # Mettre à jour les familles d'ouvrages
-        item.famille_ouvrages.clear()  # Supprimer toutes les relations existantes
-        if famille_ouvrages_ids:
-            from app.models.module_5 import FamilleOuvrages
-            for famille_id in famille_ouvrages_ids:
-                famille = FamilleOuvrages.query.get(famille_id)
-                if famille:
-                    item.famille_ouvrages.append(famille)
-        
-        db.session.commit()
+        item = write_queue.run(_update_salarie, item_id, data, famille_ouvrages_ids)
         return jsonify({
             'success': True,
-            'data': salaries_schema.dump(item),
+            'data': item,
             'message': 'Salaries modifié avec succès'
         })
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 400
 
+@module_9_bp.route('/api/salaries/famille_ouvrages/batch', methods=['POST'])
+def batch_update_salaries_famille_ouvrages():
+    """
+    Réaffecter les familles d'ouvrages de plusieurs salariés en un appel
+    
+    Body: {"assignments": [{"salarie_id": 1, "famille_ouvrages_ids": [2, 3]}, ...],
+           "mode": "replace|add|remove"}
+    """
+    try:
+        data = request.get_json() or {}
+        assignments = data.get('assignments')
+        if not isinstance(assignments, list) or not assignments:
+            return jsonify({'success': False, 'message': 'Champ "assignments" requis (liste non vide)'}), 400
+        mode = data.get('mode', 'replace')
+        if mode not in SYNC_MODES:
+            return jsonify({'success': False, 'message': f'Champ "mode" invalide ({", ".join(SYNC_MODES)})'}), 400
+        
+        links = {}
+        for assignment in assignments:
+            if not isinstance(assignment, dict) or 'salarie_id' not in assignment:
+                return jsonify({'success': False, 'message': 'Chaque affectation requiert "salarie_id"'}), 400
+            salarie_id = m2m_sync.normalize_ids([assignment['salarie_id']])[0]
+            links.setdefault(salarie_id, []).extend(
+                m2m_sync.normalize_ids(assignment.get('famille_ouvrages_ids'))
+            )
+        
+        missing = m2m_sync.missing_ids(Salaries, links)
+        if missing:
+            return jsonify({
+                'success': False,
+                'message': f"Salariés introuvables : {', '.join(map(str, missing))}"
+            }), 404
+        
+        result = write_queue.run(m2m_sync.sync, Salaries.famille_ouvrages, links, mode=mode)
+        return jsonify({
+            'success': True,
+            'data': {'salaries_count': len(links), **result},
+            'message': (
+                f"{len(links)} salariés mis à jour : {result['inserted_count']} liens ajoutés, "
+                f"{result['deleted_count']} supprimés"
+            )
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+def _create_salarie(data, famille_ouvrages_ids):
+    """Unité d'écriture : salarié et ses familles d'ouvrages"""
+    new_item = Salaries(**data)
+    db.session.add(new_item)
+    db.session.flush()  # Pour obtenir l'ID du nouveau salarié
+    
+    # Ajouter les familles d'ouvrages (une requête IN, un INSERT groupé)
+    if famille_ouvrages_ids:
+        m2m_sync.sync(Salaries.famille_ouvrages, {new_item.id: famille_ouvrages_ids})
+    # Valeurs par défaut et familles d'ouvrages relues avant sérialisation
+    db.session.refresh(new_item)
+    return salaries_schema.dump(new_item)
+
+def _update_salarie(item_id, data, famille_ouvrages_ids):
+    """Unité d'écriture : champs du salarié et familles d'ouvrages"""
+    item = Salaries.query.get_or_404(item_id)
+    for key, value in data.items():
+        setattr(item, key, value)
+    
+    # Mettre à jour les familles d'ouvrages : seuls les liens ajoutés/retirés sont écrits
+    m2m_sync.sync(Salaries.famille_ouvrages, {item.id: famille_ouvrages_ids})
+    db.session.flush()
+    db.session.refresh(item)
+    return salaries_schema.dump(item)
+
 @module_9_bp.route('/api/salaries/<int:item_id>', methods=['DELETE'])
 def delete_salaries(item_id):
     try:
-        item = Salaries.query.get_or_404(item_id)
-        db.session.delete(item)
-        db.session.commit()
+        write_queue.run(delete_item, Salaries, item_id)
         return jsonify({
             'success': True,
             'message': 'Salaries supprimé avec succès'
@@ -407,50 +464,133 @@ def get_onedrive_info():
 
 # Routes CRUD pour Ville
 @module_9_bp.route('/api/villes/', methods=['GET'])
+@cached_response('villes')
 def list_villes():
     try:
-        items = Ville.query.all()
+        # ~35 000 communes : jamais la table entière, 50 par page par défaut
+        # Lignes Row sur les colonnes du schéma : pas d'instances ORM à construire
+        schema = sparse_schema(ville_schemas)
+        page = paginate(row_query(Ville, schema) or Ville.query, Ville,
+                        sort_fields=('communes', 'code_postal', 'code_insee', 'departement'),
+                        default_limit=50)
         return jsonify({
             'success': True,
-            'data': ville_schemas.dump(items),
-            'message': f'{len(items)} villes trouvées'
+            'data': serialize(schema, page.items),
+            'message': f'{len(page.items)} villes trouvées',
+            'pagination': page.meta
         })
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
 
 @module_9_bp.route('/api/villes/search', methods=['GET'])
+@cached_response('villes')
 def search_villes():
     try:
         code_postal = request.args.get('code_postal')
         ville = request.args.get('ville')
         
-        query = Ville.query
-        
-        if code_postal:
-            query = query.filter(Ville.code_postal.like(f'{code_postal}%'))
+        schema = sparse_schema(ville_schemas)
+        limit = parse_limit(SEARCH_LIMIT, max_limit=100)
         
-        if ville:
-            query = query.filter(Ville.communes.ilike(f'%{ville}%'))
-        
-        items = query.limit(20).all()
+        if ville_index.refresh():
+            # Index mémoire : préfixes, sans accents, abréviations (st -> saint), sans requête SQL
+            items = ville_index.search(ville=ville, code_postal=code_postal, limit=limit)
+        else:
+            # Index plein texte : mêmes règles, tri par pertinence bm25
+            query = row_query(Ville, schema) or Ville.query
+            items = ville_search.search(query, ville=ville, code_postal=code_postal, limit=limit)
         
         return jsonify({
             'success': True,
-            'data': ville_schemas.dump(items),
+            'data': serialize(schema, items),
             'message': f'{len(items)} villes trouvées'
         })
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
 
+@module_9_bp.route('/api/villes/nearby', methods=['GET'])
+@cached_response('villes')
+def villes_nearby():
+    """Communes à moins de radius_km du point (lat, lon), les plus proches d'abord"""
+    try:
+        lat, lon = parse_point(request.args.get('lat'), request.args.get('lon'))
+        radius_km = request.args.get('radius_km', type=float)
+        if radius_km is None or not 0 < radius_km <= MAX_RADIUS_KM:
+            raise ValueError(f'Paramètre "radius_km" invalide (0 < radius_km <= {MAX_RADIUS_KM:g})')
+        neighbours = ville_geo.within(lat, lon, radius_km, limit=parse_limit(max_limit=MAX_RESULTS))
+        items = _villes_with_distance(neighbours)
+        return jsonify({
+            'success': True,
+            'data': items,
+            'message': f'{len(items)} villes à moins de {radius_km:g} km'
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+
+@module_9_bp.route('/api/villes/nearest', methods=['GET'])
+@cached_response('villes')
+def villes_nearest():
+    """Commune(s) la(les) plus proche(s) du point (lat, lon)"""
+    try:
+        lat, lon = parse_point(request.args.get('lat'), request.args.get('lon'))
+        neighbours = ville_geo.nearest(lat, lon, limit=parse_limit(1, max_limit=MAX_RESULTS))
+        items = _villes_with_distance(neighbours)
+        return jsonify({
+            'success': True,
+            'data': items,
+            'message': f'{len(items)} villes trouvées'
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+
+def _villes_with_distance(neighbours):
+    """Sérialiser les villes [(distance_km, id)] dans l'ordre, avec leur distance"""
+    schema = sparse_schema(ville_schemas)
+    ids = [ville_id for _, ville_id in neighbours]
+    by_id = {item.id: item for item in shape_query(Ville.query, schema).filter(Ville.id.in_(ids))}
+    return [
+        dict(serialize(schema, by_id[ville_id], many=False), distance_km=round(distance, 3))
+        for distance, ville_id in neighbours if ville_id in by_id
+    ]
+
+
+@module_9_bp.route('/api/villes/distances', methods=['POST'])
+def compute_villes_distances():
+    """
+    Recalculer en tâche de fond les distances et temps de trajet depuis le dépôt
+    
+    Body (optionnel) : {"latitude": 48.0, "longitude": -1.57, "force": true}
+    Sans coordonnées, le dépôt configuré est utilisé. Réponse 202 + suivi /api/jobs/<id>.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        origin = None
+        if data.get('latitude') is not None or data.get('longitude') is not None:
+            origin = parse_point(data.get('latitude'), data.get('longitude'))
+        force = bool(data.get('force'))
+        job = job_runner.submit(
+            DEPOT_DISTANCES_JOB,
+            lambda context: depot_distances.compute(origin, force=force, context=context),
+            params={**depot_distances.run_params(origin), 'force': force}
+        )
+        return job_accepted_response(job)
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+
 @module_9_bp.route('/api/villes/<int:item_id>', methods=['GET'])
+@cached_response('villes')
 def get_ville(item_id):
     try:
-        item = Ville.query.get_or_404(item_id)
+        schema = sparse_schema(ville_schema)
+        item = shape_query(Ville.query, schema).filter_by(id=item_id).first_or_404()
         return jsonify({
             'success': True,
-            'data': ville_schema.dump(item),
+            'data': serialize(schema, item),
             'message': 'Ville récupérée avec succès'
         })
     except Exception as e:
@@ -10,6 +10,9 @@ Version: 2.0
 """
 
 from flask import Blueprint, request, jsonify
+from app.routes.jobs import is_async_request, job_accepted_response
+from app.services.bulk_loader import INSERT_MODES
+from app.services.job_runner import job_runner
 from app.services.table_generator import TableGeneratorService
 
 
@@ -282,7 +285,8 @@ def bulk_insert_data(table_name):
     Insérer des données en masse dans une table dynamique
     
     POST /api/table-generator/{table_name}/bulk-insert
-    Body: {"data": [{"col1": "val1", "col2": "val2"}, ...]}
+    Body: {"data": [{"col1": "val1", "col2": "val2"}, ...], "mode": "insert|merge", "key": "col1", "dry_run": false}
+    "async": true (ou ?async=true) : exécution en tâche de fond, réponse 202 et suivi via /api/jobs/{id}
     """
     try:
         data = request.get_json()
@@ -300,15 +304,40 @@ def bulk_insert_data(table_name):
                 'message': 'Champ "data" requis avec une liste de données'
             }), 400
         
-        # Insertion via le service
-        result = table_generator.bulk_insert_data(table_name, data['data'])
+        mode = data.get('mode', 'insert')
+        if mode not in INSERT_MODES:
+            return jsonify({
+                'success': False,
+                'message': 'Champ "mode" invalide (insert ou merge)'
+            }), 400
+        
+        dry_run = bool(data.get('dry_run'))
+        
+        if is_async_request(data):
+            rows = data['data']
+            key = data.get('key')
+            job = job_runner.submit(
+                'bulk_insert',
+                lambda context: table_generator.bulk_insert_data(
+                    table_name, rows, mode=mode, key=key, dry_run=dry_run,
+                    progress=context.progress_callback(len(rows))
+                ),
+                params={'table': table_name, 'mode': mode, 'key': key, 'dry_run': dry_run, 'rows': len(rows)},
+                total=len(rows)
+            )
+            return job_accepted_response(job)
+        
+        # Insertion (ou validation à blanc) via le service
+        result = table_generator.bulk_insert_data(
+            table_name, data['data'], mode=mode, key=data.get('key'), dry_run=dry_run
+        )
         
         if result['success']:
             return jsonify({
                 'success': True,
-                'message': f'{len(data["data"])} lignes insérées dans {table_name}',
+                'message': result['message'],
                 'data': result.get('data', {})
-            }), 201
+            }), 200 if dry_run else 201
         else:
             return jsonify({
                 'success': False,
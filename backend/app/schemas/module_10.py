@@ -22,7 +22,8 @@ class ModeleArdoisesSchema(Schema):
 
 
 
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, pre_load
+from .module_9 import VILLE_DECIMAL_FIELDS, normalize_decimal_commas
 
 class VillesSchema(Schema):
     id = fields.Integer(dump_only=True)
@@ -32,9 +33,13 @@ class VillesSchema(Schema):
     code_postal = fields.Integer()
     code_insee = fields.Integer()
     departement = fields.Integer()
-    latitude = fields.String()
-    longitude = fields.String()
+    latitude = fields.Float(allow_none=True)
+    longitude = fields.Float(allow_none=True)
     zone_nv = fields.Integer()
-    distance_km_oiseau = fields.String()
-    distance_km_routes = fields.String()
-    temps_route_min = fields.String()
+    distance_km_oiseau = fields.Float(allow_none=True)
+    distance_km_routes = fields.Float(allow_none=True)
+    temps_route_min = fields.Float(allow_none=True)
+
+    @pre_load
+    def normalize_decimals(self, data, **kwargs):
+        return normalize_decimal_commas(data, VILLE_DECIMAL_FIELDS)
@@ -6,7 +6,41 @@ docs/02-architecture/ATARYS_MODULES.md)
 - Utiliser fields avec contraintes (String, Numeric, etc.)
 """
 
+import json
+
 from marshmallow import Schema, fields
 
 # Les schémas seront créés selon vos besoins spécifiques
 # et uniquement après validation explicite
+
+
+class JobSchema(Schema):
+    id = fields.Integer(dump_only=True)
+    created_at = fields.DateTime(dump_only=True)
+    updated_at = fields.DateTime(dump_only=True)
+    job_type = fields.String(dump_only=True)
+    status = fields.String(dump_only=True)
+    processed = fields.Integer(dump_only=True)
+    total = fields.Integer(dump_only=True, allow_none=True)
+    progress = fields.Method('get_progress', dump_only=True)
+    message = fields.String(dump_only=True, allow_none=True)
+    params = fields.Method('get_params', dump_only=True)
+    result = fields.Method('get_result', dump_only=True)
+    error = fields.String(dump_only=True, allow_none=True)
+    cancel_requested = fields.Boolean(dump_only=True)
+    started_at = fields.DateTime(dump_only=True, allow_none=True)
+    finished_at = fields.DateTime(dump_only=True, allow_none=True)
+
+    def get_progress(self, job):
+        """Avancement en pourcentage (None si le total est inconnu)"""
+        if job.status == 'succeeded':
+            return 100
+        if not job.total:
+            return None
+        return min(100, round(job.processed * 100 / job.total))
+
+    def get_params(self, job):
+        return json.loads(job.params) if job.params else None
+
+    def get_result(self, job):
+        return json.loads(job.result) if job.result else None
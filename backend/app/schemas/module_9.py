@@ -6,9 +6,24 @@ docs/02-architecture/ATARYS_MODULES.md)
 - Validation stricte
 """
 
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, pre_load
 from .module_5 import FamilleOuvragesSchema
 
+# Champs numériques des villes saisis avec la virgule décimale française
+VILLE_DECIMAL_FIELDS = ('latitude', 'longitude', 'distance_km_oiseau', 'distance_km_routes', 'temps_route_min')
+
+
+def normalize_decimal_commas(data, names):
+    """'48,11' -> '48.11' pour les champs indiqués (avant validation Float)"""
+    if not isinstance(data, dict):
+        return data
+    data = dict(data)
+    for name in names:
+        value = data.get(name)
+        if isinstance(value, str):
+            data[name] = value.strip().replace(',', '.') or None
+    return data
+
 class NiveauQualificationSchema(Schema):
     id = fields.Integer(dump_only=True)
     created_at = fields.DateTime(dump_only=True)
@@ -75,14 +90,18 @@ class VilleSchema(Schema):
     code_insee = fields.Integer(allow_none=True)
     departement = fields.Integer(allow_none=True)
     
-    # Coordonnées géographiques (gestion des virgules françaises)
-    latitude = fields.String(allow_none=True)  # Changé en String pour éviter les erreurs de conversion
-    longitude = fields.String(allow_none=True)  # Changé en String pour éviter les erreurs de conversion
+    # Coordonnées géographiques (degrés décimaux)
+    latitude = fields.Float(allow_none=True)
+    longitude = fields.Float(allow_none=True)
     
     # Zone climatique
     zone_nv = fields.Integer(allow_none=True)
     
-    # Distances et temps (gestion des virgules françaises)
-    distance_km_oiseau = fields.String(allow_none=True)  # Changé en String
-    distance_km_routes = fields.String(allow_none=True)   # Changé en String
-    temps_route_min = fields.String(allow_none=True)      # Changé en String
+    # Distances et temps
+    distance_km_oiseau = fields.Float(allow_none=True)
+    distance_km_routes = fields.Float(allow_none=True)
+    temps_route_min = fields.Float(allow_none=True)
+
+    @pre_load
+    def normalize_decimals(self, data, **kwargs):
+        return normalize_decimal_commas(data, VILLE_DECIMAL_FIELDS)
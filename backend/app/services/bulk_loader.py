@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - MOTEUR D'INSERTION EN MASSE PAR LOTS
+Insertion ensembliste pour les tables dynamiques (imports de référentiels)
+
+- Regroupement des lignes par jeu de colonnes
+- Un seul executemany par lot ; chaque lot est une unité de la file d'écriture
+  (thread écrivain unique, commit groupé), résultat cumulé après son commit
+- Mode fusion (upsert) sur une clé unique : seules les lignes modifiées sont réécrites
+- Erreurs remontées ligne par ligne (index dans les données d'origine)
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from app import db
+from app.services.schema_catalog import schema_catalog
+from app.services.table_versions import table_versions
+from app.services.write_queue import write_queue
+
+
+# Taille de lot par défaut (lignes par transaction) et maximale acceptée par les routes
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 10000
+
+# Paramètres liés par requête de recherche des clés existantes
+# (limite SQLite historique SQLITE_MAX_VARIABLE_NUMBER = 999)
+KEY_LOOKUP_VARIABLES = 900
+
+# Nombre maximum d'erreurs détaillées renvoyées au client
+MAX_REPORTED_ERRORS = 1000
+
+# Modes d'import : ajout simple ou fusion sur une clé unique
+INSERT_MODES = ('insert', 'merge')
+
+
+def quote_identifier(name: str) -> str:
+    """Échapper un identifiant SQLite (table ou colonne)"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class BulkLoader:
+    """Insertion en masse par lots via executemany sur la session SQLAlchemy"""
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    def load(self, table_name: str, indexed_rows: Iterable[Tuple[int, Dict[str, Any]]],
+             mode: str = 'insert', key: Union[str, Sequence[str], None] = None,
+             chunk_size: int = None, progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """Insérer ou fusionner selon le mode d'import ('insert' ou 'merge')"""
+        if mode == 'merge':
+            return self.merge(table_name, indexed_rows, key=key, chunk_size=chunk_size, progress=progress)
+        if mode != 'insert':
+            raise ValueError(f"Mode d'import inconnu : {mode} ({' ou '.join(INSERT_MODES)})")
+        return self.insert(table_name, indexed_rows, chunk_size=chunk_size, progress=progress)
+
+    def insert(self, table_name: str, indexed_rows: Iterable[Tuple[int, Dict[str, Any]]],
+               chunk_size: int = None, progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """
+        Insérer des lignes déjà converties dans une table
+
+        Args:
+            table_name (str): Nom de la table (existence vérifiée par l'appelant)
+            indexed_rows (iterable): Couples (index d'origine, {colonne: valeur})
+            chunk_size (int): Nombre de lignes par transaction
+            progress (callable): Rappel progress(lignes traitées) après chaque lot
+
+        Returns:
+            dict: {'inserted_count', 'failed_count', 'chunks_count', 'errors'}
+        """
+        chunk_size = chunk_size or self.chunk_size
+        result = self.empty_result()
+        processed = 0
+
+        for columns, group in self._group_by_columns(indexed_rows).items():
+            sql = self._build_insert_sql(table_name, columns)
+            for start in range(0, len(group), chunk_size):
+                chunk = group[start:start + chunk_size]
+                self._write_chunk(result, chunk, self._insert_chunk, table_name, sql, columns, chunk)
+                processed += len(chunk)
+                if progress:
+                    progress(processed)
+
+        return result
+
+    def merge(self, table_name: str, indexed_rows: Iterable[Tuple[int, Dict[str, Any]]],
+              key: Union[str, Sequence[str], None] = None, chunk_size: int = None,
+              progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """
+        Fusionner des lignes dans une table (INSERT ... ON CONFLICT DO UPDATE)
+
+        Les lignes dont la clé existe déjà ne sont réécrites que si au moins
+        une valeur a changé ; les autres sont comptées comme inchangées.
+
+        Args:
+            table_name (str): Nom de la table (existence vérifiée par l'appelant)
+            indexed_rows (iterable): Couples (index d'origine, {colonne: valeur})
+            key (str|list): Colonne(s) de la clé unique ; déduite du schéma si absente
+            chunk_size (int): Nombre de lignes par transaction
+            progress (callable): Rappel progress(lignes traitées) après chaque lot
+
+        Returns:
+            dict: {'inserted_count', 'updated_count', 'unchanged_count',
+                   'failed_count', 'chunks_count', 'errors', 'merge_key'}
+
+        Raises:
+            ValueError: Aucune clé unique utilisable
+        """
+        chunk_size = chunk_size or self.chunk_size
+        groups = self._group_by_columns(indexed_rows)
+        if not groups:
+            return self.empty_result(merge=True)
+        key_columns = self.resolve_merge_key(table_name, key, {col for columns in groups for col in columns})
+        result = self.empty_result(merge=True)
+        result['merge_key'] = list(key_columns)
+
+        has_updated_at = schema_catalog.get_column(table_name, 'updated_at') is not None
+        processed = 0
+        for columns, group in groups.items():
+            if not set(key_columns) <= set(columns):
+                for index, _ in group:
+                    self.record_error(result, index, f"Clé de fusion incomplète ({', '.join(key_columns)})")
+                processed += len(group)
+                continue
+            sql = self._build_merge_sql(table_name, columns, key_columns,
+                                        touch_updated_at=has_updated_at and 'updated_at' not in columns)
+            for start in range(0, len(group), chunk_size):
+                chunk = group[start:start + chunk_size]
+                self._write_chunk(result, chunk, self._merge_chunk, table_name, sql, columns, key_columns, chunk)
+                processed += len(chunk)
+                if progress:
+                    progress(processed)
+
+        return result
+
+    def resolve_merge_key(self, table_name: str, key: Union[str, Sequence[str], None],
+                          columns: Iterable[str]) -> Tuple[str, ...]:
+        """
+        Déterminer la clé de fusion
+
+        Clé demandée : doit correspondre à un index unique ou à la clé primaire.
+        Sinon : premier index unique (puis clé primaire) présent dans les données.
+        """
+        if key:
+            key_columns = (key,) if isinstance(key, str) else tuple(key)
+            if not schema_catalog.is_unique_key(table_name, key_columns):
+                raise ValueError(
+                    f"La clé '{', '.join(key_columns)}' ne correspond à aucun index unique de '{table_name}'"
+                )
+            return key_columns
+
+        columns = set(columns)
+        for key_columns in schema_catalog.unique_keys(table_name):
+            if set(key_columns) <= columns:
+                return key_columns
+        raise ValueError(f"Aucune clé unique de '{table_name}' n'est présente dans les données")
+
+    @staticmethod
+    def empty_result(merge: bool = False) -> Dict[str, Any]:
+        """Structure de résultat vide (cumulable entre plusieurs appels)"""
+        result = {
+            'inserted_count': 0,
+            'failed_count': 0,
+            'chunks_count': 0,
+            'errors': []
+        }
+        if merge:
+            result.update(updated_count=0, unchanged_count=0)
+        return result
+
+    @staticmethod
+    def summary_message(result: Dict[str, Any], total: int, label: str = 'données valides') -> str:
+        """Message de synthèse d'un import"""
+        if 'updated_count' in result:
+            return (
+                f"{result['inserted_count']} lignes insérées, {result['updated_count']} mises à jour, "
+                f"{result['unchanged_count']} inchangées sur {total} {label}"
+            )
+        return f"{result['inserted_count']} lignes insérées sur {total} {label}"
+
+    @staticmethod
+    def record_error(result: Dict[str, Any], index: int, error: Any) -> None:
+        """Enregistrer l'échec d'une ligne identifiée par son index d'origine"""
+        result['failed_count'] += 1
+        if len(result['errors']) < MAX_REPORTED_ERRORS:
+            # Message du driver SQLite plutôt que l'enveloppe SQLAlchemy
+            message = str(getattr(error, 'orig', None) or error)
+            result['errors'].append({'index': index, 'message': message})
+
+    @staticmethod
+    def add_result(result: Dict[str, Any], partial: Dict[str, Any]) -> None:
+        """Cumuler le résultat d'un lot (compteurs et erreurs détaillées, dans la limite)"""
+        for name, value in partial.items():
+            if name == 'errors':
+                result['errors'].extend(value[:max(0, MAX_REPORTED_ERRORS - len(result['errors']))])
+            elif name.endswith('_count'):
+                result[name] += value
+
+    def _write_chunk(self, result: Dict[str, Any], chunk: List[Tuple[int, Dict[str, Any]]],
+                     unit: Callable[..., Dict[str, Any]], *args) -> None:
+        """Confier un lot au thread écrivain ; son résultat n'est cumulé qu'une fois validé"""
+        try:
+            partial = write_queue.run(unit, *args)
+        except Exception as e:
+            # Commit refusé (base verrouillée, disque plein...) : aucune ligne du lot écrite
+            result['chunks_count'] += 1
+            for index, _ in chunk:
+                self.record_error(result, index, e)
+            return
+        self.add_result(result, partial)
+
+    def _group_by_columns(self, indexed_rows):
+        """Regrouper les lignes par jeu de colonnes (ordre d'apparition conservé)"""
+        groups: Dict[Tuple[str, ...], List[Tuple[int, Dict[str, Any]]]] = {}
+        for index, row in indexed_rows:
+            groups.setdefault(tuple(sorted(row)), []).append((index, row))
+        return groups
+
+    def _build_insert_sql(self, table_name: str, columns: Tuple[str, ...]) -> str:
+        """Construire la requête INSERT paramétrée d'un groupe de colonnes"""
+        columns_str = ', '.join(quote_identifier(col) for col in columns)
+        placeholders = ', '.join('?' for _ in columns)
+        return f"INSERT INTO {quote_identifier(table_name)} ({columns_str}) VALUES ({placeholders})"
+
+    def _insert_chunk(self, table_name: str, sql: str, columns: Tuple[str, ...],
+                      chunk: List[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Unité d'écriture : insérer un lot, avec repli ligne à ligne en cas d'échec
+
+        Aucun commit (thread écrivain) : le lot est essayé dans un savepoint, puis
+        chaque ligne dans le sien pour conserver les lignes valides du même lot.
+        """
+        result = self.empty_result()
+        result['chunks_count'] = 1
+        params = [tuple(row[col] for col in columns) for _, row in chunk]
+        # Écriture hors ORM : version de la table incrémentée au commit du lot
+        table_versions.mark_changed(db.session, table_name)
+
+        # Connexion demandée dans chaque savepoint (sinon SAVEPOINT jamais émis)
+        try:
+            with db.session.begin_nested():
+                db.session.connection().exec_driver_sql(sql, params)
+            result['inserted_count'] = len(chunk)
+            return result
+        except Exception:
+            pass
+
+        # Le lot contient au moins une ligne invalide : on isole chaque ligne
+        for (index, _), values in zip(chunk, params):
+            try:
+                with db.session.begin_nested():
+                    db.session.connection().exec_driver_sql(sql, values)
+                result['inserted_count'] += 1
+            except Exception as e:
+                self.record_error(result, index, e)
+        return result
+
+    def _build_merge_sql(self, table_name: str, columns: Tuple[str, ...],
+                         key_columns: Tuple[str, ...], touch_updated_at: bool = False) -> str:
+        """Construire l'upsert : mise à jour uniquement si une valeur diffère"""
+        sql = self._build_insert_sql(table_name, columns)
+        conflict = ', '.join(quote_identifier(col) for col in key_columns)
+        updated = [col for col in columns if col not in key_columns]
+        if not updated:
+            return f"{sql} ON CONFLICT ({conflict}) DO NOTHING"
+
+        table = quote_identifier(table_name)
+        assignments = [f"{quote_identifier(col)} = excluded.{quote_identifier(col)}" for col in updated]
+        if touch_updated_at:
+            assignments.append('"updated_at" = CURRENT_TIMESTAMP')
+        changed = ' OR '.join(
+            f"{table}.{quote_identifier(col)} IS NOT excluded.{quote_identifier(col)}" for col in updated
+        )
+        return f"{sql} ON CONFLICT ({conflict}) DO UPDATE SET {', '.join(assignments)} WHERE {changed}"
+
+    def existing_keys(self, connection, table_name: str, key_columns: Tuple[str, ...],
+                       keys: List[tuple]) -> set:
+        """Clés déjà présentes en base (requêtes IN par paquets de KEY_LOOKUP_VARIABLES paramètres)"""
+        return {tuple(row) for row in self._lookup(connection, table_name, key_columns, keys, key_columns)}
+
+    def existing_owners(self, connection, table_name: str, key_columns: Tuple[str, ...],
+                        keys: List[tuple], owner_columns: Tuple[str, ...]) -> Dict[tuple, set]:
+        """
+        Lignes déjà en base portant ces clés, identifiées par `owner_columns`
+
+        Returns:
+            dict: {clé: {valeurs de owner_columns des lignes existantes}}
+        """
+        owners: Dict[tuple, set] = {}
+        width = len(key_columns)
+        for row in self._lookup(connection, table_name, key_columns, keys, key_columns + tuple(owner_columns)):
+            owners.setdefault(tuple(row[:width]), set()).add(tuple(row[width:]))
+        return owners
+
+    def _lookup(self, connection, table_name: str, key_columns: Tuple[str, ...],
+                keys: List[tuple], select_columns: Tuple[str, ...]):
+        """Lignes (select_columns) dont la clé est dans `keys`, par paquets de requêtes IN"""
+        keys = list(keys)
+        table = quote_identifier(table_name)
+        selected = ', '.join(quote_identifier(col) for col in select_columns)
+        batch_size = max(1, KEY_LOOKUP_VARIABLES // len(key_columns))
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            if len(key_columns) == 1:
+                placeholders = ', '.join('?' for _ in batch)
+                sql = f"SELECT {selected} FROM {table} WHERE {quote_identifier(key_columns[0])} IN ({placeholders})"
+                params = tuple(key[0] for key in batch)
+            else:
+                target = ', '.join(quote_identifier(col) for col in key_columns)
+                row = '(' + ', '.join('?' for _ in key_columns) + ')'
+                sql = f"SELECT {selected} FROM {table} WHERE ({target}) IN (VALUES {', '.join(row for _ in batch)})"
+                params = tuple(value for key in batch for value in key)
+            yield from connection.exec_driver_sql(sql, params)
+
+    def _merge_chunk(self, table_name: str, sql: str, columns: Tuple[str, ...],
+                     key_columns: Tuple[str, ...], chunk: List[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Unité d'écriture : fusionner un lot (savepoint), avec repli ligne à ligne en cas d'échec"""
+        result = self.empty_result(merge=True)
+        result['chunks_count'] = 1
+
+        # Une même clé ne peut apparaître qu'une fois par lot (sinon comptes faussés)
+        seen: Dict[tuple, int] = {}
+        rows = []
+        for index, row in chunk:
+            key = tuple(row[col] for col in key_columns)
+            if key in seen:
+                self.record_error(result, index, f"Clé en double dans les données (ligne {seen[key]})")
+                continue
+            seen[key] = index
+            rows.append((index, key, tuple(row[col] for col in columns)))
+
+        table_versions.mark_changed(db.session, table_name)
+        try:
+            with db.session.begin_nested():
+                connection = db.session.connection()
+                existing = self.existing_keys(connection, table_name, key_columns, [key for _, key, _ in rows])
+                changed = connection.exec_driver_sql(sql, [params for _, _, params in rows]).rowcount
+        except Exception:
+            pass
+        else:
+            # rowcount = lignes insérées + lignes réellement mises à jour
+            new_count = sum(1 for _, key, _ in rows if key not in existing)
+            updated_count = changed - new_count
+            result['inserted_count'] += new_count
+            result['updated_count'] += updated_count
+            result['unchanged_count'] += len(rows) - new_count - updated_count
+            return result
+
+        # Le lot contient au moins une ligne invalide : on isole chaque ligne
+        try:
+            existing = self.existing_keys(db.session.connection(), table_name, key_columns,
+                                          [key for _, key, _ in rows])
+        except Exception as e:
+            # Clés illisibles (type de clé invalide...) : erreur sur chaque ligne du lot
+            for index, _, _ in rows:
+                self.record_error(result, index, e)
+            return result
+        for index, key, params in rows:
+            try:
+                with db.session.begin_nested():
+                    changed = db.session.connection().exec_driver_sql(sql, params).rowcount
+            except Exception as e:
+                self.record_error(result, index, e)
+                continue
+            if key not in existing:
+                result['inserted_count'] += 1
+            elif changed:
+                result['updated_count'] += 1
+            else:
+                result['unchanged_count'] += 1
+        return result
+
+
+# Instance globale du service
+bulk_loader = BulkLoader()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - VALIDATION À BLANC DES IMPORTS EN MASSE
+Diagnostic ligne par ligne avant chargement, sans écriture en base
+
+- Conversion de types (plan de conversion compilé)
+- Contraintes NOT NULL, UNIQUE et clés étrangères lues dans le catalogue du schéma
+- Unicité et clés étrangères vérifiées par ensembles (une requête IN par lot de valeurs)
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from app import db
+from app.services.bulk_loader import MAX_REPORTED_ERRORS, bulk_loader
+from app.services.column_converters import column_converters
+from app.services.schema_catalog import schema_catalog
+
+
+IndexedRow = Tuple[int, Dict[str, Any]]
+
+
+class ValidationRun:
+    """
+    Validation d'un import (éventuellement reçu en plusieurs lots)
+
+    Conserve les clés déjà vues pour détecter les doublons entre lots.
+    """
+
+    def __init__(self, table_name: str, mode: str = 'insert',
+                 key: Union[str, Sequence[str], None] = None):
+        table = schema_catalog.get_table(table_name)
+        if table is None:
+            raise ValueError(f"Table '{table_name}' n'existe pas")
+
+        self.table_name = table_name
+        self.mode = mode
+        self.key = key
+        self.merge_key: Optional[Tuple[str, ...]] = None
+
+        # Colonnes obligatoires : NOT NULL sans valeur par défaut (hors rowid auto)
+        rowid_alias = (
+            table['primary_key'][0]
+            if len(table['primary_key']) == 1
+            and 'INT' in (table['columns_by_name'][table['primary_key'][0]]['type'] or '').upper()
+            else None
+        )
+        self.not_null = tuple(col['name'] for col in table['columns'] if col['not_null'] and col['name'] != rowid_alias)
+        self.required = frozenset(
+            col['name'] for col in table['columns']
+            if col['not_null'] and col['default'] is None and col['name'] != rowid_alias
+        )
+        self.unique_keys = schema_catalog.unique_keys(table_name)
+        self.foreign_keys = table['foreign_keys']
+        self.seen_keys: Dict[Tuple[str, ...], Dict[tuple, int]] = {key: {} for key in self.unique_keys}
+
+    def check(self, indexed_rows: List[IndexedRow]) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Vérifier des lignes déjà converties
+
+        Returns:
+            tuple: (nombre de lignes valides, erreurs [{'index', 'column', 'code', 'message'}])
+        """
+        row_errors: Dict[int, List[Dict[str, Any]]] = {}
+
+        def add_error(index, column, code, message):
+            row_errors.setdefault(index, []).append(
+                {'index': index, 'column': column, 'code': code, 'message': message}
+            )
+
+        if self.mode == 'merge' and self.merge_key is None and indexed_rows:
+            columns = {col for _, row in indexed_rows for col in row}
+            self.merge_key = bulk_loader.resolve_merge_key(self.table_name, self.key, columns)
+
+        # NOT NULL
+        for index, row in indexed_rows:
+            for column in self.not_null:
+                if row.get(column) is None and (column in row or column in self.required):
+                    add_error(index, column, 'not_null', f"Valeur obligatoire manquante ({column})")
+
+        # Clé de fusion présente sur chaque ligne
+        if self.merge_key:
+            for index, row in indexed_rows:
+                if any(row.get(col) is None for col in self.merge_key):
+                    add_error(index, ', '.join(self.merge_key), 'merge_key',
+                              f"Clé de fusion incomplète ({', '.join(self.merge_key)})")
+
+        # UNIQUE : doublons dans les données puis valeurs déjà présentes en base
+        rows_by_index = dict(indexed_rows) if self.merge_key else {}
+        for key_columns in self.unique_keys:
+            rows_with_key = [
+                (index, tuple(row[col] for col in key_columns))
+                for index, row in indexed_rows
+                if all(row.get(col) is not None for col in key_columns)
+            ]
+            if not rows_with_key:
+                continue
+            label = ', '.join(key_columns)
+            seen = self.seen_keys[key_columns]
+            for index, value in rows_with_key:
+                if value in seen:
+                    add_error(index, label, 'unique', f"Valeur en double dans les données ({label}, ligne {seen[value]})")
+                else:
+                    seen[value] = index
+
+            # En fusion, une clé déjà présente met la ligne à jour : pas d'erreur
+            if self.merge_key and set(key_columns) == set(self.merge_key):
+                continue
+            values = {value for _, value in rows_with_key}
+            if self.merge_key:
+                # Autre clé unique : conflit seulement si la valeur appartient à une autre
+                # ligne que celle mise à jour (clé de fusion différente)
+                owners = bulk_loader.existing_owners(db.session.connection(), self.table_name,
+                                                     key_columns, list(values), self.merge_key)
+                conflicts = [
+                    (index, value) for index, value in rows_with_key
+                    if owners.get(value, set()) - {tuple(rows_by_index[index].get(col) for col in self.merge_key)}
+                ]
+            else:
+                existing = self._existing_values(self.table_name, key_columns, values)
+                conflicts = [(index, value) for index, value in rows_with_key if value in existing]
+            for index, value in conflicts:
+                add_error(index, label, 'unique', f"Valeur déjà présente en base ({label} = {self._format(value)})")
+
+        # Clés étrangères
+        for fk in self.foreign_keys:
+            if None in fk['referred_columns']:
+                # Parent sans clé primaire correspondante : référence rejetée par SQLite ("foreign key mismatch")
+                continue
+            columns = tuple(fk['columns'])
+            rows_with_fk = [
+                (index, tuple(row[col] for col in columns))
+                for index, row in indexed_rows
+                if all(row.get(col) is not None for col in columns)
+            ]
+            if not rows_with_fk:
+                continue
+            values = {value for _, value in rows_with_fk}
+            existing = self._existing_values(fk['referred_table'], tuple(fk['referred_columns']), values)
+            if fk['referred_table'] == self.table_name:
+                # Auto-référence : une ligne peut pointer vers une ligne du même import
+                existing |= {
+                    tuple(row.get(col) for col in fk['referred_columns']) for _, row in indexed_rows
+                }
+            label = ', '.join(columns)
+            for index, value in rows_with_fk:
+                if value not in existing:
+                    add_error(index, label, 'foreign_key',
+                              f"Référence inexistante dans {fk['referred_table']} ({label} = {self._format(value)})")
+
+        errors = [error for index in sorted(row_errors) for error in row_errors[index]]
+        return len(indexed_rows) - len(row_errors), errors
+
+    def _existing_values(self, table_name: str, columns: Tuple[str, ...], values: set) -> set:
+        """Valeurs déjà présentes en base, recherchées par lots de requêtes IN"""
+        return bulk_loader.existing_keys(db.session.connection(), table_name, columns, list(values))
+
+    @staticmethod
+    def _format(value: tuple) -> str:
+        return ', '.join(str(v) for v in value)
+
+
+class BulkValidator:
+    """Validation à blanc des imports en masse (aucune écriture en base)"""
+
+    @staticmethod
+    def summary_message(valid_count: int, invalid_count: int) -> str:
+        """Message de synthèse d'une validation à blanc"""
+        return (
+            f"Validation à blanc : {valid_count} lignes valides, {invalid_count} en erreur "
+            f"(aucune donnée insérée)"
+        )
+
+    def start(self, table_name: str, mode: str = 'insert',
+              key: Union[str, Sequence[str], None] = None) -> ValidationRun:
+        """Démarrer une validation en plusieurs lots (imports en flux)"""
+        return ValidationRun(table_name, mode=mode, key=key)
+
+    def validate(self, table_name: str, data_list: Iterable[Any], mode: str = 'insert',
+                 key: Union[str, Sequence[str], None] = None) -> Dict[str, Any]:
+        """
+        Valider une liste de lignes sans l'insérer
+
+        Returns:
+            dict: {'valid_count', 'invalid_count', 'total_processed', 'errors', 'errors_truncated'}
+        """
+        data_list = list(data_list)
+        plan = column_converters.get_plan(table_name)
+        if plan is None:
+            raise ValueError(f"Table '{table_name}' n'existe pas")
+
+        run = self.start(table_name, mode=mode, key=key)
+        indexed_rows, conversion_errors = plan.convert_rows(enumerate(data_list))
+        valid_count, errors = run.check(indexed_rows)
+
+        errors = sorted(
+            [{'code': 'conversion', **error} for error in conversion_errors] + errors,
+            key=lambda err: err['index']
+        )
+        invalid_count = len(conversion_errors) + len(indexed_rows) - valid_count
+        result = {
+            'valid_count': valid_count,
+            'invalid_count': invalid_count,
+            'total_processed': len(data_list),
+            'errors': errors[:MAX_REPORTED_ERRORS],
+            'errors_truncated': len(errors) > MAX_REPORTED_ERRORS
+        }
+        if run.merge_key:
+            result['merge_key'] = list(run.merge_key)
+        return result
+
+
+# Instance globale du service
+bulk_validator = BulkValidator()
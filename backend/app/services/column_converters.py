@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - CONVERTISSEURS DE COLONNES COMPILÉS
+Conversion des valeurs importées (collage, CSV, JSON) vers le type des colonnes
+
+- Un plan de conversion par table, compilé une fois depuis le catalogue du schéma
+- Conversion colonne par colonne sur un lot de lignes
+- Montants Numeric(10, 2) arrondis en Decimal puis transmis en texte (affinité
+  NUMERIC), virgule décimale française acceptée
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+import re
+import threading
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.services.schema_catalog import schema_catalog
+
+
+TRUE_VALUES = frozenset(('true', '1', 'yes', 'oui', 'vrai', 'o', 'x'))
+FALSE_VALUES = frozenset(('false', '0', 'no', 'non', 'faux', 'n'))
+
+# Séparateurs de milliers : espace, espace insécable, espace fine insécable
+THOUSANDS_SEPARATORS = str.maketrans('', '', ' \u00a0\u202f')
+
+NUMERIC_SCALE_RE = re.compile(r'\(\s*\d+\s*,\s*(\d+)\s*\)')
+
+Converter = Callable[[Any], Any]
+IndexedRow = Tuple[int, Dict[str, Any]]
+
+
+def _normalize_number(value: str) -> str:
+    """'1 234,50' -> '1234.50'"""
+    return value.strip().translate(THOUSANDS_SEPARATORS).replace(',', '.')
+
+
+def to_integer(value: Any) -> Optional[int]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError(f"nombre entier attendu : {value!r}")
+        return int(value)
+    text = _normalize_number(str(value))
+    if not text:
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        # '12.0' / '12,00' : accepté si la partie décimale est nulle
+        try:
+            number = Decimal(text)
+        except InvalidOperation:
+            raise ValueError(f"nombre entier attendu : {value!r}") from None
+        if not number.is_finite() or number != number.to_integral_value():
+            raise ValueError(f"nombre entier attendu : {value!r}")
+        return int(number)
+
+
+def to_float(value: Any) -> Optional[float]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = _normalize_number(str(value))
+    return float(text) if text else None
+
+
+def to_boolean(value: Any) -> Optional[bool]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, (bool, int)):
+        return bool(value)
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    if not text:
+        return None
+    raise ValueError(f"booléen attendu : {value!r}")
+
+
+def to_text(value: Any) -> Optional[str]:
+    if value is None or value == '':
+        return None
+    return str(value)
+
+
+def make_decimal_converter(scale: int) -> Converter:
+    """Convertisseur de montants : Decimal arrondi à `scale` décimales, rendu en texte pour SQLite"""
+    quantum = Decimal(1).scaleb(-scale)
+
+    def to_decimal(value: Any) -> Optional[str]:
+        if value is None or value == '':
+            return None
+        if isinstance(value, float):
+            value = repr(value)
+        text = _normalize_number(str(value))
+        if not text:
+            return None
+        try:
+            amount = Decimal(text).quantize(quantum, rounding=ROUND_HALF_UP)
+        except InvalidOperation:
+            raise ValueError(f"montant attendu : {value!r}") from None
+        # Texte plutôt que Decimal : le pilote sqlite3 n'accepte pas les Decimal
+        return str(amount)
+
+    return to_decimal
+
+
+def compile_converter(sql_type: str) -> Converter:
+    """Choisir le convertisseur d'une colonne d'après son type déclaré (règles d'affinité SQLite)"""
+    sql_type = (sql_type or '').upper()
+    if 'BOOL' in sql_type:
+        return to_boolean
+    if 'INT' in sql_type:
+        return to_integer
+    if 'CHAR' in sql_type or 'CLOB' in sql_type or 'TEXT' in sql_type:
+        return to_text
+    if 'NUMERIC' in sql_type or 'DECIMAL' in sql_type:
+        match = NUMERIC_SCALE_RE.search(sql_type)
+        return make_decimal_converter(int(match.group(1))) if match else to_float
+    if 'REAL' in sql_type or 'FLOA' in sql_type or 'DOUB' in sql_type:
+        return to_float
+    # DATE, DATETIME, JSON... : conservés en texte
+    return to_text
+
+
+class ConverterPlan:
+    """Plan de conversion d'une table : un convertisseur par colonne"""
+
+    __slots__ = ('table_name', 'columns', 'converters', 'column_set')
+
+    def __init__(self, table_name: str, columns: Iterable[Dict[str, Any]]):
+        columns = tuple(columns)
+        self.table_name = table_name
+        self.columns: Tuple[str, ...] = tuple(col['name'] for col in columns)
+        self.converters: Tuple[Converter, ...] = tuple(compile_converter(col['type']) for col in columns)
+        self.column_set = frozenset(self.columns)
+
+    def convert_rows(self, indexed_records: Iterable[Tuple[int, Any]]) -> Tuple[List[IndexedRow], List[Dict[str, Any]]]:
+        """
+        Convertir un lot de lignes colonne par colonne
+
+        Les lignes qui ne sont pas des dictionnaires ou dont toutes les valeurs
+        sont vides sont ignorées ; les clés inconnues de la table sont écartées.
+
+        Returns:
+            tuple: (lignes converties [(index, {colonne: valeur})], erreurs [{'index', 'column', 'message'}])
+        """
+        indexes = []
+        sources = []
+        for index, row in indexed_records:
+            if not isinstance(row, dict):
+                continue
+            if not any(str(value).strip() for value in row.values() if value is not None):
+                continue
+            indexes.append(index)
+            sources.append(row)
+
+        targets = [{} for _ in sources]
+        failed: Dict[int, Tuple[str, str]] = {}
+
+        for name, convert in zip(self.columns, self.converters):
+            positions = [pos for pos, row in enumerate(sources) if name in row]
+            if not positions:
+                continue
+            values = [sources[pos][name] for pos in positions]
+            try:
+                converted = list(map(convert, values))
+            except (ValueError, TypeError, ArithmeticError):
+                # Au moins une valeur invalide : reprise cellule par cellule
+                converted = []
+                for pos, value in zip(positions, values):
+                    try:
+                        converted.append(convert(value))
+                    except (ValueError, TypeError, ArithmeticError) as e:
+                        failed.setdefault(pos, (name, f"Conversion impossible ({name}) : {e}"))
+                        converted.append(None)
+            for pos, value in zip(positions, converted):
+                targets[pos][name] = value
+
+        indexed_rows = []
+        errors = []
+        for pos, (index, target) in enumerate(zip(indexes, targets)):
+            if pos in failed:
+                column, message = failed[pos]
+                errors.append({'index': index, 'column': column, 'message': message})
+            elif target:
+                indexed_rows.append((index, target))
+        return indexed_rows, errors
+
+
+class ColumnConverterService:
+    """Cache des plans de conversion, recompilés après un changement de schéma"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._plans: Dict[str, ConverterPlan] = {}
+        self._catalog_version = None
+
+    def get_plan(self, table_name: str) -> Optional[ConverterPlan]:
+        """Plan de conversion d'une table (None si la table n'existe pas)"""
+        table = schema_catalog.get_table(table_name)
+        if table is None:
+            return None
+        with self._lock:
+            if self._catalog_version != schema_catalog.version:
+                self._plans.clear()
+                self._catalog_version = schema_catalog.version
+            plan = self._plans.get(table_name)
+            if plan is None:
+                plan = self._plans[table_name] = ConverterPlan(table_name, table['columns'])
+            return plan
+
+
+# Instance globale du service
+column_converters = ColumnConverterService()
@@ -12,9 +12,16 @@ Version: 2.0 - Architecture unifiée
 import os
 import re
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from sqlalchemy import text, inspect
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
+from sqlalchemy import text
 from app import db
+from app.services.bulk_loader import DEFAULT_CHUNK_SIZE, bulk_loader
+from app.services.bulk_validator import bulk_validator
+from app.services.column_converters import column_converters
+from app.services.module_registry import module_registry
+from app.services.schema_catalog import schema_catalog
+from app.services.table_metadata import table_metadata_service
+from app.utils.sqlite_engine import DB_PATH, database_uri
 
 
 class DatabaseManager:
@@ -24,7 +31,7 @@ class DatabaseManager:
         """Initialiser le service avec configuration centralisée"""
         # Configuration centralisée de la base de données
         self.db_path = self._get_centralized_db_path()
-        self.sqlalchemy_uri = f"sqlite:///{self.db_path}"
+        self.sqlalchemy_uri = database_uri()
         
         # Modules ATARYS selon nomenclature officielle
         self.modules_atarys = {
@@ -62,11 +69,8 @@ class DatabaseManager:
     
     def _get_centralized_db_path(self) -> str:
         """Obtenir le chemin centralisé vers la base de données"""
-        # Chemin absolu depuis la racine du projet
-        return os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-            'data', 'atarys_data.db'
-        )
+        # Chemin absolu commun à l'application et aux scripts
+        return str(DB_PATH)
     
     # ============================================================================
     # MÉTHODES POUR LES TABLES
@@ -75,12 +79,11 @@ class DatabaseManager:
     def list_tables(self) -> Dict[str, Any]:
         """Lister toutes les tables de la base de données"""
         try:
-            # Utiliser SQLAlchemy pour lister les tables
-            inspector = inspect(db.engine)
-            tables = inspector.get_table_names()
+            # Lire les tables depuis le catalogue du schéma
+            tables = schema_catalog.table_names()
             
             # Filtrer les tables système
-            user_tables = [t for t in tables if not t.startswith('sqlite_') and t != 'alembic_version']
+            user_tables = [t for t in tables if t != 'alembic_version']
             
             return {
                 'success': True,
@@ -93,29 +96,59 @@ class DatabaseManager:
                 'message': f'Erreur lors du listing des tables : {str(e)}'
             }
     
+    def get_catalog(self) -> Dict[str, Any]:
+        """Catalogue complet : structure de chaque table, date de création et nombre de lignes"""
+        try:
+            tables = [t for t in schema_catalog.table_names() if t != 'alembic_version']
+            metadata = table_metadata_service.get_all(tables)
+            
+            catalog = []
+            for table_name in tables:
+                table = schema_catalog.get_table(table_name)
+                table_meta = metadata.get(table_name, {})
+                catalog.append({
+                    'name': table_name,
+                    'module_id': self._determine_module_id(table_name),
+                    'columns': table['columns'],
+                    'primary_key': table['primary_key'],
+                    'unique_indexes': table['unique_indexes'],
+                    'foreign_keys': table['foreign_keys'],
+                    'created_at': table_meta.get('created_at', '-'),
+                    'row_count': table_meta.get('row_count')
+                })
+            
+            return {
+                'success': True,
+                'data': catalog,
+                'message': f'{len(catalog)} tables dans le catalogue'
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Erreur lors de la lecture du catalogue : {str(e)}'
+            }
+    
     def get_table_info(self, table_name: str) -> Dict[str, Any]:
         """Récupérer les informations détaillées d'une table"""
         try:
-            inspector = inspect(db.engine)
-            
             # Vérifier que la table existe
-            if table_name not in inspector.get_table_names():
+            if not schema_catalog.has_table(table_name):
                 return {
                     'success': False,
                     'message': f'Table {table_name} n\'existe pas'
                 }
             
             # Récupérer les colonnes
-            columns = inspector.get_columns(table_name)
+            columns = schema_catalog.get_columns(table_name)
             column_info = []
             
             for col in columns:
                 column_info.append({
                     'name': col['name'],
-                    'type': str(col['type']),
-                    'nullable': col['nullable'],
+                    'type': col['type'],
+                    'nullable': not col['not_null'] and not col['primary_key'],
                     'default': col['default'],
-                    'primary_key': col.get('primary_key', False)
+                    'primary_key': col['primary_key']
                 })
             
             # Déterminer le module basé sur le nom de la table
@@ -190,8 +223,7 @@ class DatabaseManager:
         """Supprimer une table complètement (base + fichiers générés)"""
         try:
             # Vérifier que la table existe
-            inspector = inspect(db.engine)
-            if table_name not in inspector.get_table_names():
+            if not schema_catalog.has_table(table_name):
                 return {
                     'success': False,
                     'message': f'Table {table_name} n\'existe pas'
@@ -200,6 +232,8 @@ class DatabaseManager:
             # Supprimer la table SQLite
             db.session.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
             db.session.commit()
+            schema_catalog.invalidate()
+            table_metadata_service.unregister_table(table_name)
             
             # Supprimer les fichiers générés
             self._delete_generated_files_by_table_name(table_name)
@@ -215,76 +249,61 @@ class DatabaseManager:
                 'message': f'Erreur lors de la suppression : {str(e)}'
             }
     
-    def bulk_insert(self, table_name: str, data_list: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Insérer des données en masse dans une table"""
+    def bulk_insert(self, table_name: str, data_list: List[Dict[str, Any]],
+                    mode: str = 'insert', key: Optional[Any] = None,
+                    dry_run: bool = False,
+                    progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """
+        Insérer des données en masse dans une table (lots executemany)
+        
+        Args:
+            table_name (str): Nom de la table
+            data_list (list): Liste de dictionnaires de données
+            mode (str): 'insert' (ajout) ou 'merge' (fusion sur une clé unique)
+            key (str|list): Clé de fusion ; déduite des index uniques si absente
+            dry_run (bool): Valider seulement (types, NOT NULL, unicité, clés étrangères)
+            progress (callable): Rappel progress(lignes traitées) après chaque lot (tâches de fond)
+        """
         try:
-            # Vérifier que la table existe
-            inspector = inspect(db.engine)
-            if table_name not in inspector.get_table_names():
+            # Vérifier que la table existe et récupérer son plan de conversion
+            plan = column_converters.get_plan(table_name)
+            if not plan:
                 return {
                     'success': False,
                     'message': f"Table '{table_name}' n'existe pas"
                 }
             
-            # Récupérer la structure de la table
-            columns = inspector.get_columns(table_name)
-            column_names = [col['name'] for col in columns]
-            
-            # Valider et nettoyer les données
-            cleaned_data = []
-            for row in data_list:
-                if not isinstance(row, dict):
-                    continue
-                
-                # Filtrer les lignes vides
-                if not any(str(value).strip() for value in row.values()):
-                    continue
-                
-                # Nettoyer les données
-                cleaned_row = {}
-                for col_name, value in row.items():
-                    if col_name in column_names:
-                        # Convertir les types selon la colonne
-                        cleaned_value = self._convert_value_type(value, columns[column_names.index(col_name)])
-                        cleaned_row[col_name] = cleaned_value
-                
-                if cleaned_row:  # Ne pas ajouter de lignes vides
-                    cleaned_data.append(cleaned_row)
-            
-            if not cleaned_data:
+            if dry_run:
+                result = bulk_validator.validate(table_name, data_list, mode=mode, key=key)
+                return {
+                    'success': True,
+                    'message': bulk_validator.summary_message(result['valid_count'], result['invalid_count']),
+                    'data': result
+                }
+            
+            # Valider et convertir les données (index d'origine conservé)
+            indexed_rows, conversion_errors = plan.convert_rows(enumerate(data_list))
+            
+            if not indexed_rows and not conversion_errors:
                 return {
                     'success': False,
                     'message': "Aucune donnée valide à insérer"
                 }
             
-            # Insérer les données via SQLAlchemy
-            inserted_count = 0
-            for row in cleaned_data:
-                try:
-                    # Construire la requête SQL dynamique
-                    columns_str = ', '.join(row.keys())
-                    placeholders = ', '.join(['?' for _ in row])
-                    values = list(row.values())
-                    
-                    query = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})"
-                    db.session.execute(text(query), values)
-                    inserted_count += 1
-                        
-                except Exception as e:
-                    # Continuer avec les autres lignes en cas d'erreur
-                    print(f"Erreur insertion ligne {row}: {str(e)}")
-                    continue
-            
-            db.session.commit()
+            # Insérer ou fusionner les données par lots (une transaction par lot)
+            result = bulk_loader.load(table_name, indexed_rows, mode=mode, key=key, progress=progress)
+            valid_data_count = len(indexed_rows) + len(conversion_errors)
+            result.update(
+                failed_count=len(conversion_errors) + result['failed_count'],
+                total_processed=len(data_list),
+                valid_data_count=valid_data_count,
+                errors=sorted(conversion_errors + result['errors'], key=lambda err: err['index'])
+            )
             
             return {
                 'success': True,
-                'message': f"{inserted_count} lignes insérées sur {len(cleaned_data)} données valides",
-                'data': {
-                    'inserted_count': inserted_count,
-                    'total_processed': len(data_list),
-                    'valid_data_count': len(cleaned_data)
-                }
+                'message': bulk_loader.summary_message(result, valid_data_count),
+                'data': result
             }
         except Exception as e:
             db.session.rollback()
@@ -293,6 +312,80 @@ class DatabaseManager:
                 'message': f"Erreur lors de l'insertion en masse : {str(e)}"
             }
     
+    def stream_insert(self, table_name: str, records: Iterable[Tuple[int, Any, Optional[str]]],
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, mode: str = 'insert',
+                      key: Optional[Any] = None, dry_run: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Insérer un flux de lignes par lots de taille fixe
+        
+        Args:
+            table_name (str): Nom de la table (existence vérifiée par l'appelant)
+            records (iterable): Triplets (index, ligne, erreur de lecture ou None)
+            chunk_size (int): Nombre de lignes par lot / transaction
+            mode (str): 'insert' (ajout) ou 'merge' (fusion sur une clé unique)
+            key (str|list): Clé de fusion ; déduite des index uniques si absente
+            dry_run (bool): Valider seulement, sans insertion
+        
+        Yields:
+            dict: Un état 'progress' par lot puis un état 'summary' final
+        """
+        plan = column_converters.get_plan(table_name)
+        validation = bulk_validator.start(table_name, mode=mode, key=key) if dry_run else None
+        if validation:
+            totals = {'processed': 0, 'valid_count': 0, 'failed_count': 0, 'chunks_count': 0}
+        else:
+            totals = {'processed': 0, 'inserted_count': 0, 'failed_count': 0, 'chunks_count': 0}
+            if mode == 'merge':
+                totals.update(updated_count=0, unchanged_count=0)
+        pending = []
+        pending_errors = []
+        
+        def flush():
+            indexed_rows, conversion_errors = plan.convert_rows(pending)
+            if validation:
+                valid_count, check_errors = validation.check(indexed_rows)
+                conversion_errors = [{'code': 'conversion', **error} for error in conversion_errors]
+                result = {'valid_count': valid_count, 'failed_count': len(indexed_rows) - valid_count,
+                          'errors': check_errors}
+            else:
+                result = bulk_loader.load(table_name, indexed_rows, mode=mode, key=key, chunk_size=chunk_size)
+            errors = sorted(pending_errors + conversion_errors + result['errors'], key=lambda err: err['index'])
+            for count in ('inserted_count', 'updated_count', 'unchanged_count', 'valid_count'):
+                if count in totals:
+                    totals[count] += result.get(count, 0)
+            totals['failed_count'] += len(pending_errors) + len(conversion_errors) + result['failed_count']
+            totals['chunks_count'] += 1
+            pending.clear()
+            pending_errors.clear()
+            return {'type': 'progress', 'chunk': totals['chunks_count'], **totals, 'errors': errors}
+        
+        try:
+            for index, record, read_error in records:
+                totals['processed'] += 1
+                if read_error:
+                    pending_errors.append({'index': index, 'message': read_error})
+                else:
+                    pending.append((index, record))
+                if len(pending) + len(pending_errors) >= chunk_size:
+                    yield flush()
+            if pending or pending_errors:
+                yield flush()
+        except Exception as e:
+            db.session.rollback()
+            yield {'type': 'error', 'success': False, 'message': f"Erreur lors de l'import en flux : {str(e)}", **totals}
+            return
+        
+        if validation:
+            message = bulk_validator.summary_message(totals['valid_count'], totals['failed_count'])
+        else:
+            message = bulk_loader.summary_message(totals, totals['processed'], 'lignes lues')
+        yield {
+            'type': 'summary',
+            'success': True,
+            'message': message,
+            **totals
+        }
+    
     # ============================================================================
     # MÉTHODES POUR LES RELATIONS
     # ============================================================================
@@ -350,11 +443,8 @@ class DatabaseManager:
                            target_table: str, target_column: str) -> Dict[str, Any]:
         """Valider si une clé étrangère est possible"""
         try:
-            inspector = inspect(db.engine)
-            
             # Vérifier que les tables existent
-            tables = inspector.get_table_names()
-            if source_table not in tables or target_table not in tables:
+            if not schema_catalog.has_table(source_table) or not schema_catalog.has_table(target_table):
                 return {
                     'success': True,
                     'data': {'is_valid': False},
@@ -362,29 +452,18 @@ class DatabaseManager:
                 }
             
             # Vérifier que les colonnes existent
-            source_columns = [col['name'] for col in inspector.get_columns(source_table)]
-            target_columns = [col['name'] for col in inspector.get_columns(target_table)]
+            source_col = schema_catalog.get_column(source_table, source_column)
+            target_col = schema_catalog.get_column(target_table, target_column)
             
-            if source_column not in source_columns or target_column not in target_columns:
+            if not source_col or not target_col:
                 return {
                     'success': True,
                     'data': {'is_valid': False},
                     'message': 'Une ou les deux colonnes n\'existent pas'
                 }
             
-            # Vérifier que la colonne cible est une clé primaire ou unique
-            target_cols = inspector.get_columns(target_table)
-            target_col = next((col for col in target_cols if col['name'] == target_column), None)
-            
-            if not target_col:
-                return {
-                    'success': True,
-                    'data': {'is_valid': False},
-                    'message': 'Colonne cible introuvable'
-                }
-            
             # La colonne cible doit être une clé primaire ou avoir un index unique
-            is_valid = target_col.get('primary_key', False) or self._has_unique_index(target_table, target_column)
+            is_valid = target_col['primary_key'] or self._has_unique_index(target_table, target_column)
             
             return {
                 'success': True,
@@ -568,23 +647,37 @@ class {class_name}(BaseModel):
         table_name = table_data['table_name']
         main_module = str(table_data['module_id']).split('_')[0]
         
+        # Colonnes autorisées pour le tri de la liste paginée (hors clé primaire et texte long)
+        sort_fields = tuple(
+            col['name'] for col in table_data['columns']
+            if not col.get('primaryKey') and col.get('type') != 'Text'
+            and col['name'] not in ('id', 'created_at', 'updated_at')
+        ) + ('created_at',)
+        
         route_code = (
             f"\n# Routes CRUD pour {class_name}\n"
             f"from app.schemas.module_{main_module} import {class_name}Schema\n"
+            f"from app.utils.pagination import paginate\n"
+            f"from app.utils.query_shaping import shape_query, sparse_schema\n"
+            f"from app.services.write_queue import create_item, write_queue\n"
+            f"from app.utils.serializer_compiler import serialize\n"
             f"{table_name}_schema = {class_name}Schema()\n"
             f"{table_name}_schemas = {class_name}Schema(many=True)\n\n"
         )
         
-        # GET
+        # GET (paginé : limit, sort, cursor, total ; champs partiels : fields, expand)
         route_code += (
             f"@module_{main_module}_bp.route('/api/{table_name}/', methods=['GET'])\n"
             f"def list_{table_name}():\n"
             f"    try:\n"
-            f"        items = {class_name}.query.all()\n"
+            f"        schema = sparse_schema({table_name}_schemas)\n"
+            f"        page = paginate(shape_query({class_name}.query, schema), {class_name},\n"
+            f"                        sort_fields={sort_fields!r})\n"
             f"        return jsonify({{\n"
             f"            'success': True,\n"
-            f"            'data': {table_name}_schemas.dump(items),\n"
-            f"            'message': f'{{len(items)}} {table_name} trouvés'\n"
+            f"            'data': serialize(schema, page.items),\n"
+            f"            'message': f'{{len(page.items)}} {table_name} trouvés',\n"
+            f"            'pagination': page.meta\n"
             f"        }})\n"
             f"    except Exception as e:\n"
             f"        return jsonify({{'success': False, 'message': str(e)}}), 400\n\n"
@@ -599,12 +692,10 @@ class {class_name}(BaseModel):
             f"        errors = {table_name}_schema.validate(data)\n"
             f"        if errors:\n"
             f"            return jsonify({{'success': False, 'message': errors}}), 400\n"
-            f"        new_item = {class_name}(**data)\n"
-            f"        db.session.add(new_item)\n"
-            f"        db.session.commit()\n"
+            f"        new_item = write_queue.run(create_item, {class_name}, data, {table_name}_schema)\n"
             f"        return jsonify({{\n"
             f"            'success': True,\n"
-            f"            'data': {table_name}_schema.dump(new_item),\n"
+            f"            'data': new_item,\n"
             f"            'message': '{class_name} créé avec succès'\n"
             f"        }})\n"
             f"    except Exception as e:\n"
@@ -671,6 +762,7 @@ class {class_name}Schema(Schema):
                     f.write('\n')
                     f.write(model_code)
             
+            module_registry.write_manifest()
             return True
         except Exception as e:
             print(f"❌ Erreur écriture modèle: {e}")
@@ -697,6 +789,7 @@ class {class_name}Schema(Schema):
                     f.write('\n')
                     f.write(route_code)
             
+            module_registry.write_manifest()
             return True
         except Exception as e:
             print(f"❌ Erreur écriture routes: {e}")
@@ -741,34 +834,10 @@ class {class_name}Schema(Schema):
         # Cette méthode peut être étendue pour supprimer les fichiers générés
         pass
     
-    def _convert_value_type(self, value: Any, column_info: Dict[str, Any]) -> Any:
-        """Convertir une valeur selon le type de colonne"""
-        if value is None:
-            return None
-        
-        col_type = str(column_info['type']).lower()
-        
-        if 'integer' in col_type:
-            return int(value) if value else 0
-        elif 'real' in col_type or 'float' in col_type or 'numeric' in col_type:
-            return float(value) if value else 0.0
-        elif 'boolean' in col_type:
-            return bool(value) if value else False
-        else:
-            return str(value) if value else ''
-    
     def _has_unique_index(self, table_name: str, column_name: str) -> bool:
         """Vérifier si une colonne a un index unique"""
         try:
-            # Utiliser SQLAlchemy pour vérifier les index
-            inspector = inspect(db.engine)
-            indexes = inspector.get_indexes(table_name)
-            
-            for index in indexes:
-                if column_name in index['column_names'] and index.get('unique', False):
-                    return True
-            
-            return False
+            return schema_catalog.has_unique_index(table_name, column_name)
         except Exception as e:
             print(f"Erreur lors de la vérification de l'index unique: {e}")
             return False
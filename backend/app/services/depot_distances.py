@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - DISTANCES DES COMMUNES AU DÉPÔT
+Calcul en masse de distance_km_oiseau et temps_route_min pour toutes les villes
+
+- Distance orthodromique (haversine) calculée en une passe vectorisée NumPy
+- Temps de trajet estimé par un modèle de vitesse configurable (remplaçable
+  par un calculateur d'itinéraires exposant la même méthode travel_minutes)
+- Seules les villes dont les coordonnées ont changé depuis le dernier calcul
+  sont recalculées (latitude_calcul / longitude_calcul), sauf si le dépôt ou
+  le modèle de vitesse a changé
+- Écriture en un seul UPDATE groupé (executemany), confiée à la file d'écriture
+
+Configuration (app.config) :
+- DEPOT_LATITUDE / DEPOT_LONGITUDE : origine des distances
+- DEPOT_DETOUR_FACTOR : distance routière / distance à vol d'oiseau
+- DEPOT_SPEED_POINTS : vitesse moyenne (km/h) selon la distance routière (km)
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+import json
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import bindparam, update
+from app import db
+from app.models.module_9 import Ville
+from app.models.module_12 import Job
+from app.services.table_versions import table_versions
+from app.services.write_queue import write_queue
+
+try:
+    import numpy as np
+except ImportError:  # dépendance optionnelle (requirements/development.txt)
+    np = None
+
+
+DEPOT_DISTANCES_JOB = 'depot_distances'
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Dépôt ATARYS (déduit des distances à vol d'oiseau saisies dans villes)
+DEFAULT_DEPOT_LATITUDE = 47.998
+DEFAULT_DEPOT_LONGITUDE = -1.568
+
+# Modèle de vitesse par défaut, ajusté sur les temps saisis (trajets depuis le dépôt)
+DEFAULT_DETOUR_FACTOR = 1.3
+DEFAULT_SPEED_POINTS = ((0, 35), (10, 45), (40, 60), (80, 70), (200, 80))
+
+
+def haversine_km_vector(lat1, lon1, lat2, lon2):
+    """Distances orthodromiques (km) entre tableaux de coordonnées (diffusion NumPy)"""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(np.subtract(lon2, lon1))
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class SpeedModel:
+    """
+    Temps de trajet estimé sans calcul d'itinéraire
+
+    distance routière = distance à vol d'oiseau x facteur de détour ;
+    vitesse moyenne interpolée selon la distance routière (trajets courts plus lents)
+    """
+
+    def __init__(self, detour_factor: float = DEFAULT_DETOUR_FACTOR,
+                 speed_points: Sequence[Tuple[float, float]] = DEFAULT_SPEED_POINTS):
+        self.detour_factor = float(detour_factor)
+        self.speed_points = tuple((float(km), float(kmh)) for km, kmh in speed_points)
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return {'detour_factor': self.detour_factor, 'speed_points': [list(p) for p in self.speed_points]}
+
+    def travel_minutes(self, origin: Tuple[float, float], latitudes, longitudes, distances_km):
+        """Temps de trajet (minutes) du point d'origine vers chaque destination"""
+        return self.minutes_for_distance(distances_km)
+
+    def minutes_for_distance(self, distances_km):
+        """Temps de trajet (minutes) pour des distances à vol d'oiseau (tableau de toute forme)"""
+        road_km = np.asarray(distances_km) * self.detour_factor
+        distances, speeds = zip(*self.speed_points)
+        return road_km / np.interp(road_km, distances, speeds) * 60
+
+
+def _write_distances(values: Sequence[Dict[str, Any]]) -> None:
+    """Unité d'écriture : distances et coordonnées du calcul, un UPDATE groupé"""
+    table = Ville.__table__
+    db.session.execute(update(table).where(table.c.id == bindparam('b_id')), values)
+    # Écriture hors ORM : version de la table incrémentée au commit
+    table_versions.mark_changed(db.session, table.name)
+
+
+class DepotDistances:
+    """Recalcul des distances et temps de trajet des villes depuis le dépôt"""
+
+    def __init__(self):
+        # Calculateur de temps de trajet (SpeedModel d'après la configuration si None)
+        self.travel_time_model = None
+
+    def get_origin(self) -> Tuple[float, float]:
+        config = current_app.config
+        return (float(config.get('DEPOT_LATITUDE', DEFAULT_DEPOT_LATITUDE)),
+                float(config.get('DEPOT_LONGITUDE', DEFAULT_DEPOT_LONGITUDE)))
+
+    def get_travel_time_model(self):
+        if self.travel_time_model is not None:
+            return self.travel_time_model
+        config = current_app.config
+        return SpeedModel(config.get('DEPOT_DETOUR_FACTOR', DEFAULT_DETOUR_FACTOR),
+                          config.get('DEPOT_SPEED_POINTS', DEFAULT_SPEED_POINTS))
+
+    def run_params(self, origin: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+        """Paramètres d'un calcul (enregistrés avec la tâche, comparés au calcul suivant)"""
+        latitude, longitude = origin or self.get_origin()
+        model = self.get_travel_time_model()
+        return {
+            'latitude': latitude,
+            'longitude': longitude,
+            'model': getattr(model, 'params', type(model).__name__),
+        }
+
+    def compute(self, origin: Optional[Tuple[float, float]] = None, force: bool = False,
+                context=None) -> Dict[str, Any]:
+        """
+        Recalculer distance_km_oiseau et temps_route_min (commit par le thread écrivain)
+
+        Args:
+            origin (tuple): (latitude, longitude) du dépôt (configuration si None)
+            force (bool): Recalculer toutes les villes
+            context (JobContext): Avancement et annulation (tâche de fond)
+
+        Returns:
+            dict: {'success', 'updated_count', 'unchanged_count', 'without_coordinates', 'full_recompute'}
+        """
+        if np is None:
+            return {'success': False, 'message': 'NumPy requis pour le calcul des distances'}
+
+        origin = origin or self.get_origin()
+        params = self.run_params(origin)
+        full_recompute = force or params != self._last_run_params()
+
+        table = Ville.__table__
+        rows = db.session.execute(
+            db.select(table.c.id, table.c.latitude, table.c.longitude,
+                      table.c.latitude_calcul, table.c.longitude_calcul)
+        ).all()
+        if context is not None:
+            context.report(0, len(rows), message=f'{len(rows)} villes lues', force=True)
+
+        data = np.array([tuple(row) for row in rows], dtype=float).reshape(-1, 5)
+        ids, latitudes, longitudes, latitudes_calc, longitudes_calc = data.T
+        has_coordinates = ~(np.isnan(latitudes) | np.isnan(longitudes))
+        if full_recompute:
+            selected = has_coordinates
+        else:
+            # NaN != NaN : ville jamais calculée ou coordonnées retirées puis ressaisies
+            selected = has_coordinates & ((latitudes != latitudes_calc) | (longitudes != longitudes_calc))
+
+        ids = ids[selected].astype(np.int64)
+        latitudes, longitudes = latitudes[selected], longitudes[selected]
+        distances = haversine_km_vector(origin[0], origin[1], latitudes, longitudes)
+        minutes = self.get_travel_time_model().travel_minutes(origin, latitudes, longitudes, distances)
+
+        if len(ids):
+            write_queue.run(_write_distances, [
+                {'b_id': int(ville_id), 'distance_km_oiseau': round(float(distance), 2),
+                 'temps_route_min': round(float(duration), 1),
+                 'latitude_calcul': float(latitude), 'longitude_calcul': float(longitude)}
+                for ville_id, distance, duration, latitude, longitude
+                in zip(ids, distances, minutes, latitudes, longitudes)
+            ])
+        if context is not None:
+            context.report(len(rows), len(rows), force=True)
+
+        return {
+            'success': True,
+            'message': f'{len(ids)} villes recalculées',
+            'updated_count': int(len(ids)),
+            'unchanged_count': int(has_coordinates.sum() - len(ids)),
+            'without_coordinates': int((~has_coordinates).sum()),
+            'full_recompute': bool(full_recompute),
+            **params,
+        }
+
+    def _last_run_params(self) -> Optional[Dict[str, Any]]:
+        """Paramètres du dernier calcul réussi (table jobs)"""
+        job = (
+            Job.query.filter(Job.job_type == DEPOT_DISTANCES_JOB, Job.status == 'succeeded')
+            .order_by(Job.id.desc()).first()
+        )
+        if job is None or not job.result:
+            return None
+        result = json.loads(job.result)
+        return {key: result.get(key) for key in ('latitude', 'longitude', 'model')}
+
+
+# Instance globale du service
+depot_distances = DepotDistances()
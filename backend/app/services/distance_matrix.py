@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - MATRICE DES DISTANCES POUR LE PLANNING
+Distances deux à deux entre communes de chantier, domiciles des salariés et dépôt
+
+- Matrice complète des communes utilisées, calculée en une passe vectorisée
+  (haversine NumPy) et conservée en mémoire
+- Mise à jour incrémentale : seules les lignes/colonnes des communes nouvelles
+  ou dont les coordonnées ont changé sont calculées
+- Coordonnées relues uniquement quand la version de la table villes change
+- Points regroupés par source (salaries, clients...) : une source par table
+  portant un ville_id, enregistrée avec register_source
+- Sources filtrées sur la date du jour (salariés présents) : date incluse
+  dans la clé du cache des réponses (cache_key)
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+import threading
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app import db
+from app.models.module_3 import Clients
+from app.models.module_9 import Salaries, Ville
+from app.services.depot_distances import depot_distances, haversine_km_vector
+from app.services.table_versions import table_versions
+
+try:
+    import numpy as np
+except ImportError:  # dépendance optionnelle (requirements/development.txt)
+    np = None
+
+
+# Clé du dépôt parmi les communes de la matrice (les autres clés sont des ids de villes)
+DEPOT_KEY = 'depot'
+
+# Points par requête : la réponse contient points² distances
+MAX_POINTS = 1000
+
+# Communes conservées en cache (matrice float64 : ~130 Mo à 4000 communes)
+MAX_CACHED_LOCATIONS = 4000
+
+# Point de la matrice : (type, id, ville_id, libellé)
+Point = Tuple[str, Optional[int], Optional[int], Optional[str]]
+
+
+def _salaries_points() -> List[Point]:
+    """Domicile des salariés présents (sans date de sortie ou sortie à venir)"""
+    rows = (
+        db.session.query(Salaries.id, Salaries.ville_id, Salaries.prenom, Salaries.nom)
+        .filter(db.or_(Salaries.date_sortie.is_(None), Salaries.date_sortie >= date.today()))
+        .order_by(Salaries.id)
+    )
+    return [('salaries', id, ville_id, f'{prenom} {nom}') for id, ville_id, prenom, nom in rows]
+
+
+def _clients_points() -> List[Point]:
+    """Adresse des clients (lieu des chantiers tant que la table chantiers n'existe pas)"""
+    rows = db.session.query(Clients.id, Clients.ville_id, Clients.prenom, Clients.nom).order_by(Clients.id)
+    return [('clients', id, ville_id, ' '.join(filter(None, (prenom, nom))))
+            for id, ville_id, prenom, nom in rows]
+
+
+class DistanceMatrix:
+    """Cache des distances entre communes (et dépôt) utilisées par le planning"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Sources de points : nom -> (fonction de chargement, table lue, filtrée sur la date du jour)
+        self._sources: Dict[str, Tuple[Callable[[], List[Point]], str, bool]] = {}
+        self._reset()
+
+    def _reset(self) -> None:
+        self._index: Dict[Any, int] = {}
+        self._coordinates = np.empty((0, 2)) if np is not None else None
+        self._matrix = np.empty((0, 0)) if np is not None else None
+        self._villes_version = None
+
+    # ============================================================================
+    # SOURCES DE POINTS
+    # ============================================================================
+
+    def register_source(self, name: str, loader: Callable[[], List[Point]], table_name: str,
+                        date_dependent: bool = False) -> None:
+        """
+        Déclarer une source de points (ex. chantiers une fois la table créée)
+
+        Args:
+            name (str): Nom utilisé dans ?sources=
+            loader (callable): Retourne les points [(type, id, ville_id, libellé)]
+            table_name (str): Table lue (ETag des réponses)
+            date_dependent (bool): Points filtrés sur la date du jour (date.today())
+        """
+        self._sources[name] = (loader, table_name, date_dependent)
+
+    def source_names(self) -> List[str]:
+        return list(self._sources)
+
+    def source_tables(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """Tables lues par les sources demandées (toutes par défaut ; noms inconnus ignorés)"""
+        if names is None:
+            names = self._sources
+        return [self._sources[name][1] for name in names if name in self._sources]
+
+    def cache_key(self, names: Iterable[str]) -> str:
+        """Partie de la clé de cache hors versions des tables : date du jour si une source en dépend"""
+        if any(self._sources[name][2] for name in names if name in self._sources):
+            return date.today().isoformat()
+        return ''
+
+    def load_points(self, sources: Sequence[str] = (), ville_ids: Iterable[int] = (),
+                    depot: bool = True) -> List[Point]:
+        """
+        Points de la matrice : dépôt, points des sources, communes demandées
+
+        Raises:
+            ValueError: Source inconnue ou trop de points
+        """
+        unknown = [name for name in sources if name not in self._sources]
+        if unknown:
+            raise ValueError(f'Source inconnue : {", ".join(unknown)} ({", ".join(self._sources)})')
+
+        points: List[Point] = [(DEPOT_KEY, None, None, 'Dépôt')] if depot else []
+        for name in sources:
+            points.extend(self._sources[name][0]())
+        points.extend(('villes', ville_id, ville_id, None) for ville_id in ville_ids)
+        if len(points) > MAX_POINTS:
+            raise ValueError(f'Trop de points ({len(points)}, maximum {MAX_POINTS})')
+        return points
+
+    # ============================================================================
+    # MATRICE
+    # ============================================================================
+
+    def matrix(self, points: Sequence[Point]):
+        """
+        Distances à vol d'oiseau (km) entre les points, NaN si coordonnées inconnues
+
+        Returns:
+            numpy.ndarray: Matrice len(points) x len(points)
+        """
+        keys = [DEPOT_KEY if kind == DEPOT_KEY else ville_id for kind, _, ville_id, _ in points]
+        with self._lock:
+            self._update([key for key in dict.fromkeys(keys) if key is not None])
+            rows = np.array([self._index.get(key, -1) for key in keys], dtype=np.int64)
+            if not self._index:
+                # Aucune commune en cache : index -1 hors limites
+                return np.full((len(rows), len(rows)), np.nan)
+            matrix = self._matrix[np.ix_(rows, rows)]
+        # Index -1 : point sans commune
+        missing = rows < 0
+        matrix[missing, :] = np.nan
+        matrix[:, missing] = np.nan
+        return matrix
+
+    def _update(self, keys: List[Any]) -> None:
+        """Ajouter les communes absentes et recalculer celles dont les coordonnées ont changé"""
+        villes_version = table_versions.get(Ville.__tablename__)
+        new_keys = [key for key in keys if key not in self._index]
+        if len(self._index) + len(new_keys) > MAX_CACHED_LOCATIONS:
+            self._reset()
+            new_keys = keys
+
+        if villes_version != self._villes_version:
+            # Villes modifiées : relecture des coordonnées de toutes les communes en cache
+            stale_keys = list(self._index) + new_keys
+            self._villes_version = villes_version
+        else:
+            stale_keys = new_keys + ([DEPOT_KEY] if DEPOT_KEY in self._index else [])
+        if not stale_keys:
+            return
+
+        coordinates = self._fetch_coordinates(stale_keys)
+        added = set(new_keys)
+        if new_keys:
+            self._grow(new_keys)
+
+        changed = []
+        for key in stale_keys:
+            position = self._index[key]
+            point = coordinates.get(key, (np.nan, np.nan))
+            if key in added or not np.array_equal(self._coordinates[position], point, equal_nan=True):
+                self._coordinates[position] = point
+                changed.append(position)
+        if changed:
+            self._compute(np.array(changed, dtype=np.int64))
+
+    def _grow(self, new_keys: List[Any]) -> None:
+        size = len(self._index)
+        for offset, key in enumerate(new_keys):
+            self._index[key] = size + offset
+        total = size + len(new_keys)
+        matrix = np.full((total, total), np.nan)
+        matrix[:size, :size] = self._matrix
+        coordinates = np.full((total, 2), np.nan)
+        coordinates[:size] = self._coordinates
+        self._matrix, self._coordinates = matrix, coordinates
+
+    def _compute(self, positions) -> None:
+        """Recalculer les lignes et colonnes des communes aux positions données"""
+        latitudes, longitudes = self._coordinates[:, 0], self._coordinates[:, 1]
+        block = haversine_km_vector(latitudes[positions, None], longitudes[positions, None],
+                                    latitudes[None, :], longitudes[None, :])
+        self._matrix[positions, :] = block
+        self._matrix[:, positions] = block.T
+
+    @staticmethod
+    def _fetch_coordinates(keys: List[Any]) -> Dict[Any, Tuple[float, float]]:
+        """Coordonnées des communes (et du dépôt), en une requête"""
+        coordinates = {}
+        ville_ids = [key for key in keys if key != DEPOT_KEY]
+        if ville_ids:
+            rows = db.session.query(Ville.id, Ville.latitude, Ville.longitude).filter(
+                Ville.id.in_(ville_ids), Ville.latitude.isnot(None), Ville.longitude.isnot(None)
+            )
+            coordinates.update((ville_id, (lat, lon)) for ville_id, lat, lon in rows)
+        if DEPOT_KEY in keys:
+            coordinates[DEPOT_KEY] = depot_distances.get_origin()
+        return coordinates
+
+    def clear(self) -> None:
+        """Vider le cache (recalcul complet à la prochaine requête)"""
+        with self._lock:
+            self._reset()
+
+
+# Instance globale du service
+distance_matrix = DistanceMatrix()
+distance_matrix.register_source('salaries', _salaries_points, Salaries.__tablename__, date_dependent=True)
+# Chantiers : enregistrer la source 'chantiers' une fois le modèle créé (modules 3/4)
+distance_matrix.register_source('clients', _clients_points, Clients.__tablename__)
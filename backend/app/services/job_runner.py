@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - EXÉCUTEUR DE TÂCHES DE FOND
+Exécution hors requête HTTP des opérations longues (imports en masse, CSV...)
+
+- Pool de threads dans le processus Flask (JOB_WORKERS, 2 par défaut)
+- Statut, avancement et résultat persistés dans la table jobs (écritures
+  confiées à la file d'écriture, comme celles des routes)
+- Annulation coopérative : la tâche s'arrête au prochain point de contrôle
+- Tâches interrompues par un arrêt marquées en échec au démarrage du serveur
+  (create_app ; maître gunicorn avant le fork), fichiers temporaires supprimés
+- Serveur multi-processus : un pool par worker, récupération faite une seule
+  fois par le processus maître
+
+Configuration (app.config) :
+- JOB_WORKERS : threads du pool
+- JOB_RECOVERY_AT_STARTUP : False pour ne pas récupérer les tâches au démarrage
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import click
+from sqlalchemy import inspect, update
+from app import db
+from app.models.module_12 import Job
+from app.services.write_queue import write_queue
+
+
+DEFAULT_JOB_WORKERS = 2
+
+# Intervalle minimal entre deux écritures d'avancement (secondes)
+PROGRESS_INTERVAL = 0.5
+
+# Préfixe des fichiers temporaires des tâches (corps de requête copiés sur disque)
+SPOOL_PREFIX = 'atarys_import_'
+
+JOB_STATUSES = ('pending', 'running', 'succeeded', 'failed', 'cancelled')
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    """Levée au point de contrôle d'une tâche dont l'annulation a été demandée"""
+
+
+class JobContext:
+    """Accès de la tâche en cours à son avancement et à sa demande d'annulation"""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.cancelled = False
+        self.processed = 0
+        self._last_write = 0.0
+
+    def report(self, processed: int, total: Optional[int] = None,
+               message: Optional[str] = None, force: bool = False) -> None:
+        """
+        Enregistrer l'avancement et vérifier la demande d'annulation
+
+        Appelé entre deux lots : l'écriture passe par la file d'écriture (hors de
+        la session de travail), limitée à une toutes les PROGRESS_INTERVAL secondes.
+
+        Raises:
+            JobCancelled: L'annulation de la tâche a été demandée
+        """
+        self.processed = processed
+        now = time.monotonic()
+        if not force and now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+
+        values = {'processed': processed, 'updated_at': datetime.utcnow()}
+        if total is not None:
+            values['total'] = total
+        if message is not None:
+            values['message'] = message[:255]
+        if write_queue.run(_write_progress, self.job_id, values):
+            self.cancelled = True
+            raise JobCancelled(f'Tâche {self.job_id} annulée')
+
+    def progress_callback(self, total: Optional[int] = None) -> Callable[[int], None]:
+        """Rappel d'avancement pour les services (nombre de lignes traitées)"""
+        return lambda processed: self.report(processed, total)
+
+
+def _write_progress(job_id: int, values: Dict[str, Any]) -> bool:
+    """Unité d'écriture : avancement d'une tâche ; retourne sa demande d'annulation"""
+    table = Job.__table__
+    db.session.execute(update(table).where(table.c.id == job_id).values(**values))
+    return bool(db.session.execute(
+        table.select().with_only_columns(table.c.cancel_requested).where(table.c.id == job_id)
+    ).scalar())
+
+
+def _update_job(job_id: int, values: Dict[str, Any], unfinished_only: bool = False) -> None:
+    """Unité d'écriture : colonnes d'une tâche (seulement si elle n'est pas terminée)"""
+    table = Job.__table__
+    statement = update(table).where(table.c.id == job_id)
+    if unfinished_only:
+        statement = statement.where(table.c.status.notin_(FINISHED_STATUSES))
+    db.session.execute(statement.values(**values))
+
+
+def _create_job(values: Dict[str, Any]) -> int:
+    """Unité d'écriture : enregistrer une tâche ; retourne son id"""
+    job = Job(**values)
+    db.session.add(job)
+    db.session.flush()
+    return job.id
+
+
+def _starting_server() -> bool:
+    """
+    Démarrage d'un serveur de développement (python app.py, flask run)
+
+    Faux pour les autres commandes CLI (flask db upgrade... pendant que le serveur
+    tourne) et sous gunicorn, où le maître récupère les tâches avant le fork.
+    """
+    if os.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+        return False
+    if os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+        context = click.get_current_context(silent=True)
+        return context is not None and context.info_name == 'run'
+    return True
+
+
+class JobRunner:
+    """Exécuteur de tâches de fond en pool de threads"""
+
+    def __init__(self):
+        self.app = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """Associer l'application (les tâches s'exécutent dans son contexte) ; récupérer les tâches interrompues"""
+        self.app = app
+        app.config.setdefault('JOB_WORKERS', DEFAULT_JOB_WORKERS)
+        app.config.setdefault('JOB_RECOVERY_AT_STARTUP', True)
+        app.extensions['job_runner'] = self
+        if app.config['JOB_RECOVERY_AT_STARTUP'] and _starting_server():
+            self.recover_interrupted_jobs()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.app.config['JOB_WORKERS'],
+                    thread_name_prefix='atarys-job'
+                )
+            return self._executor
+
+    def after_fork(self) -> None:
+        """Processus fils : pool et verrou propres (les threads du parent n'existent plus)"""
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    # ============================================================================
+    # SOUMISSION ET SUIVI
+    # ============================================================================
+
+    def submit(self, job_type: str, func: Callable[[JobContext], Any],
+               params: Optional[Dict[str, Any]] = None, total: Optional[int] = None,
+               on_done: Optional[Callable[[], None]] = None) -> Job:
+        """
+        Enregistrer une tâche et la confier au pool
+
+        Args:
+            job_type (str): Type de tâche (ex: 'bulk_insert')
+            func (callable): func(context) -> résultat sérialisable en JSON
+            params (dict): Paramètres affichés dans le suivi
+            total (int): Nombre d'éléments à traiter, si connu
+            on_done (callable): Nettoyage (fichier temporaire...) appelé à la fin de
+                la tâche, y compris si elle est annulée avant son démarrage
+
+        Returns:
+            Job: La tâche créée (statut 'pending')
+        """
+        executor = self.executor
+        job_id = write_queue.run(_create_job, {
+            'job_type': job_type,
+            'status': 'pending',
+            'processed': 0,
+            'total': total,
+            'params': json.dumps(params, ensure_ascii=False, default=str) if params else None,
+            'cancel_requested': False,
+        })
+        job = self._reload(job_id)
+
+        future = executor.submit(self._run, job.id, func)
+        with self._lock:
+            self._futures[job.id] = future
+        future.add_done_callback(lambda _: self._futures.pop(job.id, None))
+        if on_done is not None:
+            future.add_done_callback(lambda _: on_done())
+        return job
+
+    def get(self, job_id: int) -> Optional[Job]:
+        """Récupérer une tâche"""
+        return db.session.get(Job, job_id)
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Job]:
+        """Lister les tâches les plus récentes"""
+        query = Job.query
+        if status:
+            query = query.filter(Job.status == status)
+        return query.order_by(Job.id.desc()).limit(limit).all()
+
+    def cancel(self, job_id: int) -> Optional[Job]:
+        """
+        Demander l'annulation d'une tâche
+
+        Une tâche en attente est annulée immédiatement ; une tâche en cours
+        s'arrête à son prochain point de contrôle (entre deux lots).
+        """
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+
+        values = {'cancel_requested': True}
+        future = self._futures.get(job_id)
+        if job.status == 'pending' and future is not None and future.cancel():
+            values.update(status='cancelled', finished_at=datetime.utcnow(),
+                          message='Tâche annulée avant son démarrage')
+        write_queue.run(_update_job, job_id, values, unfinished_only=True)
+        return self._reload(job_id)
+
+    def _reload(self, job_id: int) -> Optional[Job]:
+        """Relire une tâche écrite par le thread écrivain (fin de la transaction de lecture en cours)"""
+        db.session.commit()
+        return db.session.get(Job, job_id)
+
+    # ============================================================================
+    # EXÉCUTION
+    # ============================================================================
+
+    def _run(self, job_id: int, func: Callable[[JobContext], Any]) -> None:
+        """Exécuter une tâche dans un contexte d'application propre au thread"""
+        with self.app.app_context():
+            context = JobContext(job_id)
+            try:
+                self._set_status(job_id, status='running', started_at=datetime.utcnow())
+                result = func(context)
+            except JobCancelled:
+                self._finish(context, 'cancelled', message='Tâche annulée')
+            except Exception as e:
+                db.session.rollback()
+                self._finish(context, 'failed', message=str(e), error=traceback.format_exc())
+            else:
+                if context.cancelled:
+                    # Annulation interceptée par le service (résultat partiel)
+                    self._finish(context, 'cancelled', message='Tâche annulée', result=result)
+                else:
+                    message = result.get('message') if isinstance(result, dict) else None
+                    # Convention des services : {'success': False, 'message': ...} en cas d'échec
+                    failed = isinstance(result, dict) and result.get('success') is False
+                    self._finish(context, 'failed' if failed else 'succeeded', message=message, result=result)
+            finally:
+                db.session.remove()
+
+    def _finish(self, context: JobContext, status: str, message: Optional[str] = None,
+                result: Any = None, error: Optional[str] = None) -> None:
+        """Enregistrer l'état final (avec le dernier avancement, non limité par l'intervalle)"""
+        values = {'status': status, 'finished_at': datetime.utcnow(), 'processed': context.processed,
+                  'message': message[:255] if message else None, 'error': error}
+        if result is not None:
+            values['result'] = json.dumps(result, ensure_ascii=False, default=str)
+        self._set_status(context.job_id, **values)
+
+    def _set_status(self, job_id: int, **values) -> None:
+        values['updated_at'] = datetime.utcnow()
+        write_queue.run(_update_job, job_id, values)
+
+    def recover_interrupted_jobs(self) -> None:
+        """
+        Marquer en échec les tâches interrompues par un arrêt du serveur
+
+        Appelé au démarrage, avant toute tâche : les fichiers temporaires
+        restants (SPOOL_PREFIX) appartiennent à des tâches interrompues.
+        Serveur multi-processus : appelé par le maître avant le fork, pour
+        qu'un worker ne marque pas en échec les tâches d'un autre worker.
+        """
+        for path in Path(tempfile.gettempdir()).glob(f'{SPOOL_PREFIX}*'):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        with self.app.app_context():
+            if not inspect(db.engine).has_table(Job.__tablename__):
+                return  # Base pas encore migrée (flask db upgrade)
+            with db.engine.begin() as conn:
+                conn.execute(
+                    update(Job.__table__)
+                    .where(Job.__table__.c.status.in_(('pending', 'running')))
+                    .values(status='failed', finished_at=datetime.utcnow(),
+                            message='Tâche interrompue par un redémarrage du serveur')
+                )
+
+
+# Instance globale du service
+job_runner = JobRunner()
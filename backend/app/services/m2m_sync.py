@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - SYNCHRONISATION DES RELATIONS MANY-TO-MANY
+Mise à jour ensembliste des tables de liaison (ex: salaries_famille_ouvrages)
+
+- Cibles vérifiées en une requête IN, liens existants lus en une requête
+- Seuls les couples modifiés sont écrits : un DELETE groupé et un INSERT groupé
+- Applicable à toute relation déclarée avec secondary=...
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import select, tuple_
+from app import db
+from app.services.table_versions import table_versions
+
+
+SYNC_MODES = ('replace', 'add', 'remove')
+
+
+class ManyToManySync:
+    """Synchronisation des liens d'une relation many-to-many par différence d'ensembles"""
+
+    @staticmethod
+    def normalize_ids(values: Iterable[Any]) -> List[int]:
+        """
+        Convertir une liste d'identifiants (entiers ou chaînes de formulaire)
+
+        Raises:
+            ValueError: Identifiant non entier
+        """
+        ids = []
+        for value in values or []:
+            if value in (None, ''):
+                continue
+            try:
+                ids.append(int(value))
+            except (TypeError, ValueError):
+                raise ValueError(f"Identifiant invalide : {value}")
+        return list(dict.fromkeys(ids))
+
+    def missing_ids(self, model, ids: Iterable[int]) -> List[int]:
+        """Identifiants absents de la table du modèle (une requête IN)"""
+        ids = set(ids)
+        if not ids:
+            return []
+        id_column = model.__mapper__.primary_key[0]
+        existing = set(db.session.execute(select(id_column).where(id_column.in_(ids))).scalars())
+        return sorted(ids - existing)
+
+    def sync(self, relationship, links: Dict[int, Iterable[Any]], mode: str = 'replace') -> Dict[str, Any]:
+        """
+        Synchroniser les liens de plusieurs propriétaires (sans commit)
+
+        Args:
+            relationship: Attribut de relation many-to-many (ex: Salaries.famille_ouvrages)
+            links (dict): {id propriétaire: ids cibles}
+            mode (str): 'replace' (liste exacte), 'add' (ajout) ou 'remove' (retrait)
+
+        Returns:
+            dict: {'inserted_count', 'deleted_count', 'unknown_ids'}
+                  unknown_ids : cibles inexistantes, ignorées
+        """
+        if mode not in SYNC_MODES:
+            raise ValueError(f"Mode de synchronisation inconnu : {mode} ({', '.join(SYNC_MODES)})")
+
+        prop = relationship.property
+        secondary = prop.secondary
+        if secondary is None:
+            raise ValueError(f"{prop} n'est pas une relation many-to-many")
+        owner_column = prop.synchronize_pairs[0][1]
+        target_column = prop.secondary_synchronize_pairs[0][1]
+        target_model = prop.mapper.class_
+
+        requested = {owner_id: self.normalize_ids(ids) for owner_id, ids in links.items()}
+        result = {'inserted_count': 0, 'deleted_count': 0, 'unknown_ids': []}
+        if not requested:
+            return result
+
+        # 1. Cibles existantes (une requête IN pour tous les propriétaires)
+        unknown = set(self.missing_ids(target_model, {i for ids in requested.values() for i in ids}))
+        result['unknown_ids'] = sorted(unknown)
+        desired: Set[Tuple[int, int]] = {
+            (owner_id, target_id)
+            for owner_id, ids in requested.items()
+            for target_id in ids if target_id not in unknown
+        }
+
+        # 2. Liens actuels des propriétaires concernés (une requête)
+        current = set(db.session.execute(
+            select(owner_column, target_column).where(owner_column.in_(list(requested)))
+        ).tuples())
+
+        # 3. Différence : seuls les couples modifiés sont écrits
+        if mode == 'replace':
+            to_delete, to_insert = current - desired, desired - current
+        elif mode == 'add':
+            to_delete, to_insert = set(), desired - current
+        else:
+            to_delete, to_insert = current & desired, set()
+
+        if to_delete:
+            db.session.execute(
+                secondary.delete().where(tuple_(owner_column, target_column).in_(sorted(to_delete)))
+            )
+        if to_insert:
+            db.session.execute(
+                secondary.insert(),
+                [{owner_column.key: owner_id, target_column.key: target_id}
+                 for owner_id, target_id in sorted(to_insert)]
+            )
+        result['inserted_count'] = len(to_insert)
+        result['deleted_count'] = len(to_delete)
+
+        if to_delete or to_insert:
+            # Écriture hors ORM : version de la table de liaison incrémentée au commit
+            table_versions.mark_changed(db.session, secondary.name)
+            # Collections déjà chargées en session : relues au prochain accès
+            owner_model = prop.parent.class_
+            for owner_id in {owner_id for owner_id, _ in to_delete | to_insert}:
+                owner = db.session.identity_map.get(db.session.identity_key(owner_model, owner_id))
+                if owner is not None:
+                    db.session.expire(owner, [prop.key])
+        return result
+
+
+# Instance globale du service
+m2m_sync = ManyToManySync()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - REGISTRE DES MODULES
+Découverte des modèles et blueprints par manifeste, chargement différé des routes
+
+- Manifeste (app/modules_manifest.json) généré par lecture des fichiers sources,
+  sans import : modèles (tables), blueprints (règles d'URL et endpoints)
+- Écrit uniquement par scripts/generate_modules_manifest.py et par
+  TableGeneratorService (fichiers générés) ; seulement lu au démarrage
+- Modèles importés au démarrage (métadonnées complètes pour les relations et Alembic)
+- Règles d'URL de tous les blueprints enregistrées au démarrage dans l'ordre du
+  manifeste (routage et url_for identiques à un chargement complet) ; le module de
+  routes n'est importé qu'à la première requête sur l'une de ses routes
+- Durée d'import de chaque module journalisée (app.logger) et exposée par GET /health
+
+Configuration (app.config) :
+- MODULES_LAZY_LOADING : False pour importer tous les modules de routes au démarrage
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+import ast
+import importlib
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import jsonify
+
+APP_DIR = Path(__file__).resolve().parents[1]
+MANIFEST_PATH = APP_DIR / 'modules_manifest.json'
+
+_TABLENAME = re.compile(r"__tablename__\s*=\s*['\"](\w+)['\"]")
+
+
+def _natural_key(name: str):
+    """module_2 avant module_10"""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def _sources(directory: str, pattern: str, natural: bool = True) -> List[Path]:
+    paths = (APP_DIR / directory).glob(pattern)
+    key = (lambda path: _natural_key(path.stem)) if natural else (lambda path: path.stem)
+    return sorted((path for path in paths if path.stem != '__init__'), key=key)
+
+
+def _blueprint_call(source_tree: ast.Module):
+    """Affectation `variable = Blueprint('nom', __name__, ...)` d'un fichier de routes"""
+    for node in source_tree.body:
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name) and isinstance(node.value, ast.Call)
+                and isinstance(node.value.func, ast.Name) and node.value.func.id == 'Blueprint'):
+            return node.targets[0].id, node.value
+    return None, None
+
+
+def _join_rule(url_prefix: Optional[str], rule: str) -> str:
+    """Règle complète, comme Flask à l'enregistrement du blueprint"""
+    if url_prefix is None:
+        return rule
+    if not rule:
+        return url_prefix
+    return '/'.join((url_prefix.rstrip('/'), rule.lstrip('/')))
+
+
+def scan_route_file(path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Blueprint d'un fichier de routes : variable, préfixes d'URL, règles (@bp.route)
+
+    Un blueprint utilisant autre chose que des décorateurs @bp.route littéraux
+    (hooks, gestionnaires d'erreurs, options calculées) est marqué `eager` :
+    son module est importé et enregistré au démarrage.
+    """
+    tree = ast.parse(path.read_text(encoding='utf-8'), filename=str(path))
+    variable, call = _blueprint_call(tree)
+    if call is None:
+        return None
+    keywords = {keyword.arg: keyword.value for keyword in call.keywords}
+    try:
+        name = ast.literal_eval(call.args[0])
+        url_prefix = ast.literal_eval(keywords['url_prefix']) if 'url_prefix' in keywords else None
+    except (IndexError, ValueError):
+        return {'module': f'app.routes.{path.stem}', 'blueprint': variable, 'eager': True}
+
+    rules = []
+    eager = set(keywords) - {'import_name', 'url_prefix'} != set()
+    routed = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            if not (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)
+                    and isinstance(decorator.func.value, ast.Name) and decorator.func.value.id == variable
+                    and decorator.func.attr == 'route'):
+                continue
+            routed.add(id(decorator.func))
+            try:
+                rule = ast.literal_eval(decorator.args[0])
+                options = {keyword.arg: ast.literal_eval(keyword.value) for keyword in decorator.keywords}
+            except (IndexError, ValueError):
+                eager = True
+                continue
+            endpoint = options.pop('endpoint', None) or node.name
+            rules.append({
+                'rule': _join_rule(url_prefix, rule),
+                'endpoint': f'{name}.{endpoint}',
+                'options': options,
+            })
+    # Toute autre utilisation du blueprint (before_request, errorhandler, add_url_rule...)
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+                and node.value.id == variable and id(node) not in routed):
+            eager = True
+
+    entry = {
+        'module': f'app.routes.{path.stem}',
+        'blueprint': variable,
+        'rules': rules,
+    }
+    if eager:
+        entry['eager'] = True
+    return entry
+
+
+def scan_model_file(path: Path) -> Dict[str, Any]:
+    """Modèles d'un fichier : tables déclarées"""
+    return {
+        'module': f'app.models.{path.stem}',
+        'tables': _TABLENAME.findall(path.read_text(encoding='utf-8')),
+    }
+
+
+class _ViewCollector:
+    """État d'enregistrement réduit : rejoue les routes différées d'un blueprint pour en extraire les vues"""
+
+    def __init__(self, blueprint):
+        self.blueprint = blueprint
+        self.views: Dict[str, Callable] = {}
+
+    def add_url_rule(self, rule, endpoint=None, view_func=None, **options) -> None:
+        if view_func is not None:
+            self.views[f'{self.blueprint.name}.{endpoint or view_func.__name__}'] = view_func
+
+
+class ModuleRegistry:
+    """Modules de l'application (modèles et blueprints) décrits par le manifeste"""
+
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        # Modules de routes dont les règles sont enregistrées mais pas encore importés
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # Vues des modules de routes importés (vide si l'import a échoué)
+        self._views: Dict[str, Dict[str, Callable]] = {}
+        # Durées d'import par module : {'module_9': {'models_ms': ..., 'routes_ms': ...}}
+        self.timings: Dict[str, Dict[str, Any]] = {}
+
+    def init_app(self, app) -> None:
+        """Importer les modèles, enregistrer les règles des blueprints (vues importées à la demande)"""
+        self.app = app
+        app.config.setdefault('MODULES_LAZY_LOADING', True)
+        app.extensions['module_registry'] = self
+
+        manifest = self.load_manifest()
+        self.import_models(manifest)
+        self.register_blueprints(manifest)
+        if not app.config['MODULES_LAZY_LOADING']:
+            self.load_all()
+
+    # ============================================================================
+    # MANIFESTE
+    # ============================================================================
+
+    def scan(self) -> Dict[str, Any]:
+        """Manifeste calculé à partir des fichiers sources (aucun import)"""
+        blueprints = {}
+        for path in _sources('routes', '*.py'):
+            try:
+                entry = scan_route_file(path)
+            except SyntaxError:
+                # Fichier illisible sans import : chargé au démarrage, erreur journalisée
+                entry = {'module': f'app.routes.{path.stem}', 'blueprint': None, 'eager': True}
+            if entry is not None:
+                blueprints[path.stem] = entry
+        # Modèles dans l'ordre des noms de fichiers (module_10 avant module_9 : Ville
+        # redéfinit la table villes de Villes avec extend_existing)
+        models = _sources('models', 'module_*.py', natural=False)
+        return {
+            'models': {path.stem: scan_model_file(path) for path in models},
+            'blueprints': blueprints,
+        }
+
+    def write_manifest(self) -> Dict[str, Any]:
+        """Régénérer le manifeste (fichiers générés ajoutés, modifiés ou supprimés)"""
+        manifest = self.scan()
+        try:
+            MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+        except OSError as e:
+            print(f"[ATARYS] Manifeste des modules non écrit : {e}")
+        return manifest
+
+    def load_manifest(self) -> Dict[str, Any]:
+        """
+        Manifeste enregistré (lecture seule)
+
+        Calculé en mémoire s'il est absent, illisible ou s'il manque un fichier
+        models/module_*.py (modèle absent des métadonnées et d'Alembic sinon).
+        """
+        try:
+            manifest = json.loads(MANIFEST_PATH.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            self._logger().warning("Manifeste des modules illisible (%s) : "
+                                   "lancer scripts/generate_modules_manifest.py", e)
+            return self.scan()
+        missing = [path.stem for path in _sources('models', 'module_*.py') if path.stem not in manifest['models']]
+        if missing:
+            self._logger().warning("Modèles absents du manifeste (%s) : "
+                                   "lancer scripts/generate_modules_manifest.py", ', '.join(missing))
+            return self.scan()
+        return manifest
+
+    # ============================================================================
+    # CHARGEMENT
+    # ============================================================================
+
+    def import_models(self, manifest: Dict[str, Any]) -> None:
+        """Importer tous les modèles (métadonnées complètes pour les relations et Alembic)"""
+        for name, entry in manifest['models'].items():
+            started = time.perf_counter()
+            try:
+                importlib.import_module(entry['module'])
+            except Exception as e:
+                self._timing(name)['models_error'] = str(e)
+                self._logger().error("Modèles %s non chargés : %s", name, e)
+                continue
+            self._timing(name)['models_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+    def register_blueprints(self, manifest: Dict[str, Any]) -> None:
+        """
+        Enregistrer les règles d'URL du manifeste, dans son ordre
+
+        Chaque endpoint pointe d'abord vers une vue différée qui importe le module
+        de routes à la première requête, puis s'efface devant la vraie vue. Les
+        blueprints `eager` sont importés et enregistrés tels quels.
+        """
+        for name, entry in manifest['blueprints'].items():
+            if entry.get('eager'):
+                self._register_now(name, entry)
+                continue
+            if not entry['rules']:
+                continue
+            self._pending[name] = entry
+            lazy_views: Dict[str, Callable] = {}
+            for route in entry['rules']:
+                endpoint = route['endpoint']
+                if endpoint not in lazy_views:
+                    lazy_views[endpoint] = self._lazy_view(name, endpoint)
+                self.app.add_url_rule(route['rule'], endpoint, lazy_views[endpoint], **route['options'])
+
+    def _lazy_view(self, name: str, endpoint: str) -> Callable:
+        def lazy_view(*args, **kwargs):
+            view = self.load(name).get(endpoint)
+            if view is None:
+                return jsonify({
+                    'success': False,
+                    'message': f'Module {name} indisponible (voir GET /health)'
+                }), 500
+            return view(*args, **kwargs)
+        lazy_view.__name__ = endpoint.rpartition('.')[2]
+        return lazy_view
+
+    def load(self, name: str) -> Dict[str, Callable]:
+        """Importer un module de routes en attente et remplacer ses vues différées"""
+        with self._lock:
+            entry = self._pending.pop(name, None)
+            if entry is None:
+                # Déjà chargé (requête concurrente)
+                return self._views.get(name, {})
+            self._views[name] = {}
+            started = time.perf_counter()
+            try:
+                module = importlib.import_module(entry['module'])
+                collector = _ViewCollector(getattr(module, entry['blueprint']))
+                for deferred in collector.blueprint.deferred_functions:
+                    deferred(collector)
+            except Exception as e:
+                self._timing(name)['routes_error'] = str(e)
+                self._logger().exception("Blueprint %s non chargé", name)
+                return {}
+            stale = {route['endpoint'] for route in entry['rules']} ^ set(collector.views)
+            if stale:
+                self._logger().warning("Manifeste périmé pour %s (%s) : lancer scripts/generate_modules_manifest.py",
+                                       name, ', '.join(sorted(stale)))
+            self.app.view_functions.update(
+                (endpoint, view) for endpoint, view in collector.views.items()
+                if endpoint in self.app.view_functions)
+            self._views[name] = collector.views
+            self._record(name, started)
+            return collector.views
+
+    def load_all(self) -> None:
+        """Importer tous les modules de routes en attente (démarrage complet, maître gunicorn)"""
+        for name in list(self._pending):
+            self.load(name)
+
+    def _register_now(self, name: str, entry: Dict[str, Any]) -> None:
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(entry['module'])
+            self.app.register_blueprint(getattr(module, entry['blueprint']))
+        except Exception as e:
+            self._timing(name)['routes_error'] = str(e)
+            self._logger().error("Blueprint %s non chargé : %s", name, e)
+            return
+        self._record(name, started)
+
+    def _record(self, name: str, started: float) -> None:
+        elapsed = round((time.perf_counter() - started) * 1000, 2)
+        self._timing(name)['routes_ms'] = elapsed
+        self._logger().info("Blueprint %s chargé (%s ms)", name, elapsed)
+
+    def _timing(self, name: str) -> Dict[str, Any]:
+        return self.timings.setdefault(name, {})
+
+    def _logger(self):
+        return self.app.logger
+
+    def status(self) -> Dict[str, Any]:
+        """Durées d'import par module (et erreurs de chargement), modules de routes non encore importés"""
+        return {'timings': self.timings, 'pending': sorted(self._pending, key=_natural_key)}
+
+
+# Instance globale du service
+module_registry = ModuleRegistry()
@@ -3,34 +3,21 @@ Service pour la génération de relations étape par étape
 """
 import os
 from datetime import datetime
+from app.services.schema_catalog import schema_catalog
 
 class RelationGenerator:
-    def __init__(self):
-        self.db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'atarys_data.db')
-    
     def get_all_tables(self):
         """Récupérer toutes les tables disponibles"""
-        import sqlite3
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' AND name != 'alembic_version'")
-            tables = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            return tables
+            return [t for t in schema_catalog.table_names() if t != 'alembic_version']
         except Exception as e:
             print(f"Erreur récupération tables: {e}")
             return []
     
     def get_table_info(self, table_name):
         """Récupérer les informations d'une table"""
-        import sqlite3
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = cursor.fetchall()
-            conn.close()
+            columns = schema_catalog.get_columns(table_name)
             
             # Déterminer le module basé sur le nom de la table
             module_id = self._determine_module_id(table_name)
@@ -38,7 +25,7 @@ class RelationGenerator:
             return {
                 'name': table_name,
                 'module_id': module_id,
-                'columns': [{'name': col[1], 'type': col[2], 'notnull': col[3], 'pk': col[5]} for col in columns]
+                'columns': [{'name': col['name'], 'type': col['type'], 'notnull': int(col['not_null']), 'pk': int(col['primary_key'])} for col in columns]
             }
         except Exception as e:
             print(f"Erreur récupération info table {table_name}: {e}")
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - CATALOGUE DU SCHÉMA SQLITE
+Cache en mémoire des tables, colonnes, clés primaires, index uniques
+et clés étrangères, partagé par tous les services de base de données
+
+- Chargement en une passe (fonctions pragma_* jointes à sqlite_master)
+- Invalidation automatique après tout ordre DDL exécuté par l'application
+- Détection des migrations lancées par un autre processus (PRAGMA schema_version)
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from app import db
+
+
+# Intervalle minimal entre deux contrôles de PRAGMA schema_version (secondes)
+SCHEMA_VERSION_CHECK_INTERVAL = 1.0
+
+DDL_PREFIXES = ('CREATE', 'DROP', 'ALTER')
+
+# Tables internes des tables virtuelles (FTS5, R*Tree) : <table virtuelle>_<suffixe>
+SHADOW_TABLE_SUFFIXES = ('data', 'idx', 'content', 'docsize', 'config', 'node', 'parent', 'rowid')
+
+
+class SchemaCatalog:
+    """Catalogue du schéma SQLite, rechargé uniquement après un changement de structure"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tables: Optional[Dict[str, Dict[str, Any]]] = None
+        self._schema_version = None
+        self._last_check = 0.0
+        self._listened_engines = set()
+        # Incrémenté à chaque invalidation (clé de cache pour les services dérivés)
+        self.version = 0
+
+    # ============================================================================
+    # LECTURE DU CATALOGUE
+    # ============================================================================
+
+    def table_names(self, include_system: bool = False) -> List[str]:
+        """Lister les tables (hors tables internes sqlite_* et index virtuels par défaut)"""
+        tables = self._get_tables()
+        if include_system:
+            return list(tables)
+        return [
+            name for name, table in tables.items()
+            if not name.startswith('sqlite_') and not table['internal']
+        ]
+
+    def internal_table_names(self) -> List[str]:
+        """Tables virtuelles (index FTS5, R*Tree) et leurs tables internes"""
+        return [name for name, table in self._get_tables().items() if table['internal']]
+
+    def has_table(self, table_name: str) -> bool:
+        """Vérifier si une table existe"""
+        return table_name in self._get_tables()
+
+    def get_table(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """Récupérer la description complète d'une table (None si inexistante)"""
+        return self._get_tables().get(table_name)
+
+    def get_columns(self, table_name: str) -> List[Dict[str, Any]]:
+        """Récupérer les colonnes d'une table (liste vide si inexistante)"""
+        table = self.get_table(table_name)
+        return table['columns'] if table else []
+
+    def get_column(self, table_name: str, column_name: str) -> Optional[Dict[str, Any]]:
+        """Récupérer une colonne d'une table"""
+        table = self.get_table(table_name)
+        return table['columns_by_name'].get(column_name) if table else None
+
+    def has_unique_index(self, table_name: str, column_name: str) -> bool:
+        """Vérifier si une colonne fait partie d'un index unique"""
+        table = self.get_table(table_name)
+        if not table:
+            return False
+        return any(column_name in index['columns'] for index in table['unique_indexes'])
+
+    def unique_keys(self, table_name: str) -> List[Tuple[str, ...]]:
+        """Clés uniques d'une table : index uniques d'abord, clé primaire en dernier"""
+        table = self.get_table(table_name)
+        if not table:
+            return []
+        keys = [
+            tuple(index['columns']) for index in table['unique_indexes']
+            if index['origin'] != 'pk'
+        ]
+        if table['primary_key']:
+            keys.append(tuple(table['primary_key']))
+        return keys
+
+    def is_unique_key(self, table_name: str, columns) -> bool:
+        """Vérifier qu'un jeu de colonnes correspond exactement à une clé unique"""
+        columns = set(columns)
+        return any(set(key) == columns for key in self.unique_keys(table_name))
+
+    # ============================================================================
+    # INVALIDATION
+    # ============================================================================
+
+    def invalidate(self) -> None:
+        """Vider le cache (rechargé à la prochaine lecture)"""
+        with self._lock:
+            self._tables = None
+            self._schema_version = None
+            self.version += 1
+
+    def _on_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        """Invalider le cache après un ordre DDL exécuté sur le moteur"""
+        if statement.lstrip()[:6].upper().startswith(DDL_PREFIXES):
+            self.invalidate()
+
+    # ============================================================================
+    # CHARGEMENT
+    # ============================================================================
+
+    def _get_tables(self) -> Dict[str, Dict[str, Any]]:
+        """Retourner le cache, en le (re)chargeant si nécessaire"""
+        tables = self._tables
+        if tables is not None and not self._schema_changed_elsewhere():
+            return tables
+        with self._lock:
+            if self._tables is None:
+                self._tables = self._load()
+            return self._tables
+
+    def _schema_changed_elsewhere(self) -> bool:
+        """Détecter (au plus une fois par intervalle) une migration d'un autre processus"""
+        now = time.monotonic()
+        if now - self._last_check < SCHEMA_VERSION_CHECK_INTERVAL:
+            return False
+        self._last_check = now
+        with db.engine.connect() as conn:
+            schema_version = conn.exec_driver_sql('PRAGMA schema_version').scalar()
+        if schema_version != self._schema_version:
+            self.invalidate()
+            return True
+        return False
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Lire tout le schéma en quatre requêtes, quel que soit le nombre de tables"""
+        engine = db.engine
+        if id(engine) not in self._listened_engines:
+            event.listen(engine, 'after_cursor_execute', self._on_cursor_execute)
+            self._listened_engines.add(id(engine))
+
+        tables: Dict[str, Dict[str, Any]] = {}
+        with engine.connect() as conn:
+            schema_version = conn.exec_driver_sql('PRAGMA schema_version').scalar()
+
+            virtual_tables = set()
+            for name, sql in conn.exec_driver_sql(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'table' ORDER BY name"
+            ):
+                if (sql or '').upper().startswith('CREATE VIRTUAL TABLE'):
+                    virtual_tables.add(name)
+                tables[name] = {
+                    'name': name,
+                    'internal': False,
+                    'columns': [],
+                    'columns_by_name': {},
+                    'primary_key': [],
+                    'unique_indexes': [],
+                    'foreign_keys': [],
+                }
+
+            for name, table in tables.items():
+                owner, _, suffix = name.rpartition('_')
+                table['internal'] = name in virtual_tables or (
+                    owner in virtual_tables and suffix in SHADOW_TABLE_SUFFIXES
+                )
+
+            # Colonnes de toutes les tables en une passe
+            pk_positions = {}
+            for table_name, name, col_type, not_null, default, pk in conn.exec_driver_sql(
+                "SELECT m.name, p.name, p.type, p.\"notnull\", p.dflt_value, p.pk "
+                "FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p "
+                "WHERE m.type = 'table' ORDER BY m.name, p.cid"
+            ):
+                column = {
+                    'name': name,
+                    'type': col_type,
+                    'not_null': bool(not_null),
+                    'default': default,
+                    'primary_key': bool(pk),
+                }
+                tables[table_name]['columns'].append(column)
+                tables[table_name]['columns_by_name'][name] = column
+                if pk:
+                    pk_positions.setdefault(table_name, []).append((pk, name))
+            for table_name, positions in pk_positions.items():
+                tables[table_name]['primary_key'] = [name for _, name in sorted(positions)]
+
+            # Index uniques (contraintes UNIQUE et CREATE UNIQUE INDEX)
+            unique_indexes = {}
+            for table_name, index_name, origin, column_name in conn.exec_driver_sql(
+                "SELECT m.name, il.name, il.origin, ii.name "
+                "FROM sqlite_master AS m "
+                "JOIN pragma_index_list(m.name) AS il "
+                "JOIN pragma_index_info(il.name) AS ii "
+                "WHERE m.type = 'table' AND il.\"unique\" = 1 "
+                "ORDER BY m.name, il.name, ii.seqno"
+            ):
+                key = (table_name, index_name)
+                if key not in unique_indexes:
+                    unique_indexes[key] = {'name': index_name, 'origin': origin, 'columns': []}
+                    tables[table_name]['unique_indexes'].append(unique_indexes[key])
+                unique_indexes[key]['columns'].append(column_name)
+
+            # Clés étrangères
+            foreign_keys = {}
+            for table_name, fk_id, referred_table, from_col, to_col, on_delete in conn.exec_driver_sql(
+                "SELECT m.name, fk.id, fk.\"table\", fk.\"from\", fk.\"to\", fk.on_delete "
+                "FROM sqlite_master AS m JOIN pragma_foreign_key_list(m.name) AS fk "
+                "WHERE m.type = 'table' ORDER BY m.name, fk.id, fk.seq"
+            ):
+                key = (table_name, fk_id)
+                if key not in foreign_keys:
+                    foreign_keys[key] = {
+                        'columns': [],
+                        'referred_table': referred_table,
+                        'referred_columns': [],
+                        'on_delete': on_delete,
+                    }
+                    tables[table_name]['foreign_keys'].append(foreign_keys[key])
+                foreign_keys[key]['columns'].append(from_col)
+                foreign_keys[key]['referred_columns'].append(to_col)
+
+            # "REFERENCES parent" sans colonne : pragma "to" NULL, clé primaire du parent
+            tables_by_name = {name.lower(): table for name, table in tables.items()}
+            for fk in foreign_keys.values():
+                if None in fk['referred_columns']:
+                    parent = tables_by_name.get(fk['referred_table'].lower())
+                    if parent is not None and len(parent['primary_key']) == len(fk['columns']):
+                        fk['referred_columns'] = list(parent['primary_key'])
+
+        self._schema_version = schema_version
+        self._last_check = time.monotonic()
+        return tables
+
+
+# Instance globale du service
+schema_catalog = SchemaCatalog()
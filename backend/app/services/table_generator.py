@@ -13,6 +13,12 @@ import os
 import re
 from sqlalchemy import text
 from app import db
+from app.services.bulk_loader import bulk_loader
+from app.services.bulk_validator import bulk_validator
+from app.services.column_converters import column_converters
+from app.services.module_registry import module_registry
+from app.services.schema_catalog import schema_catalog
+from app.services.table_metadata import table_metadata_service
 
 
 class TableGeneratorService:
@@ -277,12 +283,7 @@ class TableGeneratorService:
         """
         try:
             # 1. Vérifier que la table existe
-            result = db.session.execute(
-                text("SELECT name FROM sqlite_master WHERE type='table' AND name=:table_name"),
-                {'table_name': table_name}
-            ).fetchone()
-            
-            if not result:
+            if not schema_catalog.has_table(table_name):
                 return {
                     'success': False,
                     'message': f'Table {table_name} n\'existe pas'
@@ -291,6 +292,8 @@ class TableGeneratorService:
             # 2. Supprimer la table SQLite
             db.session.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
             db.session.commit()
+            schema_catalog.invalidate()
+            table_metadata_service.unregister_table(table_name)
             
             # 3. Supprimer les fichiers générés (modèle, routes, schéma)
             self._delete_generated_files_by_table_name(table_name)
@@ -308,26 +311,19 @@ class TableGeneratorService:
             }
     
     def list_tables(self):
-        """Retourne la liste enrichie des tables SQLite (hors tables système), avec dates au format ISO 8601."""
+        """
+        Retourne la liste enrichie des tables SQLite (hors tables système), avec dates au format ISO 8601.
+        
+        Colonnes lues depuis le catalogue du schéma, date de création et nombre
+        de lignes depuis table_metadata : aucune lecture des données des tables.
+        """
         try:
-            result = db.session.execute(
-                text("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name;")
-            )
-            tables = [row[0] for row in result.fetchall()]
+            tables = schema_catalog.table_names()
+            metadata = table_metadata_service.get_all(tables)
             enriched = []
             for table in tables:
-                # Récupérer les colonnes
-                cols_result = db.session.execute(text(f"PRAGMA table_info({table})"))
-                columns = [col[1] for col in cols_result.fetchall()]
-                # Récupérer la date de création (première valeur created_at si possible)
-                created_at = '-'
-                try:
-                    row = db.session.execute(text(f"SELECT created_at FROM {table} ORDER BY created_at ASC LIMIT 1")).fetchone()
-                    if row and row[0]:
-                        # Convertir au format ISO 8601
-                        created_at = str(row[0]).replace(' ', 'T')
-                except Exception:
-                    pass
+                columns = [col['name'] for col in schema_catalog.get_columns(table)]
+                table_meta = metadata.get(table, {})
                 # Déduire le module si possible (ex: module_3_xxx)
                 module = ''
                 match = re.match(r'module_(\d+)', table)
@@ -338,7 +334,8 @@ class TableGeneratorService:
                     'name': table,
                     'module': module,
                     'columns': columns,
-                    'created_at': created_at,
+                    'created_at': table_meta.get('created_at', '-'),
+                    'row_count': table_meta.get('row_count'),
                 })
             return {'success': True, 'data': enriched, 'message': f'{len(enriched)} tables trouvées'}
         except Exception as e:
@@ -502,20 +499,20 @@ class TableGeneratorService:
             dict: {'success': bool, 'data': list, 'message': str}
         """
         try:
-            # Requête pour récupérer les colonnes de la table
-            query = text("PRAGMA table_info(" + table_name + ")")
-            
-            result = db.session.execute(query)
+            # Colonnes et clés étrangères lues depuis le catalogue du schéma
+            table = schema_catalog.get_table(table_name)
             columns = []
             
-            for row in result:
-                columns.append({
-                    'name': row[1],
-                    'type': row[2],
-                    'not_null': bool(row[3]),
-                    'primary_key': bool(row[5]),
-                    'is_foreign_key': False  # À déterminer avec une requête supplémentaire
-                })
+            if table:
+                fk_columns = {col for fk in table['foreign_keys'] for col in fk['columns']}
+                for col in table['columns']:
+                    columns.append({
+                        'name': col['name'],
+                        'type': col['type'],
+                        'not_null': col['not_null'],
+                        'primary_key': col['primary_key'],
+                        'is_foreign_key': col['name'] in fk_columns
+                    })
             
             return {
                 'success': True,
@@ -780,6 +777,8 @@ class TableGeneratorService:
             print(f"🔧 SQL généré: {create_sql}")
             db.session.execute(text(create_sql))
             db.session.commit()
+            schema_catalog.invalidate()
+            table_metadata_service.register_table(table_data['table_name'])
             return {'success': True}
         except Exception as e:
             db.session.rollback()
@@ -865,24 +864,37 @@ class {class_name}(BaseModel):
         class_name = table_data['class_name']
         table_name = table_data['table_name']
         main_module = str(table_data['module_id']).split('_')[0]
+        # Colonnes autorisées pour le tri de la liste paginée (hors clé primaire et texte long)
+        sort_fields = tuple(
+            col['name'] for col in table_data['columns']
+            if not col.get('primaryKey') and col.get('type') != 'Text'
+            and col['name'] not in ('id', 'created_at', 'updated_at')
+        ) + ('created_at',)
         # Importer le schéma depuis schemas/module_X
         route_code = (
             f"\n# Routes CRUD pour {class_name}\n"
             f"from app.schemas.module_{main_module} import {class_name}Schema\n"
+            f"from app.utils.pagination import paginate\n"
+            f"from app.utils.query_shaping import shape_query, sparse_schema\n"
+            f"from app.services.write_queue import create_item, delete_item, update_item, write_queue\n"
+            f"from app.utils.serializer_compiler import serialize\n"
             f"{table_name}_schema = {class_name}Schema()\n"
             f"{table_name}_schemas = {class_name}Schema(many=True)\n\n"
         )
-        # GET
+        # GET (paginé : limit, sort, cursor, total ; champs partiels : fields, expand)
         route_code += (
             f"@module_{main_module}_bp.route('/api/{table_name}/', "
             f"methods=['GET'])\n"
             f"def list_{table_name}():\n"
             f"    try:\n"
-            f"        items = {class_name}.query.all()\n"
+            f"        schema = sparse_schema({table_name}_schemas)\n"
+            f"        page = paginate(shape_query({class_name}.query, schema), {class_name},\n"
+            f"                        sort_fields={sort_fields!r})\n"
             f"        return jsonify({{\n"
             f"            'success': True,\n"
-            f"            'data': {table_name}_schemas.dump(items),\n"
-            f"            'message': f'{{len(items)}} {table_name} trouvés'\n"
+            f"            'data': serialize(schema, page.items),\n"
+            f"            'message': f'{{len(page.items)}} {table_name} trouvés',\n"
+            f"            'pagination': page.meta\n"
             f"        }})\n"
             f"    except Exception as e:\n"
             f"        return jsonify({{'success': False, 'message': str(e)}}), 400\n\n"
@@ -897,12 +909,10 @@ class {class_name}(BaseModel):
             f"        errors = {table_name}_schema.validate(data)\n"
             f"        if errors:\n"
             f"            return jsonify({{'success': False, 'message': errors}}), 400\n"
-            f"        new_item = {class_name}(**data)\n"
-            f"        db.session.add(new_item)\n"
-            f"        db.session.commit()\n"
+            f"        new_item = write_queue.run(create_item, {class_name}, data, {table_name}_schema)\n"
             f"        return jsonify({{\n"
             f"            'success': True,\n"
-            f"            'data': {table_name}_schema.dump(new_item),\n"
+            f"            'data': new_item,\n"
             f"            'message': '{class_name} créé avec succès'\n"
             f"        }})\n"
             f"    except Exception as e:\n"
@@ -915,17 +925,14 @@ class {class_name}(BaseModel):
             f"methods=['PUT'])\n"
             f"def update_{table_name}(item_id):\n"
             f"    try:\n"
-            f"        item = {class_name}.query.get_or_404(item_id)\n"
             f"        data = request.get_json()\n"
             f"        errors = {table_name}_schema.validate(data)\n"
             f"        if errors:\n"
             f"            return jsonify({{'success': False, 'message': errors}}), 400\n"
-            f"        for key, value in data.items():\n"
-            f"            setattr(item, key, value)\n"
-            f"        db.session.commit()\n"
+            f"        item = write_queue.run(update_item, {class_name}, item_id, data, {table_name}_schema)\n"
             f"        return jsonify({{\n"
             f"            'success': True,\n"
-            f"            'data': {table_name}_schema.dump(item),\n"
+            f"            'data': item,\n"
             f"            'message': '{class_name} modifié avec succès'\n"
             f"        }})\n"
             f"    except Exception as e:\n"
@@ -938,9 +945,7 @@ class {class_name}(BaseModel):
             f"methods=['DELETE'])\n"
             f"def delete_{table_name}(item_id):\n"
             f"    try:\n"
-            f"        item = {class_name}.query.get_or_404(item_id)\n"
-            f"        db.session.delete(item)\n"
-            f"        db.session.commit()\n"
+            f"        write_queue.run(delete_item, {class_name}, item_id)\n"
             f"        return jsonify({{\n"
             f"            'success': True,\n"
             f"            'message': '{class_name} supprimé avec succès'\n"
@@ -1026,6 +1031,7 @@ class {class_name}Schema(Schema):
                 with open(module_file, 'a', encoding='utf-8') as f:
                     f.write('\n\n')
                     f.write(model_code)
+            module_registry.write_manifest()
             print(f"✅ Classe ajoutée dans {module_file}")
             return True
         except Exception as e:
@@ -1062,6 +1068,7 @@ class {class_name}Schema(Schema):
                 with open(route_file, 'a', encoding='utf-8') as f:
                     f.write('\n')
                     f.write(route_code)
+            module_registry.write_manifest()
             print(f"✅ Routes CRUD ajoutées dans {route_file}")
             return True
         except Exception as e:
@@ -1112,6 +1119,8 @@ class {class_name}Schema(Schema):
             # Supprimer la table SQLite si elle a été créée
             db.session.execute(text(f"DROP TABLE IF EXISTS {table_data['table_name']}"))
             db.session.commit()
+            schema_catalog.invalidate()
+            table_metadata_service.unregister_table(table_data['table_name'])
         except:
             pass
         
@@ -1237,6 +1246,8 @@ class {class_name}Schema(Schema):
                 i += 1
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.writelines(new_lines)
+            if content_type in ('class', 'route'):
+                module_registry.write_manifest()
         except Exception as e:
             print(f"❌ Erreur suppression {content_type} de {file_path}: {e}")
     
@@ -1270,6 +1281,7 @@ class {class_name}Schema(Schema):
                 text(f"ALTER TABLE {table_name} ADD COLUMN {col_def}")
             )
             db.session.commit()
+            schema_catalog.invalidate()
             
             print(f"✅ Colonne {column_data['name']} ajoutée à {table_name}")
             return True
@@ -1350,6 +1362,9 @@ class {class_name}Schema(Schema):
                 text(f"ALTER TABLE {temp_table} RENAME TO {table_name}")
             )
             db.session.commit()
+            schema_catalog.invalidate()
+            # Les triggers de comptage ont disparu avec l'ancienne table
+            table_metadata_service.register_table(table_name)
             
             print(f"✅ Colonne {column_name} supprimée de {table_name}")
             return True
@@ -1379,99 +1394,69 @@ class {class_name}Schema(Schema):
         import re
         return re.sub(r'(?<!^)(?=[A-Z])', '_', pascal_case).lower()
 
-    def bulk_insert_data(self, table_name, data_list):
+    def bulk_insert_data(self, table_name, data_list, mode='insert', key=None, dry_run=False,
+                         progress=None):
         """
         Insérer des données en masse dans une table dynamique
         
+        Utilise le moteur partagé de l'application (session SQLAlchemy) :
+        une transaction par lot et une requête préparée réutilisée par lot.
+        
         Args:
             table_name (str): Nom de la table
             data_list (list): Liste de dictionnaires de données
+            mode (str): 'insert' (ajout) ou 'merge' (fusion sur une clé unique)
+            key (str|list): Clé de fusion ; déduite des index uniques si absente
+            dry_run (bool): Valider seulement (types, NOT NULL, unicité, clés étrangères)
+            progress (callable): Rappel progress(lignes traitées) après chaque lot (tâches de fond)
         
         Returns:
             dict: {'success': bool, 'message': str, 'data': dict}
         """
         try:
-            # 1. Vérifier que la table existe
-            if not self._table_exists(table_name):
+            # 1. Vérifier que la table existe et récupérer son plan de conversion
+            plan = column_converters.get_plan(table_name)
+            if not plan:
                 return {
                     'success': False,
                     'message': f"Table '{table_name}' n'existe pas"
                 }
             
-            # 2. Récupérer la structure de la table
-            columns = self._get_table_columns(table_name)
-            if not columns:
+            if dry_run:
+                result = bulk_validator.validate(table_name, data_list, mode=mode, key=key)
                 return {
-                    'success': False,
-                    'message': f"Impossible de récupérer la structure de la table '{table_name}'"
+                    'success': True,
+                    'message': bulk_validator.summary_message(result['valid_count'], result['invalid_count']),
+                    'data': result
                 }
             
-            # 3. Valider et nettoyer les données
-            cleaned_data = []
-            for row in data_list:
-                if not isinstance(row, dict):
-                    continue
-                
-                # Filtrer les lignes vides
-                if not any(str(value).strip() for value in row.values()):
-                    continue
-                
-                # Nettoyer les données
-                cleaned_row = {}
-                for col_name, value in row.items():
-                    if col_name in columns:
-                        # Convertir les types selon la colonne
-                        cleaned_value = self._convert_value_type(value, columns[col_name])
-                        cleaned_row[col_name] = cleaned_value
-                
-                if cleaned_row:  # Ne pas ajouter de lignes vides
-                    cleaned_data.append(cleaned_row)
+            # 2. Valider et convertir les données colonne par colonne (index d'origine conservé)
+            indexed_rows, conversion_errors = plan.convert_rows(enumerate(data_list))
             
-            if not cleaned_data:
+            if not indexed_rows and not conversion_errors:
                 return {
                     'success': False,
                     'message': "Aucune donnée valide à insérer"
                 }
             
-            # 4. Insérer les données
-            inserted_count = 0
-            for row in cleaned_data:
-                try:
-                    # Construire la requête SQL dynamique
-                    columns_str = ', '.join(row.keys())
-                    placeholders = ', '.join(['?' for _ in row])
-                    values = list(row.values())
-                    
-                    query = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})"
-                    
-                    # Exécuter l'insertion avec sqlite3 direct
-                    import sqlite3
-                    import os
-                    db_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'atarys_data.db')
-                    conn = sqlite3.connect(db_path)
-                    cursor = conn.cursor()
-                    
-                    cursor.execute(query, values)
-                    conn.commit()
-                    conn.close()
-                    inserted_count += 1
-                        
-                except Exception as e:
-                    # Continuer avec les autres lignes en cas d'erreur
-                    print(f"Erreur insertion ligne {row}: {str(e)}")
-                    continue
+            # 3. Insérer ou fusionner les données par lots sur la connexion de la session
+            result = bulk_loader.load(table_name, indexed_rows, mode=mode, key=key, progress=progress)
+            valid_data_count = len(indexed_rows) + len(conversion_errors)
+            result.update(
+                failed_count=len(conversion_errors) + result['failed_count'],
+                total_processed=len(data_list),
+                valid_data_count=valid_data_count,
+                errors=sorted(conversion_errors + result['errors'], key=lambda err: err['index'])
+            )
             
             return {
                 'success': True,
-                'message': f"{inserted_count} lignes insérées sur {len(cleaned_data)} données valides",
-                'data': {
-                    'inserted_count': inserted_count,
-                    'total_processed': len(data_list),
-                    'valid_data_count': len(cleaned_data)
-                }
+                'message': bulk_loader.summary_message(result, valid_data_count),
+                'data': result
             }
             
         except Exception as e:
+            db.session.rollback()
             return {
                 'success': False,
                 'message': f"Erreur lors de l'insertion en masse : {str(e)}"
@@ -1480,78 +1465,19 @@ class {class_name}Schema(Schema):
     def _table_exists(self, table_name):
         """Vérifier si une table existe"""
         try:
-            # Utiliser le chemin absolu de la base de données
-            import os
-            db_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'atarys_data.db')
-            
-            # Vérifier directement avec sqlite3
-            import sqlite3
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Vérifier dans sqlite_master
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", [table_name])
-            if cursor.fetchone():
-                conn.close()
-                return True
-            
-            # Méthode alternative: essayer PRAGMA
-            try:
-                cursor.execute(f"PRAGMA table_info({table_name})")
-                columns = cursor.fetchall()
-                conn.close()
-                return len(columns) > 0
-            except:
-                conn.close()
-                return False
-                    
+            return schema_catalog.has_table(table_name)
         except Exception as e:
             print(f"Erreur vérification table {table_name}: {e}")
             return False
 
     def _get_table_columns(self, table_name):
-        """Récupérer les colonnes d'une table"""
+        """Récupérer les colonnes d'une table ({nom: type})"""
         try:
-            # Utiliser le chemin absolu de la base de données
-            import os
-            db_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'atarys_data.db')
-            
-            # Vérifier directement avec sqlite3
-            import sqlite3
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = {}
-            for row in cursor.fetchall():
-                columns[row[1]] = row[2]  # nom, type
-            conn.close()
-            return columns
+            return {col['name']: col['type'] for col in schema_catalog.get_columns(table_name)}
         except Exception as e:
             print(f"Erreur récupération colonnes {table_name}: {e}")
             return {}
 
-    def _convert_value_type(self, value, column_type):
-        """Convertir la valeur selon le type de colonne"""
-        if value is None or value == '':
-            return None
-        
-        try:
-            if 'INTEGER' in column_type.upper():
-                return int(value) if value else 0
-            elif 'REAL' in column_type.upper() or 'FLOAT' in column_type.upper():
-                return float(value) if value else 0.0
-            elif 'TEXT' in column_type.upper():
-                return str(value) if value else ''
-            elif 'BOOLEAN' in column_type.upper():
-                if isinstance(value, bool):
-                    return value
-                return str(value).lower() in ('true', '1', 'yes', 'oui')
-            else:
-                return str(value) if value else ''
-        except (ValueError, TypeError):
-            return str(value) if value else ''
-
 
 # Instance globale du service
 table_generator = TableGeneratorService() 
\ No newline at end of file
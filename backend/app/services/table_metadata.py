@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - SERVICE DES MÉTADONNÉES DE TABLES
+Date d'enregistrement et nombre de lignes de chaque table (table_metadata)
+
+- Comptage initial unique à l'enregistrement de la table
+- Nombre de lignes tenu à jour par des triggers AFTER INSERT / AFTER DELETE
+- Lecture en une requête, sans parcourir les données des tables
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable
+
+from sqlalchemy import text
+from app import db
+from app.services.bulk_loader import quote_identifier
+from app.services.schema_catalog import schema_catalog
+from app.services.write_queue import write_queue
+
+
+METADATA_TABLE = 'table_metadata'
+
+# Tables techniques sans suivi du nombre de lignes
+UNTRACKED_TABLES = ('alembic_version', METADATA_TABLE, 'jobs')
+
+
+def row_count_trigger_sql(table_name: str) -> list:
+    """Ordres CREATE TRIGGER qui maintiennent row_count pour une table"""
+    table = quote_identifier(table_name)
+    literal = "'" + table_name.replace("'", "''") + "'"
+    statements = []
+    for event, delta in (('INSERT', '+ 1'), ('DELETE', '- 1')):
+        trigger = quote_identifier(f'trg_{table_name}_row_count_{event.lower()}')
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS {trigger} AFTER {event} ON {table} "
+            f"BEGIN UPDATE {METADATA_TABLE} SET row_count = row_count {delta} "
+            f"WHERE table_name = {literal}; END"
+        )
+    return statements
+
+
+class TableMetadataService:
+    """Lecture et maintenance de la table table_metadata"""
+
+    def is_available(self) -> bool:
+        """La table de métadonnées existe-t-elle (migration appliquée) ?"""
+        return schema_catalog.has_table(METADATA_TABLE)
+
+    def get_all(self, table_names: Iterable[str] = ()) -> Dict[str, Dict[str, Any]]:
+        """
+        Récupérer les métadonnées de toutes les tables suivies
+
+        Args:
+            table_names (iterable): Tables à enregistrer si elles ne le sont pas encore
+                                    (tables créées par une migration ultérieure)
+
+        Returns:
+            dict: {table_name: {'row_count', 'created_at'}}
+        """
+        if not self.is_available():
+            return {}
+
+        metadata = self._read_all()
+        missing = [
+            name for name in table_names
+            if name not in metadata and name not in UNTRACKED_TABLES
+        ]
+        if missing:
+            write_queue.run(self._register_tables, missing)
+            # Fin de la transaction de lecture : nouvel instantané incluant l'enregistrement
+            db.session.commit()
+            metadata = self._read_all()
+        return metadata
+
+    def _register_tables(self, table_names: Iterable[str]) -> None:
+        """Unité d'écriture : enregistrer plusieurs tables (commit par la file d'écriture)"""
+        for name in table_names:
+            self.register_table(name, commit=False)
+
+    def register_table(self, table_name: str, commit: bool = True) -> None:
+        """
+        Enregistrer une table : comptage initial puis triggers de maintenance
+
+        Réappelé après une reconstruction de table (les triggers disparaissent
+        avec l'ancienne table) : la date d'enregistrement est conservée.
+        """
+        if not self.is_available() or table_name in UNTRACKED_TABLES:
+            return
+
+        table = quote_identifier(table_name)
+        row_count = db.session.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+        # Date de création : plus ancienne ligne si la table a une colonne created_at
+        created_at = None
+        if schema_catalog.get_column(table_name, 'created_at'):
+            created_at = db.session.execute(text(f"SELECT MIN(created_at) FROM {table}")).scalar()
+        now = datetime.utcnow().isoformat(sep=' ')
+
+        db.session.execute(
+            text(
+                f"INSERT INTO {METADATA_TABLE} (table_name, row_count, created_at, updated_at) "
+                "VALUES (:table_name, :row_count, :created_at, :now) "
+                "ON CONFLICT(table_name) DO UPDATE SET "
+                "row_count = excluded.row_count, updated_at = excluded.updated_at"
+            ),
+            {'table_name': table_name, 'row_count': row_count, 'created_at': created_at or now, 'now': now}
+        )
+        for statement in row_count_trigger_sql(table_name):
+            db.session.execute(text(statement))
+        if commit:
+            db.session.commit()
+
+    def unregister_table(self, table_name: str) -> None:
+        """Retirer une table supprimée (ses triggers sont supprimés avec elle)"""
+        if not self.is_available():
+            return
+        db.session.execute(
+            text(f"DELETE FROM {METADATA_TABLE} WHERE table_name = :table_name"),
+            {'table_name': table_name}
+        )
+        db.session.commit()
+
+    def _read_all(self) -> Dict[str, Dict[str, Any]]:
+        """Lire toutes les métadonnées en une requête"""
+        result = db.session.execute(
+            text(f"SELECT table_name, row_count, created_at FROM {METADATA_TABLE}")
+        )
+        return {
+            name: {
+                'row_count': row_count,
+                # Format ISO 8601
+                'created_at': str(created_at).replace(' ', 'T') if created_at else '-'
+            }
+            for name, row_count, created_at in result
+        }
+
+
+# Instance globale du service
+table_metadata_service = TableMetadataService()
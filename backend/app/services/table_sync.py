@@ -1,31 +1,17 @@
 """
 Service pour la synchronisation des tables SQLite avec le backend
 """
-import sqlite3
-import os
 from typing import List, Dict, Any
+from app.services.schema_catalog import schema_catalog
 
 
 class TableSyncService:
-    """Service pour gérer la synchronisation des tables SQLite"""
-    
-    def __init__(self):
-        """Initialiser le service avec le chemin de la base de données"""
-        # Chemin vers la base de données depuis le répertoire backend
-        self.db_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-            '..', 'data', 'atarys_data.db'
-        )
+    """Service pour gérer la synchronisation des tables SQLite (lecture via le catalogue du schéma)"""
     
     def _get_all_tables(self) -> List[str]:
         """Récupérer toutes les tables de la base de données"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            return tables
+            return schema_catalog.table_names()
         except Exception as e:
             print(f"Erreur lors de la récupération des tables: {e}")
             return []
@@ -33,20 +19,16 @@ class TableSyncService:
     def _get_table_columns(self, table_name: str) -> List[Dict[str, Any]]:
         """Récupérer les colonnes d'une table spécifique"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = []
-            for row in cursor.fetchall():
-                columns.append({
-                    'name': row[1],
-                    'type': row[2],
-                    'not_null': bool(row[3]),
-                    'default_value': row[4],
-                    'primary_key': bool(row[5])
-                })
-            conn.close()
-            return columns
+            return [
+                {
+                    'name': col['name'],
+                    'type': col['type'],
+                    'not_null': col['not_null'],
+                    'default_value': col['default'],
+                    'primary_key': col['primary_key']
+                }
+                for col in schema_catalog.get_columns(table_name)
+            ]
         except Exception as e:
             print(f"Erreur lors de la récupération des colonnes: {e}")
             return []
@@ -75,23 +57,11 @@ class TableSyncService:
                            target_table: str, target_column: str) -> bool:
         """Valider si une clé étrangère est possible"""
         try:
-            # Vérifier que les tables existent
-            tables = self._get_all_tables()
-            if source_table not in tables or target_table not in tables:
-                return False
-            
-            # Vérifier que les colonnes existent
-            source_columns = [col['name'] for col in self._get_table_columns(source_table)]
-            target_columns = [col['name'] for col in self._get_table_columns(target_table)]
+            # Vérifier que les tables et les colonnes existent
+            source_col = schema_catalog.get_column(source_table, source_column)
+            target_col = schema_catalog.get_column(target_table, target_column)
             
-            if source_column not in source_columns or target_column not in target_columns:
-                return False
-            
-            # Vérifier que la colonne cible est une clé primaire ou unique
-            target_cols = self._get_table_columns(target_table)
-            target_col = next((col for col in target_cols if col['name'] == target_column), None)
-            
-            if not target_col:
+            if not source_col or not target_col:
                 return False
             
             # La colonne cible doit être une clé primaire ou avoir un index unique
@@ -110,23 +80,7 @@ class TableSyncService:
     def _has_unique_index(self, table_name: str, column_name: str) -> bool:
         """Vérifier si une colonne a un index unique"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(f"PRAGMA index_list({table_name})")
-            indexes = cursor.fetchall()
-            
-            for index in indexes:
-                index_name = index[1]
-                cursor.execute(f"PRAGMA index_info({index_name})")
-                index_info = cursor.fetchall()
-                
-                # Vérifier si l'index contient notre colonne et est unique
-                if any(row[2] == column_name for row in index_info) and index[2] == 1:
-                    conn.close()
-                    return True
-            
-            conn.close()
-            return False
+            return schema_catalog.has_unique_index(table_name, column_name)
         except Exception as e:
             print(f"Erreur lors de la vérification de l'index unique: {e}")
             return False
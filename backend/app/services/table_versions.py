@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - VERSIONS DES TABLES
+Compteur de modifications par table, base des ETag du cache de réponses
+
+- Écritures ORM détectées par les événements after_insert / after_update / after_delete
+- Écritures SQL directes (imports en masse, tables de liaison) signalées par mark_changed
+- Versions incrémentées au commit de la session (jamais pour une transaction annulée seule)
+- Serveur multi-processus : versions en mémoire partagée (share, avant le fork des workers)
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app import db
+
+
+# Clé de session contenant les tables modifiées dans la transaction en cours
+PENDING_KEY = 'atarys_changed_tables'
+
+# Compteurs partagés entre processus : une table -> un compteur (crc32 modulo SHARED_SLOTS).
+# Deux tables sur le même compteur : au pire une réponse recalculée, jamais une version manquée
+SHARED_SLOTS = 4096
+
+
+class TableVersions:
+    """Versions en mémoire des tables, lues sans accès à la base"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._shared = None
+        # Distingue les versions de deux démarrages du serveur (ETag non réutilisés)
+        self.epoch = f'{int(time.time()):x}{os.getpid():x}'
+        self._listening = False
+
+    def init_app(self, app) -> None:
+        """Brancher les événements SQLAlchemy (une seule fois par processus)"""
+        app.extensions['table_versions'] = self
+        if self._listening:
+            return
+        for event_name in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(db.Model, event_name, self._on_row_change, propagate=True)
+        event.listen(Session, 'after_commit', self._on_commit)
+        self._listening = True
+
+    def share(self) -> None:
+        """
+        Placer les versions en mémoire partagée (processus maître, avant le fork)
+
+        Une écriture validée dans un worker invalide alors les ETag, le cache
+        de réponses et les index mémoire de tous les autres workers.
+        """
+        if self._shared is not None:
+            return
+        shared = multiprocessing.Array('Q', SHARED_SLOTS)
+        with self._lock:
+            for name, version in self._versions.items():
+                shared[self._slot(name)] += version
+            self._lock = shared.get_lock()
+            self._shared = shared.get_obj()
+
+    @staticmethod
+    def _slot(table_name: str) -> int:
+        return zlib.crc32(table_name.encode()) % SHARED_SLOTS
+
+    # ============================================================================
+    # LECTURE
+    # ============================================================================
+
+    def get(self, table_name: str) -> int:
+        """Version courante d'une table"""
+        if self._shared is not None:
+            return self._shared[self._slot(table_name)]
+        return self._versions.get(table_name, 0)
+
+    def get_many(self, table_names: Iterable[str]) -> Tuple[int, ...]:
+        """Versions courantes de plusieurs tables"""
+        if self._shared is not None:
+            return tuple(self._shared[self._slot(name)] for name in table_names)
+        versions = self._versions
+        return tuple(versions.get(name, 0) for name in table_names)
+
+    # ============================================================================
+    # MODIFICATIONS
+    # ============================================================================
+
+    def bump(self, *table_names: str) -> None:
+        """Incrémenter la version de tables modifiées (données déjà validées)"""
+        with self._lock:
+            if self._shared is not None:
+                for name in table_names:
+                    self._shared[self._slot(name)] += 1
+                return
+            for name in table_names:
+                self._versions[name] = self._versions.get(name, 0) + 1
+
+    def mark_changed(self, session, *table_names: str) -> None:
+        """
+        Signaler des tables modifiées hors ORM dans la transaction d'une session
+
+        Les versions sont incrémentées au prochain commit de la session. Une
+        transaction annulée conserve le signalement : au pire une version de
+        trop (réponse recalculée), jamais une modification manquée.
+        """
+        session.info.setdefault(PENDING_KEY, set()).update(table_names)
+
+    def _on_row_change(self, mapper, connection, target) -> None:
+        session = object_session(target)
+        if session is not None:
+            self.mark_changed(session, mapper.persist_selectable.name)
+
+    def _on_commit(self, session) -> None:
+        pending = session.info.pop(PENDING_KEY, None)
+        if pending:
+            self.bump(*pending)
+
+
+# Instance globale du service
+table_versions = TableVersions()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - RECHERCHE GÉOGRAPHIQUE DES COMMUNES
+Communes dans un rayon et commune la plus proche d'un point (latitude, longitude)
+
+- Présélection par boîte englobante sur l'index spatial SQLite R*Tree villes_rtree
+- Distance exacte (haversine) calculée sur les seules communes présélectionnées
+- Plus proche voisin : rayon doublé jusqu'à trouver assez de communes dans le cercle
+- Repli sur un filtre BETWEEN des colonnes si l'index n'existe pas (migration non appliquée)
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+from sqlalchemy import column, table
+from app import db
+from app.models.module_9 import Ville
+from app.services.schema_catalog import schema_catalog
+
+
+RTREE_TABLE = 'villes_rtree'
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Longueur d'un degré de latitude (km)
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Recherche du plus proche voisin : rayon initial, plafond (demi-circonférence terrestre)
+NEAREST_START_RADIUS_KM = 5.0
+NEAREST_MAX_RADIUS_KM = math.pi * EARTH_RADIUS_KM
+
+MAX_RADIUS_KM = 500.0
+MAX_RESULTS = 1000
+
+villes_rtree = table(RTREE_TABLE, column('id'), column('min_lat'), column('max_lat'),
+                     column('min_lon'), column('max_lon'))
+
+# (distance en km, id de la ville)
+Neighbour = Tuple[float, int]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distance orthodromique entre deux points (km)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_point(lat, lon) -> Tuple[float, float]:
+    """
+    Valider des coordonnées en degrés décimaux (virgule française acceptée)
+
+    Raises:
+        ValueError: Coordonnée absente ou hors limites
+    """
+    try:
+        lat = float(str(lat).strip().replace(',', '.'))
+        lon = float(str(lon).strip().replace(',', '.'))
+    except (TypeError, ValueError):
+        raise ValueError('Paramètres "lat" et "lon" requis (degrés décimaux)')
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError('Coordonnées hors limites (lat -90..90, lon -180..180)')
+    return lat, lon
+
+
+class VilleGeo:
+    """Requêtes de proximité sur les coordonnées des villes"""
+
+    def is_available(self) -> bool:
+        """Vérifier que l'index R*Tree existe"""
+        return schema_catalog.has_table(RTREE_TABLE)
+
+    def within(self, lat: float, lon: float, radius_km: float,
+               limit: Optional[int] = None) -> List[Neighbour]:
+        """
+        Communes situées à moins de radius_km du point, les plus proches d'abord
+
+        Returns:
+            list: [(distance_km, ville_id)]
+        """
+        neighbours = [
+            (distance, ville_id)
+            for distance, ville_id in self._candidates(lat, lon, radius_km)
+            if distance <= radius_km
+        ]
+        neighbours.sort()
+        return neighbours[:limit] if limit else neighbours
+
+    def nearest(self, lat: float, lon: float, limit: int = 1) -> List[Neighbour]:
+        """
+        Communes les plus proches du point (sans limite de distance)
+
+        Une commune trouvée dans le cercle de rayon r est forcément plus proche
+        que toute commune hors de la boîte englobante : le rayon est doublé
+        jusqu'à ce que le cercle contienne `limit` communes.
+
+        Returns:
+            list: [(distance_km, ville_id)]
+        """
+        radius = NEAREST_START_RADIUS_KM
+        while True:
+            neighbours = self.within(lat, lon, radius)
+            if len(neighbours) >= limit or radius >= NEAREST_MAX_RADIUS_KM:
+                return neighbours[:limit]
+            radius = min(radius * 2, NEAREST_MAX_RADIUS_KM)
+
+    def _candidates(self, lat: float, lon: float, radius_km: float):
+        """Communes de la boîte englobant le cercle, avec leur distance exacte"""
+        min_lat, max_lat, min_lon, max_lon = self._bounding_box(lat, lon, radius_km)
+        if self.is_available():
+            query = (
+                db.session.query(Ville.id, Ville.latitude, Ville.longitude)
+                .join(villes_rtree, villes_rtree.c.id == Ville.id)
+                .filter(
+                    villes_rtree.c.max_lat >= min_lat, villes_rtree.c.min_lat <= max_lat,
+                    villes_rtree.c.max_lon >= min_lon, villes_rtree.c.min_lon <= max_lon,
+                )
+            )
+        else:
+            query = db.session.query(Ville.id, Ville.latitude, Ville.longitude).filter(
+                Ville.latitude.between(min_lat, max_lat), Ville.longitude.between(min_lon, max_lon)
+            )
+        for ville_id, ville_lat, ville_lon in query:
+            if ville_lat is not None and ville_lon is not None:
+                yield haversine_km(lat, lon, ville_lat, ville_lon), ville_id
+
+    @staticmethod
+    def _bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+        """Boîte (min_lat, max_lat, min_lon, max_lon) contenant le cercle"""
+        d_lat = radius_km / KM_PER_DEGREE
+        min_lat, max_lat = lat - d_lat, lat + d_lat
+        cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+        if min_lat <= -90 or max_lat >= 90 or cos_lat <= 0 or radius_km >= NEAREST_MAX_RADIUS_KM:
+            # Cercle contenant un pôle : toutes les longitudes
+            return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+        d_lon = min(180.0, radius_km / (KM_PER_DEGREE * cos_lat))
+        # Antiméridien non géré (communes françaises métropolitaines et DOM) : boîte bornée
+        return min_lat, max_lat, max(lon - d_lon, -180.0), min(lon + d_lon, 180.0)
+
+
+# Instance globale du service
+ville_geo = VilleGeo()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - INDEX MÉMOIRE DES COMMUNES
+Autocomplétion de /api/villes/search sans requête SQL
+
+- Index construit au démarrage à partir de la table villes, reconstruit à la
+  première recherche qui suit une écriture (version de table villes changée)
+- Mots des noms normalisés (sans accents ni casse) triés : recherche de préfixe
+  par dichotomie (bisect), positions des communes dans des tableaux array
+- Communes conservées en tuples nommés (colonnes de villes, sans __dict__),
+  sérialisés directement par les sérialiseurs compilés
+- Mêmes règles de saisie que l'index FTS5 (ville_search) : chaque mot en
+  préfixe, abréviations (st -> saint), nombres sur code postal / code INSEE
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from typing import List, Optional, Tuple
+
+from app import db
+from app.models.module_9 import Ville
+from app.services.table_versions import table_versions
+from app.services.ville_search import ABBREVIATIONS, SEARCH_LIMIT
+
+_TOKEN = re.compile(r'\w+')
+
+# Colonnes de villes conservées pour chaque commune
+RECORD_FIELDS = tuple(column.key for column in Ville.__table__.columns)
+
+
+class VilleRecord(namedtuple('VilleRecord', RECORD_FIELDS + ('words', 'name', 'codes'))):
+    """Commune de l'index : tuple (colonnes de Ville, mots normalisés, nom normalisé, codes)"""
+
+    __slots__ = ()
+
+
+class _AccentTable(dict):
+    """Table str.translate : caractère accentué -> caractère de base (calculé au premier usage)"""
+
+    def __missing__(self, code: int) -> str:
+        decomposed = unicodedata.normalize('NFKD', chr(code))
+        self[code] = ''.join(char for char in decomposed if not unicodedata.combining(char))
+        return self[code]
+
+
+_ACCENTS = _AccentTable()
+
+
+def normalize(value) -> List[str]:
+    """Mots d'un texte sans accents ni casse ('Saint-Méen' -> ['saint', 'meen'])"""
+    text = str(value or '').lower()
+    if not text.isascii():
+        text = text.translate(_ACCENTS)
+    return _TOKEN.findall(text)
+
+
+def _code(value) -> Optional[str]:
+    """Code postal / INSEE sur 5 chiffres (01000 et non 1000), comme l'index FTS5"""
+    if value is None or value == '':
+        return None
+    text = str(value).strip()
+    return text.zfill(5) if text.isdigit() else text.lower()
+
+
+class _Snapshot:
+    """Structures de l'index (remplacées en bloc à chaque reconstruction)"""
+
+    __slots__ = ('version', 'records', 'names', 'name_rows', 'words', 'word_rows', 'codes', 'code_rows')
+
+    def __init__(self, version: int, records: List[VilleRecord]):
+        self.version = version
+        # Communes triées par nom : la position sert de critère de tri secondaire
+        self.records = records
+        self.names, self.name_rows = self._sorted_keys((record.name, row) for row, record in enumerate(records))
+        self.words, self.word_rows = self._sorted_keys(
+            (word, row) for row, record in enumerate(records) for word in set(record.words)
+        )
+        self.codes, self.code_rows = self._sorted_keys(
+            (code, row) for row, record in enumerate(records) for code in set(record.codes) if code
+        )
+
+    @staticmethod
+    def _sorted_keys(pairs) -> Tuple[List[str], array]:
+        pairs = sorted(pairs)
+        return [key for key, _ in pairs], array('l', (row for _, row in pairs))
+
+
+def _prefix_rows(keys: List[str], rows: array, prefix: str) -> array:
+    """Positions des communes dont une clé commence par prefix (dichotomie)"""
+    start = bisect_left(keys, prefix)
+    end = bisect_left(keys, prefix + '\uffff', start)
+    return rows[start:end]
+
+
+class VilleIndex:
+    """Index de préfixes des communes, en mémoire du processus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+
+    def init_app(self, app) -> None:
+        """Construire l'index au démarrage (ignoré si la table n'existe pas encore)"""
+        app.extensions['ville_index'] = self
+        with app.app_context():
+            try:
+                self.rebuild()
+            except Exception as e:
+                print(f"[ATARYS] Index des communes non construit : {e}")
+
+    # ============================================================================
+    # CONSTRUCTION
+    # ============================================================================
+
+    def rebuild(self) -> int:
+        """
+        (Re)construire l'index à partir de la table villes
+
+        Returns:
+            int: Nombre de communes indexées
+        """
+        with self._lock:
+            return self._build()
+
+    def refresh(self) -> bool:
+        """
+        Reconstruire l'index si villes a été modifiée depuis sa construction
+
+        Returns:
+            bool: Index disponible
+        """
+        if not self._is_stale():
+            return True
+        with self._lock:
+            # Une seule reconstruction pour les requêtes arrivées pendant celle-ci
+            if self._is_stale():
+                try:
+                    self._build()
+                except Exception:
+                    db.session.rollback()
+                    return False
+        return True
+
+    def _is_stale(self) -> bool:
+        snapshot = self._snapshot
+        return snapshot is None or snapshot.version != table_versions.get(Ville.__tablename__)
+
+    def _build(self) -> int:
+        # Version lue avant les lignes : une écriture concurrente déclenche une nouvelle reconstruction
+        version = table_versions.get(Ville.__tablename__)
+        table = Ville.__table__
+        rows = db.session.execute(
+            db.select(*table.columns).order_by(table.c.communes, table.c.id)
+        ).all()
+        records = []
+        for row in rows:
+            words = tuple(normalize(row.communes))
+            records.append(VilleRecord(*row, words, ' '.join(words),
+                                       (_code(row.code_postal), _code(row.code_insee))))
+        self._snapshot = _Snapshot(version, records)
+        return len(records)
+
+    # ============================================================================
+    # RECHERCHE
+    # ============================================================================
+
+    def search(self, ville: Optional[str] = None, code_postal: Optional[str] = None,
+               limit: int = SEARCH_LIMIT) -> List[VilleRecord]:
+        """
+        Rechercher des communes (chaque mot de la saisie en préfixe)
+
+        Tri : noms commençant par la saisie, puis autres correspondances,
+        chaque groupe dans l'ordre alphabétique (arrêt dès limit atteint)
+
+        Returns:
+            list: Enregistrements VilleRecord (attributs de Ville)
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return []
+        tokens = normalize(ville)
+        postal_prefixes = normalize(code_postal)
+        if not tokens and not postal_prefixes:
+            return snapshot.records[:limit]
+
+        records = snapshot.records
+        matches, seen = [], set()
+
+        # 1. Noms commençant par la saisie (abréviations développées), ordre alphabétique
+        if tokens and not any(token.isdigit() for token in tokens):
+            phrase = ' '.join(ABBREVIATIONS.get(token, token) for token in tokens)
+            for row in sorted(_prefix_rows(snapshot.names, snapshot.name_rows, phrase)):
+                if self._matches(records[row], tokens, postal_prefixes):
+                    matches.append(records[row])
+                    seen.add(row)
+                    if len(matches) >= limit:
+                        return matches
+
+        # 2. Autres communes dont chaque mot de la saisie préfixe un mot du nom :
+        #    candidats du mot le plus sélectif, parcourus dans l'ordre alphabétique
+        candidates = [self._token_rows(snapshot, token) for token in tokens]
+        candidates += [_prefix_rows(snapshot.codes, snapshot.code_rows, prefix) for prefix in postal_prefixes]
+        for row in sorted(set(min(candidates, key=len))):
+            if row not in seen and self._matches(records[row], tokens, postal_prefixes):
+                matches.append(records[row])
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def _matches(self, record: VilleRecord, tokens: List[str], postal_prefixes: List[str]) -> bool:
+        return all(self._token_matches(record, token) for token in tokens) and all(
+            record.codes[0] and record.codes[0].startswith(prefix) for prefix in postal_prefixes
+        )
+
+    @staticmethod
+    def _token_rows(snapshot: _Snapshot, token: str):
+        if token.isdigit():
+            return _prefix_rows(snapshot.codes, snapshot.code_rows, token)
+        rows = _prefix_rows(snapshot.words, snapshot.word_rows, token)
+        if token in ABBREVIATIONS:
+            rows = rows + _prefix_rows(snapshot.words, snapshot.word_rows, ABBREVIATIONS[token])
+        return rows
+
+    @staticmethod
+    def _token_matches(record: VilleRecord, token: str) -> bool:
+        if token.isdigit():
+            return any(code and code.startswith(token) for code in record.codes)
+        expanded = ABBREVIATIONS.get(token)
+        return any(word.startswith(token) or word == expanded for word in record.words)
+
+
+# Instance globale du service
+ville_index = VilleIndex()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - RECHERCHE DE COMMUNES
+Recherche plein texte des villes (autocomplétion) sur l'index SQLite FTS5 villes_fts
+
+- Index miroir de villes (communes, code postal, code INSEE) tenu à jour par triggers
+- Insensible aux accents et à la casse (tokenizer unicode61 remove_diacritics 2)
+- Préfixes ("bre" -> Brest), abréviations ("st brieuc" -> Saint-Brieuc)
+- Classement bm25 (nom de commune prioritaire sur les codes) sur toutes les correspondances
+- Repli sur LIKE si l'index n'existe pas (migration non appliquée)
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+import re
+from typing import List, Optional
+
+from sqlalchemy import func, literal_column, select, text
+from app import db
+from app.models.module_9 import Ville
+from app.services.schema_catalog import schema_catalog
+
+
+FTS_TABLE = 'villes_fts'
+
+# Nombre de résultats par défaut (autocomplétion)
+SEARCH_LIMIT = 20
+
+# Poids bm25 par colonne de l'index : communes, code_postal, code_insee
+RANK_WEIGHTS = (10.0, 5.0, 1.0)
+
+# Abréviations usuelles des noms de communes
+ABBREVIATIONS = {
+    'st': 'saint',
+    'ste': 'sainte',
+    'sts': 'saints',
+    'stes': 'saintes',
+    'mt': 'mont',
+}
+
+# Valeurs indexées d'une ligne de villes (codes sur 5 chiffres : 01000 et non 1000)
+FTS_VALUES = (
+    "{p}id, {p}communes, printf('%05d', {p}code_postal), "
+    "CASE WHEN {p}code_insee IS NULL THEN NULL ELSE printf('%05d', {p}code_insee) END"
+)
+
+# Structure de l'index et triggers de synchronisation (cf. migration e5c9a14f7b28)
+FTS_DDL = (
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    "communes, code_postal, code_insee, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3')",
+    f"CREATE TRIGGER trg_villes_fts_insert AFTER INSERT ON villes BEGIN "
+    f"INSERT INTO {FTS_TABLE} (rowid, communes, code_postal, code_insee) "
+    f"VALUES ({FTS_VALUES.format(p='new.')}); END",
+    f"CREATE TRIGGER trg_villes_fts_delete AFTER DELETE ON villes BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END",
+    f"CREATE TRIGGER trg_villes_fts_update AFTER UPDATE OF id, communes, code_postal, code_insee ON villes BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; "
+    f"INSERT INTO {FTS_TABLE} (rowid, communes, code_postal, code_insee) "
+    f"VALUES ({FTS_VALUES.format(p='new.')}); END",
+)
+
+FTS_POPULATE = (
+    f"INSERT INTO {FTS_TABLE} (rowid, communes, code_postal, code_insee) "
+    f"SELECT {FTS_VALUES.format(p='')} FROM villes"
+)
+
+_TOKEN = re.compile(r'\w+')
+
+
+class VilleSearch:
+    """Recherche de communes par nom, code postal ou code INSEE"""
+
+    def is_available(self) -> bool:
+        """Vérifier que l'index FTS5 existe"""
+        return schema_catalog.has_table(FTS_TABLE)
+
+    @staticmethod
+    def build_match(ville: Optional[str] = None, code_postal: Optional[str] = None) -> Optional[str]:
+        """
+        Construire l'expression MATCH FTS5 d'une saisie utilisateur
+
+        Chaque mot est cherché en préfixe (tous les mots doivent correspondre) :
+        - mot alphabétique : nom de commune, abréviation développée
+        - nombre : code postal ou code INSEE
+
+        Returns:
+            str | None: Expression MATCH, None si la saisie est vide
+        """
+        terms = []
+        for token in _TOKEN.findall((ville or '').lower()):
+            if token.isdigit():
+                terms.append(f'{{code_postal code_insee}} : "{token}"*')
+            elif token in ABBREVIATIONS:
+                terms.append(f'communes : ("{ABBREVIATIONS[token]}" OR "{token}"*)')
+            else:
+                terms.append(f'communes : "{token}"*')
+        for token in _TOKEN.findall(code_postal or ''):
+            terms.append(f'code_postal : "{token}"*')
+        return ' AND '.join(terms) or None
+
+    def search(self, query, ville: Optional[str] = None, code_postal: Optional[str] = None,
+               limit: int = SEARCH_LIMIT) -> List:
+        """
+        Rechercher des communes, les plus pertinentes en premier
+
+        Args:
+            query: Requête de base sur Ville (instances ou colonnes, cf. row_query)
+            ville (str): Saisie libre (nom, début de nom, code postal...)
+            code_postal (str): Début de code postal
+            limit (int): Nombre maximal de résultats
+
+        Returns:
+            list: Villes (ou lignes Row) triées par pertinence
+        """
+        match = self.build_match(ville, code_postal)
+        if match is None:
+            return query.order_by(Ville.communes, Ville.id).limit(limit).all()
+        if not self.is_available():
+            return self._search_like(query, ville, code_postal, limit)
+
+        index = literal_column(FTS_TABLE)
+        # Classement de toutes les correspondances avant la limite : les meilleures
+        # communes ne dépendent pas de l'ordre des rowid
+        rank = func.bm25(index, *RANK_WEIGHTS)
+        ranked = (
+            select(literal_column('rowid').label('id'), rank.label('rank'))
+            .select_from(text(FTS_TABLE))
+            .where(index.match(match))
+            .order_by(rank, literal_column('rowid'))
+            .limit(limit)
+            .subquery()
+        )
+        return (
+            query.join(ranked, ranked.c.id == Ville.id)
+            .order_by(ranked.c.rank, Ville.communes, Ville.id)
+            .all()
+        )
+
+    def rebuild(self) -> int:
+        """
+        (Re)créer l'index et ses triggers à partir de la table villes (sans commit)
+
+        Returns:
+            int: Nombre de communes indexées
+        """
+        db.session.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+        for trigger in ('insert', 'delete', 'update'):
+            db.session.execute(text(f"DROP TRIGGER IF EXISTS trg_villes_fts_{trigger}"))
+        for statement in FTS_DDL:
+            db.session.execute(text(statement))
+        db.session.execute(text(FTS_POPULATE))
+        return db.session.execute(text(f"SELECT COUNT(*) FROM {FTS_TABLE}")).scalar()
+
+    @staticmethod
+    def _search_like(query, ville: Optional[str], code_postal: Optional[str], limit: int) -> List:
+        """Recherche sans index (parcours complet), comportement historique"""
+        if code_postal:
+            query = query.filter(Ville.code_postal.like(f'{code_postal}%'))
+        if ville:
+            query = query.filter(Ville.communes.ilike(f'%{ville}%'))
+        return query.order_by(Ville.communes, Ville.id).limit(limit).all()
+
+
+# Instance globale du service
+ville_search = VilleSearch()
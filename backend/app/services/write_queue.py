@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - FILE D'ÉCRITURE UNIQUE
+Écritures des routes sérialisées par un thread écrivain dédié, avec commit groupé
+
+- Les routes soumettent des unités d'écriture (fonctions utilisant db.session)
+  et attendent leur résultat : un seul écrivain SQLite, plus de "database is locked"
+- Unités arrivées dans une courte fenêtre (WRITE_QUEUE_WINDOW_MS) regroupées
+  dans une seule transaction : un commit pour tout le lot
+- Flush après chaque unité : une erreur (contrainte, 404...) est attribuée à son
+  unité ; le lot est annulé et les autres unités rejouées sans elle
+- Commit du lot refusé : chaque unité rejouée seule dans sa transaction
+- Transaction ouverte par BEGIN IMMEDIATE : verrou d'écriture pris d'emblée
+  (attente busy_timeout entre processus, pas d'échec à la première écriture
+  d'une unité qui a lu avant) ; les savepoints des unités restent imbriqués
+  dans la transaction du lot
+- Une unité retourne des données sérialisées (dict, id...) et non des objets ORM,
+  qui appartiennent à la session du thread écrivain
+- Écrivains : routes CRUD, lots des imports en masse (BulkLoader), état et
+  avancement des tâches (JobRunner), distances au dépôt. Restent hors de la file
+  les opérations de schéma (création/suppression de tables, DDL non groupable)
+  et la récupération des tâches interrompues au démarrage, avant tout autre écrivain
+
+Configuration (app.config) :
+- WRITE_QUEUE_ENABLED : False pour exécuter les unités dans le thread appelant
+- WRITE_QUEUE_WINDOW_MS : attente maximale des unités suivantes d'un lot
+- WRITE_QUEUE_MAX_BATCH : nombre maximal d'unités par commit
+
+Auteur: ATARYS Team
+Date: 2025
+Version: 2.0
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from app import db
+
+
+DEFAULT_WINDOW_MS = 2
+DEFAULT_MAX_BATCH = 64
+
+
+def begin_immediate() -> None:
+    """
+    Ouvrir la transaction d'écriture de la session (BEGIN IMMEDIATE)
+
+    Sans elle, sqlite3 n'ouvre la transaction qu'au premier INSERT/UPDATE : un
+    SAVEPOINT émis avant serait la transaction elle-même, validée par son RELEASE.
+    """
+    connection = db.session.connection()
+    if not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+
+class WriteUnit:
+    """Fonction d'écriture en attente et son résultat"""
+
+    __slots__ = ('func', 'args', 'kwargs', 'future')
+
+    def __init__(self, func: Callable[..., Any], args: tuple, kwargs: dict):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+
+
+class WriteQueue:
+    """Thread écrivain unique et file des unités d'écriture"""
+
+    def __init__(self):
+        self.app = None
+        self._queue: 'queue.Queue[WriteUnit]' = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {'units': 0, 'commits': 0, 'replays': 0}
+
+    def init_app(self, app) -> None:
+        """Associer l'application (le thread écrivain s'exécute dans son contexte)"""
+        self.app = app
+        app.config.setdefault('WRITE_QUEUE_ENABLED', True)
+        app.config.setdefault('WRITE_QUEUE_WINDOW_MS', DEFAULT_WINDOW_MS)
+        app.config.setdefault('WRITE_QUEUE_MAX_BATCH', DEFAULT_MAX_BATCH)
+        app.extensions['write_queue'] = self
+
+    def after_fork(self) -> None:
+        """Processus fils : file et thread écrivain propres (un écrivain par worker)"""
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # ============================================================================
+    # SOUMISSION
+    # ============================================================================
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Confier une unité d'écriture au thread écrivain
+
+        Args:
+            func (callable): Écritures via db.session, sans commit ; résultat sérialisé
+
+        Returns:
+            Future: Résultat de func une fois le lot validé (ou son exception)
+        """
+        self._ensure_thread()
+        unit = WriteUnit(func, args, kwargs)
+        self._queue.put(unit)
+        return unit.future
+
+    def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Exécuter une unité d'écriture et attendre son résultat (commit inclus)
+
+        Raises:
+            Exception: Exception levée par l'unité ou par le commit de son lot
+        """
+        if threading.current_thread() is self._thread:
+            # Unité imbriquée : fait partie du lot en cours
+            return func(*args, **kwargs)
+        if self.app is None or not self.app.config['WRITE_QUEUE_ENABLED']:
+            # Écritures de l'appelant sur le moteur principal, même pendant une requête GET
+            db.session.info['writing'] = True
+            try:
+                begin_immediate()
+                result = func(*args, **kwargs)
+                db.session.commit()
+                return result
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                db.session.info.pop('writing', None)
+        return self.submit(func, *args, **kwargs).result()
+
+    # ============================================================================
+    # THREAD ÉCRIVAIN
+    # ============================================================================
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name='atarys-writer', daemon=True)
+                self._thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                with self.app.app_context():
+                    self._run_batch(batch)
+            except Exception as e:
+                # Erreur hors unité (contexte, connexion) : aucun appelant ne reste bloqué
+                for unit in batch:
+                    if not unit.future.done():
+                        unit.future.set_exception(e)
+
+    def _next_batch(self) -> List[WriteUnit]:
+        """Première unité en attente, puis celles arrivées dans la fenêtre de regroupement"""
+        batch = [self._queue.get()]
+        max_batch = self.app.config['WRITE_QUEUE_MAX_BATCH']
+        deadline = time.monotonic() + self.app.config['WRITE_QUEUE_WINDOW_MS'] / 1000
+        while len(batch) < max_batch:
+            try:
+                # Unités déjà en file : prises sans attendre
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run_batch(self, batch: List[WriteUnit]) -> None:
+        """Exécuter un lot dans une transaction ; rejouer sans l'unité en erreur"""
+        pending = [unit for unit in batch if unit.future.set_running_or_notify_cancel()]
+        while pending:
+            results = []
+            failed = None
+            begin_immediate()
+            for unit in pending:
+                try:
+                    result = unit.func(*unit.args, **unit.kwargs)
+                    db.session.flush()
+                except Exception as e:
+                    failed = (unit, e)
+                    break
+                results.append((unit, result))
+
+            if failed is not None:
+                db.session.rollback()
+                unit, error = failed
+                unit.future.set_exception(error)
+                pending = [other for other in pending if other is not unit]
+                self.stats['replays'] += len(results)
+                continue
+
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                if len(pending) == 1:
+                    pending[0].future.set_exception(e)
+                    return
+                # Commit groupé refusé (busy timeout, contrainte différée...) :
+                # chaque unité rejouée dans sa propre transaction
+                self.stats['replays'] += len(pending)
+                for unit in pending:
+                    self._run_alone(unit)
+                return
+
+            self.stats['units'] += len(results)
+            self.stats['commits'] += 1
+            for unit, result in results:
+                unit.future.set_result(result)
+            return
+
+    def _run_alone(self, unit: WriteUnit) -> None:
+        """Exécuter une unité seule dans sa transaction"""
+        try:
+            begin_immediate()
+            result = unit.func(*unit.args, **unit.kwargs)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            unit.future.set_exception(e)
+            return
+        self.stats['units'] += 1
+        self.stats['commits'] += 1
+        unit.future.set_result(result)
+
+
+# ============================================================================
+# UNITÉS D'ÉCRITURE CRUD
+# ============================================================================
+
+def create_item(model, data: Dict[str, Any], schema) -> Dict[str, Any]:
+    """Créer une ligne ; retourne sa sérialisation (id et valeurs par défaut inclus)"""
+    item = model(**data)
+    db.session.add(item)
+    db.session.flush()
+    # Valeurs calculées à l'écriture (created_at, updated_at...) relues avant sérialisation
+    db.session.refresh(item)
+    return schema.dump(item)
+
+
+def update_item(model, item_id: int, data: Dict[str, Any], schema) -> Dict[str, Any]:
+    """Modifier une ligne existante (404 si absente) ; retourne sa sérialisation"""
+    item = model.query.get_or_404(item_id)
+    for key, value in data.items():
+        setattr(item, key, value)
+    db.session.flush()
+    db.session.refresh(item)
+    return schema.dump(item)
+
+
+def delete_item(model, item_id: int) -> None:
+    """Supprimer une ligne existante (404 si absente)"""
+    db.session.delete(model.query.get_or_404(item_id))
+
+
+# Instance globale du service
+write_queue = WriteQueue()
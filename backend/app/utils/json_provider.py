@@ -0,0 +1,54 @@
+"""
+Encodeur JSON rapide pour jsonify (orjson si installé)
+Même sortie que le fournisseur Flask par défaut : clés triées, dates au format HTTP,
+Decimal et UUID en chaînes ; repli sur le module json standard en cas d'échec
+"""
+
+import typing as t
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Fournisseur JSON Flask adossé à orjson"""
+
+    def _options(self, indent: bool = False) -> int:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def _encode(self, obj: t.Any, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=self._options(indent))
+
+    def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
+        try:
+            return self._encode(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+        except TypeError:
+            # Entiers hors 64 bits, types inconnus d'orjson : encodeur standard
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s: t.Union[str, bytes], **kwargs: t.Any) -> t.Any:
+        return orjson.loads(s)
+
+    def response(self, *args: t.Any, **kwargs: t.Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            body = self._encode(obj, indent=indent) + b'\n'
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json_provider(app) -> None:
+    """Installer l'encodeur orjson si la dépendance est disponible"""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
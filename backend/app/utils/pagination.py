@@ -0,0 +1,182 @@
+"""
+Pagination des routes de liste (curseur keyset)
+Tri sur une liste blanche de colonnes, curseur opaque sur (clé de tri, id)
+
+Paramètres de requête communs :
+- limit  : nombre d'éléments par page (DEFAULT_LIMIT, plafonné à MAX_LIMIT)
+- sort   : colonne de tri autorisée, préfixée par '-' pour un tri décroissant
+- cursor : valeur 'next_cursor' de la page précédente
+- total  : 'true' pour ajouter le nombre total d'éléments (requête COUNT)
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+from flask import request
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class Page:
+    """Une page de résultats et ses métadonnées de pagination"""
+
+    __slots__ = ('items', 'limit', 'sort', 'next_cursor', 'total')
+
+    def __init__(self, items: List[Any], limit: int, sort: str,
+                 next_cursor: Optional[str] = None, total: Optional[int] = None):
+        self.items = items
+        self.limit = limit
+        self.sort = sort
+        self.next_cursor = next_cursor
+        self.total = total
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        """Bloc 'pagination' ajouté aux réponses de liste"""
+        meta = {
+            'limit': self.limit,
+            'sort': self.sort,
+            'next_cursor': self.next_cursor,
+            'has_more': self.has_more
+        }
+        if self.total is not None:
+            meta['total'] = self.total
+        return meta
+
+
+def encode_cursor(sort_value: Any, last_id: int) -> str:
+    """Curseur opaque (base64 url) de la dernière ligne d'une page"""
+    if isinstance(sort_value, (date, datetime, Decimal)):
+        sort_value = sort_value.isoformat() if isinstance(sort_value, date) else str(sort_value)
+    payload = json.dumps([sort_value, last_id], separators=(',', ':'), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, column) -> tuple:
+    """Relire un curseur : (valeur de tri typée selon la colonne, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, last_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(last_id, int):
+            raise ValueError
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise ValueError('Paramètre "cursor" invalide')
+
+    if sort_value is not None:
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            python_type = None
+        try:
+            if python_type is datetime:
+                sort_value = datetime.fromisoformat(sort_value)
+            elif python_type is date:
+                sort_value = date.fromisoformat(sort_value)
+            elif python_type is Decimal:
+                sort_value = Decimal(str(sort_value))
+        except (ValueError, TypeError):
+            raise ValueError('Paramètre "cursor" invalide')
+    return sort_value, last_id
+
+
+def parse_limit(default_limit: int = DEFAULT_LIMIT, max_limit: int = MAX_LIMIT) -> int:
+    """Lire ?limit= (entier strictement positif, plafonné)"""
+    limit = request.args.get('limit', default_limit, type=int)
+    if limit is None or limit <= 0:
+        raise ValueError('Paramètre "limit" invalide')
+    return min(limit, max_limit)
+
+
+def paginate(query, model, sort_fields: Sequence[str] = (), default_sort: str = 'id',
+             default_limit: int = DEFAULT_LIMIT, max_limit: int = MAX_LIMIT) -> Page:
+    """
+    Paginer une requête SQLAlchemy d'après les paramètres de la requête HTTP
+
+    Le tri est toujours complété par l'id pour rendre l'ordre total : la page
+    suivante reprend strictement après (valeur de tri, id) de la dernière ligne,
+    sans OFFSET. Les valeurs NULL sont placées en fin de tri.
+
+    Args:
+        query: Requête de base (filtres déjà appliqués)
+        model: Modèle interrogé (colonnes de tri et clé primaire)
+        sort_fields (sequence): Colonnes autorisées pour ?sort= (en plus de 'id')
+        default_sort (str): Tri par défaut, ex: 'communes' ou '-created_at'
+        default_limit (int): Taille de page par défaut
+
+    Raises:
+        ValueError: Paramètre limit, sort ou cursor invalide
+    """
+    limit = parse_limit(default_limit, max_limit)
+
+    sort = request.args.get('sort') or default_sort
+    descending = sort.startswith('-')
+    sort_name = sort.lstrip('-')
+    allowed = ('id',) + tuple(sort_fields)
+    if sort_name not in allowed:
+        raise ValueError(f'Tri non autorisé : {sort_name} ({", ".join(allowed)})')
+
+    id_column = model.__mapper__.primary_key[0]
+    sort_column = id_column if sort_name == 'id' else getattr(model, sort_name)
+
+    query = _with_keyset_columns(query, sort_column, id_column)
+    total = query.order_by(None).count() if request.args.get('total') == 'true' else None
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, sort_column)
+        query = query.filter(_after(sort_column, id_column, sort_value, last_id, descending))
+
+    if sort_column is id_column:
+        order = [id_column.desc() if descending else id_column.asc()]
+    else:
+        order = [
+            (sort_column.desc() if descending else sort_column.asc()).nulls_last(),
+            id_column.desc() if descending else id_column.asc()
+        ]
+    # Une ligne de plus que la page : indique s'il reste des éléments
+    items = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(
+            getattr(last, sort_column.key), getattr(last, id_column.key)
+        )
+    return Page(items, limit, sort, next_cursor=next_cursor, total=total)
+
+
+def _with_keyset_columns(query, *columns):
+    """Requête sur colonnes (Row, champs partiels) : ajouter les colonnes lues par le curseur"""
+    descriptions = query.column_descriptions
+    if descriptions[0]['expr'] is descriptions[0]['entity']:
+        return query
+    present = {description['name'] for description in descriptions}
+    missing = {column.key: column for column in columns if column.key not in present}
+    return query.add_columns(*missing.values()) if missing else query
+
+
+def _after(sort_column, id_column, sort_value, last_id, descending):
+    """Condition keyset : lignes situées après (sort_value, last_id) dans l'ordre de tri"""
+    id_after = id_column < last_id if descending else id_column > last_id
+    if sort_column is id_column:
+        return id_after
+    if sort_value is None:
+        # Dernière ligne dans la zone des NULL (en fin de tri)
+        return and_(sort_column.is_(None), id_after)
+    value_after = sort_column < sort_value if descending else sort_column > sort_value
+    return or_(
+        value_after,
+        and_(sort_column == sort_value, id_after),
+        sort_column.is_(None)
+    )
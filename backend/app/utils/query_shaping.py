@@ -0,0 +1,162 @@
+"""
+Chargement anticipé des relations d'après les schémas Marshmallow
+Évite les requêtes N+1 lors de la sérialisation des champs imbriqués
+
+- Nested vers une collection (many-to-many, one-to-many) : selectinload (1 requête IN)
+- Nested vers un objet (many-to-one) : joinedload (jointure dans la requête principale)
+- Imbrication récursive (profondeur MAX_DEPTH), relations lazy='dynamic' ignorées
+
+Champs partiels (?fields=id,nom&expand=ville) : schéma dérivé limité aux champs
+demandés, colonnes SQL réduites (load_only) et relations chargées seulement si
+développées. Sans ces paramètres, le schéma complet est conservé.
+"""
+
+from typing import Dict, Optional, Tuple
+
+from flask import request
+from marshmallow import Schema, fields
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import ColumnProperty, joinedload, load_only, selectinload
+
+# Profondeur maximale d'imbrication suivie (protège des schémas récursifs)
+MAX_DEPTH = 3
+
+# Options calculées par (modèle, classe de schéma, champs sérialisés)
+_options_cache: Dict[tuple, Tuple] = {}
+
+# Schémas partiels par (classe de schéma, many, champs retenus)
+_sparse_schemas: Dict[tuple, Schema] = {}
+
+
+def sparse_schema(schema: Schema, fields_param: Optional[str] = None,
+                  expand_param: Optional[str] = None) -> Schema:
+    """
+    Schéma restreint aux paramètres ?fields= et ?expand= de la requête
+
+    - fields : champs retenus (tous les champs simples si absent)
+    - expand : champs imbriqués développés (un champ imbriqué cité dans fields l'est aussi)
+    Sans fields ni expand, le schéma d'origine est retourné tel quel.
+
+    Raises:
+        ValueError: Champ inconnu ou non développable
+    """
+    if fields_param is None:
+        fields_param = request.args.get('fields')
+    if expand_param is None:
+        expand_param = request.args.get('expand')
+    if fields_param is None and expand_param is None:
+        return schema
+
+    dump_fields = schema.dump_fields
+    nested_names = {name for name, field in dump_fields.items() if _nested_schema(field) is not None}
+    requested = _split(fields_param)
+    expanded = _split(expand_param)
+
+    unknown = [name for name in requested + expanded if name not in dump_fields]
+    if unknown:
+        raise ValueError(f"Champ inconnu : {', '.join(unknown)} ({', '.join(dump_fields)})")
+    not_nested = [name for name in expanded if name not in nested_names]
+    if not_nested:
+        raise ValueError(f"Champ non développable : {', '.join(not_nested)} ({', '.join(sorted(nested_names))})")
+
+    selected = requested if fields_param is not None else [
+        name for name in dump_fields if name not in nested_names
+    ]
+    only = tuple(name for name in dump_fields if name in selected or name in expanded)
+    if not only:
+        raise ValueError('Paramètre "fields" vide')
+
+    key = (type(schema), schema.many, only)
+    derived = _sparse_schemas.get(key)
+    if derived is None:
+        derived = type(schema)(only=only, many=schema.many)
+        _sparse_schemas[key] = derived
+    return derived
+
+
+def eager_load_options(model, schema: Schema) -> Tuple:
+    """
+    Options de chargement anticipé correspondant aux champs Nested d'un schéma
+
+    Args:
+        model: Modèle SQLAlchemy sérialisé par le schéma
+        schema (Schema): Instance du schéma (only/exclude pris en compte)
+
+    Returns:
+        tuple: Options à passer à query.options(...)
+    """
+    key = (model, type(schema), tuple(schema.dump_fields))
+    options = _options_cache.get(key)
+    if options is None:
+        options = tuple(_loader_options(model, schema, parent=None, depth=1))
+        _options_cache[key] = options
+    return options
+
+
+def shape_query(query, schema: Schema):
+    """
+    Ajouter à une requête les chargements anticipés requis par le schéma
+
+    Pour un schéma partiel (sparse_schema), seules les colonnes sérialisées
+    sont lues, plus la clé primaire et la colonne de tri demandée.
+    """
+    model = query.column_descriptions[0]['entity']
+    options = eager_load_options(model, schema)
+    if schema.only is not None:
+        columns = _column_attributes(model, schema)
+        if columns:
+            options = options + (load_only(*columns),)
+    return query.options(*options) if options else query
+
+
+def _column_attributes(model, schema: Schema) -> list:
+    """Attributs colonnes lus par le schéma (et colonne de ?sort=)"""
+    attrs = sa_inspect(model).attrs
+    names = [field.attribute or name for name, field in schema.dump_fields.items()]
+    sort = (request.args.get('sort') or '').lstrip('-')
+    if sort:
+        names.append(sort)
+    return [
+        getattr(model, name) for name in dict.fromkeys(names)
+        if isinstance(attrs.get(name), ColumnProperty)
+    ]
+
+
+def _split(param: Optional[str]) -> list:
+    return [name.strip() for name in (param or '').split(',') if name.strip()]
+
+
+def _nested_schema(field):
+    """Schéma imbriqué d'un champ Nested / List(Nested), sinon None"""
+    if isinstance(field, fields.List):
+        field = field.inner
+    if isinstance(field, fields.Nested):
+        return field.schema
+    return None
+
+
+def _loader_options(model, schema: Schema, parent, depth: int):
+    """Chaînes d'options pour chaque relation sérialisée (récursif)"""
+    relationships = sa_inspect(model).relationships
+    for name, field in schema.dump_fields.items():
+        nested = _nested_schema(field)
+        if nested is None:
+            continue
+        relationship = relationships.get(field.attribute or name)
+        if relationship is None or relationship.lazy == 'dynamic':
+            continue
+
+        attribute = getattr(model, relationship.key)
+        loader = 'selectinload' if relationship.uselist else 'joinedload'
+        if parent is None:
+            option = (selectinload if relationship.uselist else joinedload)(attribute)
+        else:
+            option = getattr(parent, loader)(attribute)
+
+        children = []
+        if depth < MAX_DEPTH:
+            children = list(_loader_options(relationship.mapper.class_, nested, option, depth + 1))
+        if children:
+            yield from children
+        else:
+            yield option
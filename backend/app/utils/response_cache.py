@@ -0,0 +1,122 @@
+"""
+Cache des réponses GET des données de référence (ETag / If-None-Match)
+La validité d'une réponse dépend uniquement de la version des tables lues
+
+- ETag calculé sans accès à la base : versions des tables + URL demandée
+  (+ valeur vary, ex. date du jour pour les données filtrées par date)
+- If-None-Match identique : 304 immédiat, sans requête SQL ni sérialisation
+- Corps JSON conservé en mémoire par URL tant que les versions ne changent pas
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Iterable, Optional, Union
+
+from flask import Response, make_response, request
+
+from app.services.table_versions import table_versions
+
+# Nombre maximal de corps de réponse conservés (les plus anciens sont évincés)
+MAX_CACHED_RESPONSES = 256
+
+# Réponse réutilisable mais à revalider à chaque chargement (requête conditionnelle)
+DEFAULT_CACHE_CONTROL = 'no-cache'
+
+
+class ResponseCache:
+    """Corps de réponses sérialisés, indexés par URL et versions des tables"""
+
+    def __init__(self, max_entries: int = MAX_CACHED_RESPONSES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, etag: str) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, etag: str, body: bytes, mimetype: str) -> None:
+        with self._lock:
+            self._entries[key] = (etag, body, mimetype)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+
+def compute_etag(tables, key: str) -> str:
+    """ETag fort : époque du serveur, versions des tables et URL (query string incluse)"""
+    versions = table_versions.get_many(tables)
+    raw = f"{table_versions.epoch}|{key}|{','.join(map(str, versions))}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+
+
+def _resolve_tables(tables) -> list:
+    """Tables d'une requête : noms fixes, ou fonctions appelées à chaque requête (liste de noms)"""
+    resolved = []
+    for table in tables:
+        if callable(table):
+            resolved.extend(table())
+        else:
+            resolved.append(table)
+    return resolved
+
+
+def cached_response(*tables: Union[str, Callable[[], Iterable[str]]],
+                    cache_control: str = DEFAULT_CACHE_CONTROL,
+                    vary: Optional[Callable[[], str]] = None):
+    """
+    Décorateur de route GET servie depuis le cache tant que les tables lues sont inchangées
+
+    Args:
+        tables (str | callable): Tables dont dépend la réponse (y compris tables imbriquées) ;
+            une fonction sans argument retourne les tables lues par la requête en cours
+        cache_control (str): En-tête Cache-Control envoyé au navigateur
+        vary (callable): Valeur ajoutée à la clé et à l'ETag, hors versions des tables
+            (ex. date du jour quand la réponse filtre sur date.today())
+
+    Usage:
+        @module_9_bp.route('/api/villes/', methods=['GET'])
+        @cached_response('villes')
+        def list_villes(): ...
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            key = f'{request.endpoint}|{request.full_path}'
+            if vary is not None:
+                key = f'{key}|{vary()}'
+            etag = compute_etag(_resolve_tables(tables), key)
+
+            if etag in request.if_none_match:
+                response = Response(status=304)
+            else:
+                entry = response_cache.get(key, etag)
+                if entry is not None:
+                    response = Response(entry[1], mimetype=entry[2])
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    response_cache.put(key, etag, response.get_data(), response.mimetype)
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
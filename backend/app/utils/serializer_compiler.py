@@ -0,0 +1,158 @@
+"""
+Sérialiseurs compilés à partir des schémas Marshmallow
+Fonctions objet -> dict générées une fois par schéma (listes de milliers de lignes)
+
+- Champs simples (Integer, Float, String, Decimal, Date, DateTime) convertis en ligne
+- Champs Nested compilés récursivement, autres champs délégués à Marshmallow
+- Objets ORM ou lignes Row d'une requête sur colonnes (accès par attribut)
+- schema.dump reste le repli : hooks pre_dump/post_dump, attribut absent
+"""
+
+import keyword
+from typing import Any, Callable, Optional
+from weakref import WeakKeyDictionary
+
+from marshmallow import Schema, fields, missing
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import ColumnProperty
+
+from app import db
+
+# Sérialiseurs compilés par instance de schéma (les schémas sont des globales de module)
+_compiled: 'WeakKeyDictionary[Schema, Callable[[Any], dict]]' = WeakKeyDictionary()
+
+
+def serialize(schema: Schema, obj: Any, many: Optional[bool] = None) -> Any:
+    """Équivalent rapide de schema.dump(obj) (many déduit du schéma si absent)"""
+    if many is None:
+        many = schema.many
+    serializer = get_serializer(schema)
+    if many:
+        return [serializer(item) for item in obj]
+    return serializer(obj)
+
+
+def get_serializer(schema: Schema) -> Callable[[Any], dict]:
+    """Sérialiseur compilé d'un schéma (mis en cache), ou repli sur schema.dump"""
+    serializer = _compiled.get(schema)
+    if serializer is None:
+        serializer = _compile(schema)
+        _compiled[schema] = serializer
+    return serializer
+
+
+def row_query(model, schema: Schema):
+    """
+    Requête sur les seules colonnes du schéma (lignes Row, sans identity map)
+
+    Returns:
+        Query | None: None si le schéma a des champs imbriqués ou calculés
+    """
+    mapper = sa_inspect(model)
+    columns = []
+    for name, field in schema.dump_fields.items():
+        attribute = field.attribute or name
+        prop = mapper.attrs.get(attribute)
+        if not isinstance(prop, ColumnProperty):
+            return None
+        columns.append(getattr(model, attribute))
+    return db.session.query(*columns)
+
+
+# ============================================================================
+# COMPILATION
+# ============================================================================
+
+def _format_temporal(field):
+    if (field.format or field.DEFAULT_FORMAT) != 'iso':
+        return None
+    return '{v}.isoformat()'
+
+
+def _format_number(cast):
+    def formatter(field):
+        if field.as_string:
+            return None
+        return cast + '({v})'
+    return formatter
+
+
+def _format_decimal(field):
+    if field.as_string:
+        return '_str({fmt}({v}))'
+    return '{fmt}({v})'
+
+
+# Expression de conversion d'une valeur non nulle, par type exact de champ
+_FORMATTERS = {
+    fields.Integer: _format_number('_int'),
+    fields.Float: _format_number('_float'),
+    fields.String: lambda field: '_str({v})',
+    fields.Decimal: _format_decimal,
+    fields.DateTime: _format_temporal,
+    fields.Date: _format_temporal,
+}
+
+
+def _has_dump_hooks(schema: Schema) -> bool:
+    hooks = getattr(schema, '_hooks', {})
+    return any(hooks.get(tag) for tag in ('pre_dump', 'post_dump'))
+
+
+def _compile(schema: Schema) -> Callable[[Any], dict]:
+    """Générer le code Python du sérialiseur d'un schéma"""
+    if _has_dump_hooks(schema):
+        return lambda obj: schema.dump(obj, many=False)
+
+    namespace = {
+        '_int': int, '_float': float, '_str': str, '_missing': missing,
+        '_get_attribute': schema.get_attribute,
+    }
+    lines = ['def _serialize(obj):', '    d = {}']
+    for index, (name, field) in enumerate(schema.dump_fields.items()):
+        key = field.data_key if field.data_key is not None else name
+        attribute = field.attribute or name
+        expression = _value_expression(field, index, namespace)
+        if expression is not None and '.' not in attribute:
+            getter = (
+                f'obj.{attribute}' if attribute.isidentifier() and not keyword.iskeyword(attribute)
+                else f'getattr(obj, {attribute!r})'
+            )
+            lines.append(f'    v = {getter}')
+            lines.append(f'    d[{key!r}] = None if v is None else {expression.format(v="v", fmt=f"_fmt{index}")}')
+        else:
+            # Champ délégué à Marshmallow (Method, Function, List, Pluck, attribut pointé...)
+            namespace[f'_field{index}'] = field
+            lines.append(f'    v = _field{index}.serialize({name!r}, obj, accessor=_get_attribute)')
+            lines.append(f'    if v is not _missing:')
+            lines.append(f'        d[{key!r}] = v')
+    lines.append('    return d')
+
+    exec(compile('\n'.join(lines), f'<serializer {type(schema).__name__}>', 'exec'), namespace)
+    compiled = namespace['_serialize']
+
+    def serializer(obj):
+        try:
+            return compiled(obj)
+        except AttributeError:
+            # Attribut absent de l'objet : sémantique Marshmallow (clé omise, dump_default)
+            return schema.dump(obj, many=False)
+    return serializer
+
+
+def _value_expression(field, index: int, namespace: dict) -> Optional[str]:
+    """Expression de conversion d'une valeur non nulle, None si non compilable"""
+    if isinstance(field, fields.Nested) and not isinstance(field, fields.Pluck):
+        nested = get_serializer(field.schema)
+        namespace[f'_nested{index}'] = nested
+        if field.many:
+            return f'[_nested{index}(item) for item in {{v}}]'
+        return f'_nested{index}({{v}})'
+
+    formatter = _FORMATTERS.get(type(field))
+    if formatter is None:
+        return None
+    expression = formatter(field)
+    if expression and '{fmt}' in expression:
+        namespace[f'_fmt{index}'] = field._format_num
+    return expression
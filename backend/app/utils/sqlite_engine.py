@@ -0,0 +1,151 @@
+"""
+Fabrique unique des connexions SQLite (application, services, scripts)
+Chemin absolu de data/atarys_data.db, réglages PRAGMA appliqués à chaque connexion
+
+Réglages (app.config, valeurs par défaut ci-dessous) :
+- SQLITE_CACHE_SIZE_KIB, SQLITE_MMAP_SIZE, SQLITE_BUSY_TIMEOUT_MS : PRAGMA
+- DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT : pool de connexions SQLAlchemy
+- DB_READ_POOL_ENABLED, DB_READ_POOL_SIZE, DB_READ_MAX_OVERFLOW : pool en lecture seule
+
+Mode WAL : les lectures ne bloquent plus l'écriture (et inversement) ; un seul
+écrivain à la fois, les autres attendent jusqu'à busy_timeout au lieu d'échouer
+immédiatement avec "database is locked".
+
+Requêtes GET : la session (ReadRoutingSession) lit sur un second moteur ouvert
+en lecture seule (mode=ro, query_only) ; chaque requête lit un instantané
+cohérent (BEGIN DEFERRED) sans jamais prendre le verrou d'écriture.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+import sqlalchemy as sa
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# backend/app/utils/sqlite_engine.py -> <racine du projet>/data/atarys_data.db
+DB_PATH = Path(os.environ.get(
+    'ATARYS_DB_PATH', Path(__file__).resolve().parents[3] / 'data' / 'atarys_data.db'
+))
+
+DEFAULT_CACHE_SIZE_KIB = 64 * 1024
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_MAX_OVERFLOW = 8
+DEFAULT_POOL_TIMEOUT = 30
+
+DEFAULT_READ_POOL_SIZE = 8
+DEFAULT_READ_MAX_OVERFLOW = 8
+
+# Méthodes HTTP servies par le pool en lecture seule
+READ_METHODS = ('GET', 'HEAD')
+
+
+def database_uri(path: Optional[Path] = None, read_only: bool = False) -> str:
+    """URI SQLAlchemy absolue (indépendante du répertoire courant)"""
+    path = Path(path or DB_PATH).resolve()
+    if read_only:
+        return f'sqlite:///file:{path.as_posix()}?mode=ro&uri=true'
+    return f'sqlite:///{path}'
+
+
+def pragmas(config: Optional[Mapping[str, Any]] = None, read_only: bool = False) -> Dict[str, Any]:
+    """PRAGMA appliqués à l'ouverture de chaque connexion, dans l'ordre"""
+    config = config or {}
+    if read_only:
+        # Mode WAL enregistré dans le fichier par les connexions en écriture
+        return {**pragmas(config), 'journal_mode': None, 'query_only': 'ON'}
+    return {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        # Valeur négative : taille en KiB (et non en pages)
+        'cache_size': -int(config.get('SQLITE_CACHE_SIZE_KIB', DEFAULT_CACHE_SIZE_KIB)),
+        'mmap_size': int(config.get('SQLITE_MMAP_SIZE', DEFAULT_MMAP_SIZE)),
+        'temp_store': 'MEMORY',
+        'busy_timeout': int(config.get('SQLITE_BUSY_TIMEOUT_MS', DEFAULT_BUSY_TIMEOUT_MS)),
+    }
+
+
+def apply_pragmas(dbapi_connection, config: Optional[Mapping[str, Any]] = None,
+                  read_only: bool = False) -> None:
+    """Appliquer les PRAGMA à une connexion sqlite3 (hors transaction)"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas(config, read_only).items():
+            if value is not None:
+                cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+def engine_options(config: Optional[Mapping[str, Any]] = None, read_only: bool = False) -> Dict[str, Any]:
+    """Options de create_engine (SQLALCHEMY_ENGINE_OPTIONS) : taille du pool, délai d'attente"""
+    config = config or {}
+    busy_timeout_ms = int(config.get('SQLITE_BUSY_TIMEOUT_MS', DEFAULT_BUSY_TIMEOUT_MS))
+    if read_only:
+        pool_size = int(config.get('DB_READ_POOL_SIZE', DEFAULT_READ_POOL_SIZE))
+        max_overflow = int(config.get('DB_READ_MAX_OVERFLOW', DEFAULT_READ_MAX_OVERFLOW))
+    else:
+        pool_size = int(config.get('DB_POOL_SIZE', DEFAULT_POOL_SIZE))
+        max_overflow = int(config.get('DB_MAX_OVERFLOW', DEFAULT_MAX_OVERFLOW))
+    return {
+        'poolclass': sa.pool.QueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': int(config.get('DB_POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT)),
+        # Connexions partagées entre threads par le pool (jamais utilisées simultanément)
+        'connect_args': {'timeout': busy_timeout_ms / 1000, 'check_same_thread': False},
+    }
+
+
+def install_pragmas(engine, config: Optional[Mapping[str, Any]] = None, read_only: bool = False):
+    """Appliquer les PRAGMA à chaque nouvelle connexion du pool d'un moteur"""
+    settings = dict(config or {})
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, settings, read_only)
+        if read_only:
+            # Transactions gérées par SQLAlchemy (sqlite3 n'ouvre pas de transaction pour un SELECT)
+            dbapi_connection.isolation_level = None
+
+    if read_only:
+        @event.listens_for(engine, 'begin')
+        def _on_begin(connection):
+            # Instantané pris à la première lecture, jamais de verrou d'écriture
+            connection.exec_driver_sql('BEGIN DEFERRED')
+
+    return engine
+
+
+def create_engine(path: Optional[Path] = None, config: Optional[Mapping[str, Any]] = None,
+                  read_only: bool = False, **options):
+    """Moteur SQLAlchemy réglé (pool en lecture seule de l'application, scripts)"""
+    engine = sa.create_engine(database_uri(path, read_only),
+                              **{**engine_options(config, read_only), **options})
+    return install_pragmas(engine, config, read_only)
+
+
+def connect(path: Optional[Path] = None, config: Optional[Mapping[str, Any]] = None) -> sqlite3.Connection:
+    """Connexion sqlite3 réglée (scripts utilisant l'API DB-API directement)"""
+    busy_timeout_ms = int((config or {}).get('SQLITE_BUSY_TIMEOUT_MS', DEFAULT_BUSY_TIMEOUT_MS))
+    connection = sqlite3.connect(Path(path or DB_PATH), timeout=busy_timeout_ms / 1000)
+    apply_pragmas(connection, config)
+    return connection
+
+
+class ReadRoutingSession(Session):
+    """Session Flask-SQLAlchemy : lectures des requêtes GET sur le moteur en lecture seule"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not self.info.get('writing')
+                and has_request_context() and request.method in READ_METHODS):
+            engine = current_app.extensions.get('read_engine')
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,68 @@
+"""
+Lecteurs incrémentaux pour les imports en flux (NDJSON / CSV)
+Lisent le corps de la requête ligne par ligne sans le charger en mémoire
+"""
+
+import csv
+import io
+import json
+from typing import Any, Dict, IO, Iterator, Optional, Tuple
+
+# (index de la ligne de données, ligne lue, message d'erreur de lecture)
+Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+CSV_DELIMITERS = ';,\t|'
+
+
+def open_text_stream(raw_stream: IO[bytes], encoding: str = 'utf-8') -> io.TextIOWrapper:
+    """Envelopper un flux binaire (request.stream) en flux texte bufferisé"""
+    if not isinstance(raw_stream, io.BufferedIOBase):
+        raw_stream = io.BufferedReader(raw_stream)
+    # utf-8-sig : ignore le BOM ajouté par Excel
+    if encoding.lower().replace('_', '-') in ('utf-8', 'utf8'):
+        encoding = 'utf-8-sig'
+    return io.TextIOWrapper(raw_stream, encoding=encoding, errors='replace', newline='')
+
+
+def iter_ndjson_records(text_stream: IO[str]) -> Iterator[Record]:
+    """Lire un flux NDJSON : un objet JSON par ligne, lignes vides ignorées"""
+    index = 0
+    for line in text_stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield index, None, f'JSON invalide : {e}'
+        else:
+            if isinstance(record, dict):
+                yield index, record, None
+            else:
+                yield index, None, 'Objet JSON attendu'
+        index += 1
+
+
+def iter_csv_records(text_stream: IO[str], delimiter: Optional[str] = None) -> Iterator[Record]:
+    """
+    Lire un flux CSV avec ligne d'en-tête
+
+    Le séparateur est détecté sur l'en-tête s'il n'est pas fourni
+    (exports Excel français : point-virgule).
+    """
+    header_line = text_stream.readline()
+    if not header_line:
+        return
+    if not delimiter:
+        delimiter = max(CSV_DELIMITERS, key=header_line.count)
+
+    header = next(csv.reader([header_line], delimiter=delimiter))
+    header = [name.strip() for name in header]
+
+    for index, values in enumerate(csv.reader(text_stream, delimiter=delimiter)):
+        if not values:
+            continue
+        if len(values) > len(header):
+            yield index, None, f'{len(values)} valeurs pour {len(header)} colonnes'
+            continue
+        yield index, dict(zip(header, values)), None
@@ -0,0 +1,124 @@
+"""
+Serveur WSGI de production : gunicorn pré-fork multi-workers
+Lancement : python wsgi.py --production (ou gunicorn -c python:app.utils.wsgi_server wsgi:application)
+
+Réglages (variables d'environnement, valeurs par défaut ci-dessous) :
+- ATARYS_BIND : adresse d'écoute
+- ATARYS_WORKERS, ATARYS_THREADS : processus workers, threads par worker (gthread)
+- ATARYS_TIMEOUT, ATARYS_GRACEFUL_TIMEOUT : délai d'une requête, délai d'arrêt propre
+- ATARYS_MAX_REQUESTS : requêtes avant recyclage d'un worker (0 : jamais)
+
+Application chargée une fois dans le maître (preload_app) : modèles, modules de
+routes et index mémoire partagés par copie à l'écriture. Avant le fork, le maître
+importe les modules de routes différés, ferme ses connexions SQLite, place les
+versions des tables en mémoire partagée et récupère les tâches interrompues ;
+chaque worker ouvre ensuite ses propres connexions (pools d'écriture et de
+lecture) et démarre son thread écrivain.
+
+Préchargement obligatoire : sans lui, versions des tables (ETag, index des
+communes) propres à chaque worker et aucune récupération des tâches. Le maître
+refuse de démarrer (on_starting) ; create_app refuse gunicorn lancé sans ce module
+de configuration (gunicorn wsgi:application).
+
+Rechargement sans coupure : kill -HUP <pid du maître> (nouveaux workers, les
+anciens terminent leurs requêtes). Nouveau code : kill -USR2 puis -TERM de l'ancien maître.
+SQLite en mode WAL : un écrivain à la fois entre tous les workers (busy_timeout),
+d'où peu de workers et plusieurs threads par worker.
+"""
+
+import os
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # gunicorn indisponible (Windows) : serveur de développement
+    BaseApplication = None
+
+# Réglages gunicorn (noms des paramètres de configuration gunicorn)
+bind = os.environ.get('ATARYS_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('ATARYS_WORKERS', min(os.cpu_count() or 1, 4)))
+threads = int(os.environ.get('ATARYS_THREADS', 4))
+worker_class = 'gthread'
+timeout = int(os.environ.get('ATARYS_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('ATARYS_GRACEFUL_TIMEOUT', 30))
+max_requests = int(os.environ.get('ATARYS_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+preload_app = True
+
+SETTINGS = ('bind', 'workers', 'threads', 'worker_class', 'timeout', 'graceful_timeout',
+            'max_requests', 'max_requests_jitter', 'preload_app')
+
+
+def _dispose_engines(app, close: bool = True) -> None:
+    """Libérer les pools SQLAlchemy (close=False dans un fils : connexions du parent abandonnées)"""
+    from app import db
+    with app.app_context():
+        db.engine.dispose(close=close)
+    read_engine = app.extensions.get('read_engine')
+    if read_engine is not None:
+        read_engine.dispose(close=close)
+
+
+def on_starting(server) -> None:
+    """Maître, au démarrage : état partagé préparé avant le fork, donc préchargement requis"""
+    if not server.cfg.preload_app:
+        raise RuntimeError("preload_app requis (versions des tables et récupération des tâches "
+                           "faites par le maître avant le fork)")
+
+
+def when_ready(server) -> None:
+    """Maître, application préchargée, avant le fork des workers"""
+    from app.services.job_runner import job_runner
+    from app.services.module_registry import module_registry
+    from app.services.table_versions import table_versions
+    app = server.app.wsgi()
+    # Modules de routes importés une fois, partagés par les workers
+    module_registry.load_all()
+    table_versions.share()
+    job_runner.recover_interrupted_jobs()
+    # Aucune connexion SQLite héritée par les workers
+    _dispose_engines(app)
+
+
+def post_fork(server, worker) -> None:
+    """Worker : état propre au processus (connexions, thread écrivain, pool de tâches)"""
+    from app.services.job_runner import job_runner
+    from app.services.write_queue import write_queue
+    _dispose_engines(server.app.wsgi(), close=False)
+    write_queue.after_fork()
+    job_runner.after_fork()
+
+
+if BaseApplication is not None:
+    class ProductionServer(BaseApplication):
+        """Application gunicorn servant une application Flask déjà créée"""
+
+        def __init__(self, application, options=None):
+            self.application = application
+            self.options = options or {}
+            super().__init__()
+
+        def load_config(self):
+            settings = {name: globals()[name] for name in SETTINGS}
+            settings.update(on_starting=on_starting, when_ready=when_ready, post_fork=post_fork)
+            settings.update(self.options)
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+
+def run(application, **options) -> None:
+    """
+    Servir l'application avec gunicorn (serveur de développement si indisponible)
+
+    Args:
+        application (Flask): Application créée par create_app
+        **options: Réglages gunicorn remplaçant ceux de ce module (ex. workers=2)
+    """
+    if BaseApplication is None:
+        print("[ATARYS] gunicorn non installé : serveur de développement (un seul processus)")
+        host, _, port = bind.rpartition(':')
+        application.run(host=host, port=int(port), debug=False)
+        return
+    ProductionServer(application, options).run()
@@ -90,9 +90,20 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # Index virtuels (FTS5, R*Tree) créés par migration manuelle : ignorés par l'autogénération
+    def include_name(name, type_, parent_names):
+        if type_ == 'table':
+            return name not in internal_tables
+        return True
+
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_name") is None:
+        conf_args["include_name"] = include_name
+
+    from app.services.schema_catalog import schema_catalog
+    internal_tables = set(schema_catalog.internal_table_names())
 
     connectable = get_engine()
 
@@ -106,6 +117,9 @@ def run_migrations_online():
         with context.begin_transaction():
             context.run_migrations()
 
+    # Le schéma a pu changer : vider le catalogue en mémoire de l'application
+    schema_catalog.invalidate()
+
 
 if context.is_offline_mode():
     run_migrations_offline()
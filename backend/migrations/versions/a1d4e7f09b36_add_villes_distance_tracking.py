@@ -0,0 +1,28 @@
+"""Module 9 - Coordonnées du dernier calcul des distances au dépôt
+
+Revision ID: a1d4e7f09b36
+Revises: f3a8d26b4c91
+Create Date: 2025-08-08 09:12:33.640158
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1d4e7f09b36'
+down_revision = 'f3a8d26b4c91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('villes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latitude_calcul', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitude_calcul', sa.Float(), nullable=True))
+
+
+def downgrade():
+    # ALTER TABLE DROP COLUMN natif (SQLite >= 3.35) : table non recréée, triggers conservés
+    op.drop_column('villes', 'longitude_calcul')
+    op.drop_column('villes', 'latitude_calcul')
@@ -0,0 +1,68 @@
+"""Module 12 - Métadonnées des tables (date de création, nombre de lignes)
+
+Revision ID: c41f7a2d9e63
+Revises: 8b1ef94d7631
+Create Date: 2025-08-04 10:12:41.308214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f7a2d9e63'
+down_revision = '8b1ef94d7631'
+branch_labels = None
+depends_on = None
+
+UNTRACKED_TABLES = ('alembic_version', 'table_metadata')
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(name):
+    return "'" + name.replace("'", "''") + "'"
+
+
+def upgrade():
+    op.create_table('table_metadata',
+    sa.Column('table_name', sa.String(length=100), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('table_name')
+    )
+
+    # Enregistrement des tables existantes : comptage initial + triggers
+    inspector = sa.inspect(op.get_bind())
+    for table_name in inspector.get_table_names():
+        if table_name.startswith('sqlite_') or table_name in UNTRACKED_TABLES:
+            continue
+        columns = [col['name'] for col in inspector.get_columns(table_name)]
+        created_at = 'MIN(created_at)' if 'created_at' in columns else 'NULL'
+        op.execute(
+            f"INSERT INTO table_metadata (table_name, row_count, created_at, updated_at) "
+            f"SELECT {_literal(table_name)}, COUNT(*), COALESCE({created_at}, CURRENT_TIMESTAMP), "
+            f"CURRENT_TIMESTAMP FROM {_quote(table_name)}"
+        )
+        for event, delta in (('INSERT', '+ 1'), ('DELETE', '- 1')):
+            op.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {_quote(f'trg_{table_name}_row_count_{event.lower()}')} "
+                f"AFTER {event} ON {_quote(table_name)} "
+                f"BEGIN UPDATE table_metadata SET row_count = row_count {delta} "
+                f"WHERE table_name = {_literal(table_name)}; END"
+            )
+
+
+def downgrade():
+    bind = op.get_bind()
+    triggers = bind.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg\\_%\\_row\\_count\\_%' ESCAPE '\\'"
+    ).fetchall()
+    for (trigger_name,) in triggers:
+        op.execute(f"DROP TRIGGER IF EXISTS {_quote(trigger_name)}")
+    op.drop_table('table_metadata')
@@ -0,0 +1,55 @@
+"""Module 9 - Index plein texte des communes (FTS5)
+
+Revision ID: e5c9a14f7b28
+Revises: d7a3b90e5c12
+Create Date: 2025-08-06 14:22:05.184302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c9a14f7b28'
+down_revision = 'd7a3b90e5c12'
+branch_labels = None
+depends_on = None
+
+# Codes postaux et INSEE indexés sur 5 chiffres (01000 et non 1000)
+FTS_VALUES = (
+    "{p}id, {p}communes, printf('%05d', {p}code_postal), "
+    "CASE WHEN {p}code_insee IS NULL THEN NULL ELSE printf('%05d', {p}code_insee) END"
+)
+
+
+def upgrade():
+    op.execute(
+        "CREATE VIRTUAL TABLE villes_fts USING fts5("
+        "communes, code_postal, code_insee, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3')"
+    )
+    op.execute(
+        "INSERT INTO villes_fts (rowid, communes, code_postal, code_insee) "
+        f"SELECT {FTS_VALUES.format(p='')} FROM villes"
+    )
+    op.execute(
+        "CREATE TRIGGER trg_villes_fts_insert AFTER INSERT ON villes BEGIN "
+        "INSERT INTO villes_fts (rowid, communes, code_postal, code_insee) "
+        f"VALUES ({FTS_VALUES.format(p='new.')}); END"
+    )
+    op.execute(
+        "CREATE TRIGGER trg_villes_fts_delete AFTER DELETE ON villes BEGIN "
+        "DELETE FROM villes_fts WHERE rowid = old.id; END"
+    )
+    op.execute(
+        "CREATE TRIGGER trg_villes_fts_update AFTER UPDATE OF id, communes, code_postal, code_insee ON villes BEGIN "
+        "DELETE FROM villes_fts WHERE rowid = old.id; "
+        "INSERT INTO villes_fts (rowid, communes, code_postal, code_insee) "
+        f"VALUES ({FTS_VALUES.format(p='new.')}); END"
+    )
+
+
+def downgrade():
+    for trigger in ('insert', 'delete', 'update'):
+        op.execute(f"DROP TRIGGER IF EXISTS trg_villes_fts_{trigger}")
+    op.execute("DROP TABLE IF EXISTS villes_fts")
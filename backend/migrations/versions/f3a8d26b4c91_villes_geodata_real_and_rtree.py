@@ -0,0 +1,85 @@
+"""Module 9 - Coordonnées des villes en REAL et index spatial R*Tree
+
+Revision ID: f3a8d26b4c91
+Revises: e5c9a14f7b28
+Create Date: 2025-08-07 10:05:48.926417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8d26b4c91'
+down_revision = 'e5c9a14f7b28'
+branch_labels = None
+depends_on = None
+
+GEO_COLUMNS = ('latitude', 'longitude', 'distance_km_oiseau', 'distance_km_routes', 'temps_route_min')
+
+RTREE_VALUES = "{p}id, {p}latitude, {p}latitude, {p}longitude, {p}longitude"
+RTREE_HAS_POINT = "{p}latitude IS NOT NULL AND {p}longitude IS NOT NULL"
+
+
+def _villes_triggers():
+    """Triggers de villes (FTS, row_count) : supprimés par la recréation de la table en mode batch"""
+    return op.get_bind().exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'villes' "
+        "AND name NOT LIKE 'trg\\_villes\\_rtree\\_%' ESCAPE '\\'"
+    ).scalars().all()
+
+
+def upgrade():
+    triggers = _villes_triggers()
+
+    # Virgule décimale française : '48,11' -> '48.11' (converti en REAL par la copie batch)
+    for column in GEO_COLUMNS:
+        op.execute(f"UPDATE villes SET {column} = NULLIF(TRIM(REPLACE({column}, ',', '.')), '')")
+
+    with op.batch_alter_table('villes', schema=None) as batch_op:
+        for column in GEO_COLUMNS:
+            batch_op.alter_column(column,
+                   existing_type=sa.String(length=20),
+                   type_=sa.Float(),
+                   existing_nullable=True)
+
+    for sql in triggers:
+        op.execute(sql)
+
+    # Index spatial : un point par commune (boîte réduite à un point)
+    op.execute("CREATE VIRTUAL TABLE villes_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)")
+    op.execute(
+        f"INSERT INTO villes_rtree SELECT {RTREE_VALUES.format(p='')} FROM villes "
+        f"WHERE {RTREE_HAS_POINT.format(p='')}"
+    )
+    op.execute(
+        "CREATE TRIGGER trg_villes_rtree_insert AFTER INSERT ON villes "
+        f"WHEN {RTREE_HAS_POINT.format(p='new.')} BEGIN "
+        f"INSERT INTO villes_rtree VALUES ({RTREE_VALUES.format(p='new.')}); END"
+    )
+    op.execute(
+        "CREATE TRIGGER trg_villes_rtree_delete AFTER DELETE ON villes BEGIN "
+        "DELETE FROM villes_rtree WHERE id = old.id; END"
+    )
+    op.execute(
+        "CREATE TRIGGER trg_villes_rtree_update AFTER UPDATE OF id, latitude, longitude ON villes BEGIN "
+        "DELETE FROM villes_rtree WHERE id = old.id; "
+        f"INSERT INTO villes_rtree SELECT {RTREE_VALUES.format(p='new.')} "
+        f"WHERE {RTREE_HAS_POINT.format(p='new.')}; END"
+    )
+
+
+def downgrade():
+    for trigger in ('insert', 'delete', 'update'):
+        op.execute(f"DROP TRIGGER IF EXISTS trg_villes_rtree_{trigger}")
+    op.execute("DROP TABLE IF EXISTS villes_rtree")
+
+    triggers = _villes_triggers()
+    with op.batch_alter_table('villes', schema=None) as batch_op:
+        for column in GEO_COLUMNS:
+            batch_op.alter_column(column,
+                   existing_type=sa.Float(),
+                   type_=sa.String(length=20),
+                   existing_nullable=True)
+    for sql in triggers:
+        op.execute(sql)
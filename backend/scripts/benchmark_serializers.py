@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - BENCHMARK DES SÉRIALISEURS
+Compare schema.dump(many=True) + json standard aux sérialiseurs compilés + orjson
+
+Jeu de données : 10 000 objets en mémoire (aucune écriture en base)
+- VilleSchema sur des instances Ville et sur des lignes Row équivalentes
+- SalariesSchema avec ville et familles d'ouvrages imbriquées
+
+Usage (depuis backend/) :
+    python scripts/benchmark_serializers.py [nombre_de_lignes]
+
+Auteur: ATARYS Team
+Date: 2025
+"""
+
+import json
+import sys
+import time
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from app.models.module_5 import FamilleOuvrages
+from app.models.module_9 import Salaries, Ville
+from app.schemas.module_9 import SalariesSchema, VilleSchema
+from app.utils.serializer_compiler import serialize
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+REPEAT = 3
+
+
+def best_of(func):
+    """Meilleur temps sur REPEAT exécutions (secondes)"""
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def make_villes(count):
+    now = datetime(2025, 1, 1, 12, 0)
+    return [
+        Ville(id=i, created_at=now, updated_at=now, communes=f'Commune {i}', code_postal=29000 + i % 1000,
+              code_insee=29000 + i, departement=29, latitude=48.39, longitude=-4.48, zone_nv=1,
+              distance_km_oiseau=12.5, distance_km_routes=15.2, temps_route_min=18.0)
+        for i in range(count)
+    ]
+
+
+def make_salaries(count, villes):
+    familles = [FamilleOuvrages(id=i, num_bd_atarys=f'F{i}', libelle=f'Famille {i}') for i in range(8)]
+    now = datetime(2025, 1, 1, 12, 0)
+    return [
+        Salaries(id=i, created_at=now, updated_at=now, nom=f'Nom {i}', prenom=f'Prénom {i}',
+                 salaire_brut_horaire=Decimal('14.25'), nbre_heure_hebdo=Decimal('35'), type_contrat='CDI',
+                 date_entree=date(2020, 1, 1), ville_id=villes[i % len(villes)].id,
+                 ville=villes[i % len(villes)], famille_ouvrages=familles[i % 3:i % 3 + 3])
+        for i in range(count)
+    ]
+
+
+def report(label, schema, objects):
+    assert schema.dump(objects) == serialize(schema, objects), f'{label} : sorties différentes'
+
+    dump_time = best_of(lambda: schema.dump(objects))
+    compiled_time = best_of(lambda: serialize(schema, objects))
+    data = serialize(schema, objects)
+    json_time = best_of(lambda: json.dumps(data, default=str, sort_keys=True, separators=(',', ':')))
+    print(f"\n{label} ({len(objects)} lignes)")
+    print(f"  schema.dump           : {dump_time * 1000:8.1f} ms")
+    print(f"  sérialiseur compilé   : {compiled_time * 1000:8.1f} ms  (x{dump_time / compiled_time:.1f})")
+    print(f"  json.dumps            : {json_time * 1000:8.1f} ms")
+    if orjson is not None:
+        orjson_time = best_of(lambda: orjson.dumps(data, default=str, option=orjson.OPT_SORT_KEYS))
+        print(f"  orjson.dumps          : {orjson_time * 1000:8.1f} ms  (x{json_time / orjson_time:.1f})")
+        total_before, total_after = dump_time + json_time, compiled_time + orjson_time
+        print(f"  total dump + JSON     : {total_before * 1000:8.1f} ms -> {total_after * 1000:.1f} ms "
+              f"(x{total_before / total_after:.1f})")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    app = create_app()
+
+    with app.app_context():
+        villes = make_villes(count)
+        report('VilleSchema / instances ORM', VilleSchema(many=True), villes)
+
+        # Lignes d'un SELECT sur colonnes (row_query) : tuples nommés, sans identity map
+        schema = VilleSchema(many=True)
+        VilleRow = namedtuple('VilleRow', list(schema.dump_fields))
+        rows = [VilleRow(*(getattr(ville, name) for name in VilleRow._fields)) for ville in villes]
+        report('VilleSchema / lignes Row', schema, rows)
+
+        salaries = make_salaries(count, villes[:300])
+        report('SalariesSchema / ville + famille_ouvrages imbriquées', SalariesSchema(many=True), salaries)
+        db.session.rollback()
+
+
+if __name__ == '__main__':
+    main()
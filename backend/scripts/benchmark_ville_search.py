@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - BENCHMARK DE LA RECHERCHE DE COMMUNES
+Latence de /api/villes/search : index mémoire et index FTS5 villes_fts comparés
+au LIKE historique
+
+Jeu de données : communes synthétiques ajoutées jusqu'à ~35 000 lignes, puis
+supprimées en fin de script (ids au-delà du maximum existant).
+Saisies simulées : préfixes successifs de noms, abréviations, codes postaux.
+
+Prérequis : migration e5c9a14f7b28 appliquée (flask db upgrade)
+
+Usage (depuis backend/) :
+    python scripts/benchmark_ville_search.py [nombre_de_communes]
+
+Auteur: ATARYS Team
+Date: 2025
+"""
+
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import delete, insert
+
+from app import create_app, db
+from app.models.module_9 import Ville
+from app.schemas.module_9 import VilleSchema
+from app.services.ville_index import ville_index
+from app.services.ville_search import ville_search
+from app.utils.serializer_compiler import row_query
+
+PREFIXES = ['', '', '', 'Saint-', 'Sainte-', 'Le ', 'La ', 'Les ', 'Mont-', 'Notre-Dame-de-']
+ROOTS = ['Brieuc', 'Malo', 'Étienne', 'Aubin', 'Méen', 'Château', 'Pléneuf', 'Guérande', 'Fougères',
+         'Vitré', 'Loudéac', 'Hédé', 'Bécherel', 'Combourg', 'Dinard', 'Paimpont', 'Quimper', 'Lamballe']
+SUFFIXES = ['', '', '-sur-Mer', '-en-Coglès', '-le-Vieux', '-des-Bois', "-d'Ille", '-sur-Rance', '-la-Forêt']
+
+
+def make_rows(count, start_id):
+    rng = random.Random(42)
+    rows = []
+    for i in range(count):
+        name = f"{rng.choice(PREFIXES)}{rng.choice(ROOTS)}{rng.choice(SUFFIXES)}"
+        if i % 3:
+            name += f"-{rng.choice(ROOTS)}"
+        code_postal = rng.randint(1000, 97699)
+        rows.append({'id': start_id + i, 'communes': name, 'code_postal': code_postal,
+                     'code_insee': code_postal + rng.randint(0, 99), 'departement': code_postal // 1000})
+    return rows
+
+
+def typed_queries(names, count):
+    """Saisies d'autocomplétion : préfixes croissants du nom, abréviations, codes"""
+    rng = random.Random(7)
+    queries = []
+    for name in rng.sample(names, min(count, len(names))):
+        for length in (2, 3, 5, 8):
+            queries.append(name[:length])
+        queries.append(name.replace('Saint-', 'st ').replace('Sainte-', 'ste ')[:10])
+    queries += [str(rng.randint(1, 97))[:2] for _ in range(count // 4)]
+    queries += [f"{rng.randint(10, 97)}{rng.randint(0, 9)}" for _ in range(count // 4)]
+    return queries
+
+
+def measure(search, queries):
+    timings = []
+    for value in queries:
+        start = time.perf_counter()
+        search(value)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'p50': statistics.median(timings),
+        'p95': timings[int(len(timings) * 0.95) - 1],
+        'p99': timings[int(len(timings) * 0.99) - 1],
+        'max': timings[-1],
+    }
+
+
+def report(label, stats):
+    print(f"  {label:<14}: p50 {stats['p50']:6.2f} ms | p95 {stats['p95']:6.2f} ms | "
+          f"p99 {stats['p99']:6.2f} ms | max {stats['max']:6.2f} ms")
+
+
+def main():
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else 35000
+    app = create_app()
+
+    with app.app_context():
+        if not ville_search.is_available():
+            print("❌ Index villes_fts absent : appliquer les migrations (flask db upgrade)")
+            return 1
+
+        existing = Ville.query.count()
+        max_id = db.session.query(db.func.max(Ville.id)).scalar() or 0
+        # Lignes validées : les lectures du catalogue du schéma passent par une autre connexion
+        if target > existing:
+            db.session.execute(insert(Ville.__table__), make_rows(target - existing, max_id + 1))
+            db.session.commit()
+        try:
+            names = [name for (name,) in db.session.query(Ville.communes)]
+            queries = typed_queries(names, 400)
+            schema = VilleSchema(many=True)
+            print(f"{len(names)} communes, {len(queries)} saisies")
+
+            print(f"  index mémoire construit en {measure(lambda _: ville_index.rebuild(), [None])['max']:.0f} ms")
+            report('Mémoire', measure(lambda value: ville_index.search(ville=value), queries))
+            report('FTS5', measure(
+                lambda value: ville_search.search(row_query(Ville, schema), ville=value), queries
+            ))
+            report('LIKE (repli)', measure(
+                lambda value: ville_search._search_like(row_query(Ville, schema), value, None, 20), queries
+            ))
+        finally:
+            db.session.rollback()
+            db.session.execute(delete(Ville.__table__).where(Ville.id > max_id))
+            db.session.commit()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
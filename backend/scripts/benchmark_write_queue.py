@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - BENCHMARK DE LA FILE D'ÉCRITURE
+Débit de petites écritures concurrentes (POST /api/modele_ardoises/) avec et
+sans le thread écrivain à commit groupé
+
+Lignes créées supprimées en fin de script (ids au-delà du maximum existant).
+
+Usage (depuis backend/) :
+    python scripts/benchmark_write_queue.py [threads] [écritures_par_thread]
+
+Auteur: ATARYS Team
+Date: 2025
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import delete
+
+from app import create_app, db
+from app.models.module_10 import ModeleArdoises
+from app.services.write_queue import write_queue
+
+
+def run(app, threads, writes):
+    errors = []
+
+    def client_thread(index):
+        client = app.test_client()
+        for i in range(writes):
+            response = client.post('/api/modele_ardoises/', json={'modele_ardoises': f'bench-{index}-{i}'})
+            if response.status_code != 200:
+                errors.append(response.get_json().get('message'))
+
+    workers = [threading.Thread(target=client_thread, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start, errors
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    app = create_app()
+
+    with app.app_context():
+        max_id = db.session.query(db.func.max(ModeleArdoises.id)).scalar() or 0
+    try:
+        for enabled in (False, True):
+            app.config['WRITE_QUEUE_ENABLED'] = enabled
+            commits = write_queue.stats['commits']
+            elapsed, errors = run(app, threads, writes)
+            total = threads * writes
+            label = 'file d\'écriture' if enabled else 'commit par requête'
+            print(f"  {label:<20}: {total / elapsed:7.0f} écritures/s | {len(errors)} erreurs"
+                  + (f" | {write_queue.stats['commits'] - commits} commits" if enabled else ''))
+            if errors:
+                print(f"    ex. : {errors[0]}")
+    finally:
+        with app.app_context():
+            db.session.execute(delete(ModeleArdoises.__table__).where(ModeleArdoises.id > max_id))
+            db.session.commit()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
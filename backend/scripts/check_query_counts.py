@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - CONTRÔLE DU NOMBRE DE REQUÊTES DES ROUTES DE LISTE
+Vérifie que les listes à schémas imbriqués ne font pas de requêtes N+1
+
+Chaque route est appelée avec limit=1 puis avec une page complète :
+le nombre de requêtes SQL doit être identique (indépendant du nombre de lignes).
+
+Usage (depuis backend/) :
+    python scripts/check_query_counts.py
+
+Auteur: ATARYS Team
+Date: 2025
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import event
+
+from app import create_app, db
+
+# Routes de liste dont le schéma contient des champs Nested
+ROUTES = [
+    '/api/salaries/',
+    '/api/salaries/?actif=true',
+    '/api/clients/',
+]
+
+
+def count_queries(client, url):
+    """Nombre de requêtes SQL exécutées par un appel GET (et taille de la réponse)"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    payload = response.get_json()
+    if response.status_code != 200 or not payload.get('success'):
+        raise RuntimeError(f"{url} : {response.status_code} {payload.get('message')}")
+    return len(statements), len(payload['data'])
+
+
+def main():
+    app = create_app()
+    client = app.test_client()
+    failures = 0
+
+    with app.app_context():
+        for route in ROUTES:
+            separator = '&' if '?' in route else '?'
+            # Premier appel : chargement du catalogue et des plans (non compté)
+            client.get(route)
+            single, _ = count_queries(client, f'{route}{separator}limit=1')
+            full, rows = count_queries(client, f'{route}{separator}limit=1000')
+            status = '✅' if single == full else '❌'
+            if single != full:
+                failures += 1
+            print(f"{status} {route} : {single} requêtes (1 ligne), {full} requêtes ({rows} lignes)")
+
+    if failures:
+        print(f"❌ {failures} route(s) avec un nombre de requêtes dépendant du nombre de lignes")
+        sys.exit(1)
+    print("✅ Nombre de requêtes constant sur toutes les routes contrôlées")
+
+
+if __name__ == '__main__':
+    main()
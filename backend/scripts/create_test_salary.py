@@ -8,15 +8,19 @@ Auteur: ATARYS Team
 Date: 2025
 """
 
-import sqlite3
+import sys
 from pathlib import Path
 from datetime import date
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.sqlite_engine import DB_PATH, connect
+
 def create_test_salary():
     """Créer un salarié de test avec chemin OneDrive"""
     
     # Chemin vers la base de données
-    db_path = Path(__file__).parent.parent.parent / 'data' / 'atarys_data.db'
+    db_path = DB_PATH
     
     if not db_path.exists():
         print(f"❌ Base de données non trouvée : {db_path}")
@@ -25,7 +29,7 @@ def create_test_salary():
     print(f"📁 Base de données trouvée : {db_path}")
     
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect(db_path)
         cursor = conn.cursor()
         
         # Vérifier si le salarié de test existe déjà
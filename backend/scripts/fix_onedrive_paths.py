@@ -8,15 +8,19 @@ Auteur: ATARYS Team
 Date: 2025
 """
 
-import sqlite3
+import sys
 import os
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.sqlite_engine import DB_PATH, connect
+
 def fix_onedrive_paths():
     """Corriger automatiquement les chemins OneDrive dans la base de données"""
     
     # Chemin vers la base de données
-    db_path = Path(__file__).parent.parent.parent / 'data' / 'atarys_data.db'
+    db_path = DB_PATH
     
     if not db_path.exists():
         print(f"❌ Base de données non trouvée : {db_path}")
@@ -25,7 +29,7 @@ def fix_onedrive_paths():
     print(f"📁 Base de données trouvée : {db_path}")
     
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect(db_path)
         cursor = conn.cursor()
         
         # Récupérer tous les salariés avec leurs chemins OneDrive
@@ -103,10 +107,10 @@ def analyze_and_correct_path(path):
 def test_paths_after_fix():
     """Tester les chemins après correction"""
     
-    db_path = Path(__file__).parent.parent.parent / 'data' / 'atarys_data.db'
+    db_path = DB_PATH
     
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect(db_path)
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ATARYS - GÉNÉRATION DU MANIFESTE DES MODULES
+Régénère app/modules_manifest.json (modèles et blueprints enregistrés au démarrage)
+
+À lancer après l'ajout, la suppression ou la modification manuelle d'un fichier
+de app/models/ ou app/routes/ ; l'application ne fait que lire le manifeste.
+
+Usage (depuis backend/) :
+    python scripts/generate_modules_manifest.py           # écrire le manifeste
+    python scripts/generate_modules_manifest.py --check   # code 1 s'il n'est pas à jour
+
+Auteur: ATARYS Team
+Date: 2025
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.module_registry import MANIFEST_PATH, module_registry
+
+
+def main():
+    if '--check' in sys.argv:
+        try:
+            current = json.loads(MANIFEST_PATH.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            current = None
+        if current != module_registry.scan():
+            print(f"❌ {MANIFEST_PATH} n'est pas à jour")
+            return 1
+        print(f"✅ {MANIFEST_PATH} à jour")
+        return 0
+
+    manifest = module_registry.write_manifest()
+    print(f"✅ {MANIFEST_PATH} : {len(manifest['models'])} fichiers de modèles, "
+          f"{len(manifest['blueprints'])} blueprints")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""
+Configuration pytest : application sur une base SQLite temporaire
+La base est choisie avant l'import de l'application (DB_PATH lu à l'import)
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp(prefix='atarys_tests_')
+os.environ['ATARYS_DB_PATH'] = str(Path(_DB_DIR) / 'atarys_test.db')
+
+from app import create_app, db  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    """Application de test (tables des modèles créées sur la base temporaire)"""
+    app = create_app('testing')
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def client(app):
+    """Client HTTP de test"""
+    return app.test_client()
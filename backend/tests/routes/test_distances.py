@@ -0,0 +1,37 @@
+"""Tests de la matrice des distances (cache des réponses et date du jour)"""
+
+from datetime import date
+
+from app import db
+
+
+class _FixedDate(date):
+    current = date(2025, 3, 10)
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+
+def test_matrix_follows_current_date(app, client, monkeypatch):
+    """Salarié sortant : présent le jour de sa sortie, absent le lendemain (ETag différent)"""
+    # Modèles importés après create_app (ordre du manifeste : module_10 avant module_9)
+    from app.models.module_9 import Salaries
+    from app.services import distance_matrix as distance_matrix_module
+
+    with app.app_context():
+        db.session.add(Salaries(nom='Essai', prenom='Sortie', date_entree=date(2024, 1, 1),
+                                date_sortie=date(2025, 3, 10)))
+        db.session.commit()
+    monkeypatch.setattr(distance_matrix_module, 'date', _FixedDate)
+
+    first = client.get('/api/distances/matrix?depot=false')
+    assert 'Sortie Essai' in first.get_json()['data']['points']['label']
+    assert client.get('/api/distances/matrix?depot=false',
+                      headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    monkeypatch.setattr(_FixedDate, 'current', date(2025, 3, 11))
+    second = client.get('/api/distances/matrix?depot=false',
+                        headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert 'Sortie Essai' not in second.get_json()['data']['points']['label']
@@ -0,0 +1,24 @@
+"""Tests des routes CRUD des villes (écritures par la file d'écriture)"""
+
+import time
+
+
+def test_create_returns_default_timestamps(client):
+    """POST : created_at et updated_at (valeurs par défaut Python) présents dans la réponse"""
+    response = client.post('/api/villes/', json={'communes': 'Essai-Création', 'code_postal': 73000})
+    body = response.get_json()
+    assert body['success'], body
+    assert body['data']['id'] is not None
+    assert body['data']['created_at'] is not None
+    assert body['data']['updated_at'] is not None
+
+
+def test_update_returns_new_updated_at(client):
+    """PUT : updated_at (onupdate) renvoyé à jour"""
+    created = client.post('/api/villes/', json={'communes': 'Essai-Modification', 'code_postal': 73000}).get_json()['data']
+    time.sleep(0.01)
+    response = client.put(f"/api/villes/{created['id']}", json={'communes': 'Essai-Modifiée'})
+    body = response.get_json()
+    assert body['success'], body
+    assert body['data']['communes'] == 'Essai-Modifiée'
+    assert body['data']['updated_at'] > created['updated_at']
@@ -0,0 +1,41 @@
+"""Tests de l'insertion en masse par lots (unités de la file d'écriture)"""
+
+import pytest
+from sqlalchemy import text
+
+from app import db
+from app.services.bulk_loader import bulk_loader
+
+
+@pytest.fixture
+def codes(app):
+    """Table avec une clé unique NOT NULL"""
+    with app.app_context():
+        db.session.execute(text('CREATE TABLE essai_codes (id INTEGER PRIMARY KEY, code TEXT UNIQUE NOT NULL, n INTEGER)'))
+        db.session.commit()
+        yield 'essai_codes'
+        db.session.rollback()
+        db.session.execute(text('DROP TABLE essai_codes'))
+        db.session.commit()
+
+
+def test_insert_keeps_valid_rows_of_a_failing_chunk(app, codes):
+    """Une ligne invalide n'annule pas les autres lignes de son lot"""
+    rows = [(0, {'code': 'a', 'n': 1}), (1, {'code': 'a', 'n': 2}), (2, {'code': 'b', 'n': 3})]
+    with app.app_context():
+        result = bulk_loader.insert(codes, rows, chunk_size=10)
+        count = db.session.execute(text('SELECT COUNT(*) FROM essai_codes')).scalar()
+    assert result['inserted_count'] == 2
+    assert result['failed_count'] == 1
+    assert result['errors'][0]['index'] == 1
+    assert count == 2
+
+
+def test_merge_counts_inserted_updated_and_unchanged_rows(app, codes):
+    """Fusion : lignes nouvelles, modifiées et inchangées comptées sur plusieurs lots"""
+    with app.app_context():
+        bulk_loader.insert(codes, [(0, {'code': 'a', 'n': 1}), (1, {'code': 'b', 'n': 2})])
+        rows = [(0, {'code': 'a', 'n': 1}), (1, {'code': 'b', 'n': 5}), (2, {'code': 'c', 'n': 3})]
+        result = bulk_loader.merge(codes, rows, key='code', chunk_size=2)
+    assert result['chunks_count'] == 2
+    assert (result['inserted_count'], result['updated_count'], result['unchanged_count']) == (1, 1, 1)
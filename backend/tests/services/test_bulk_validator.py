@@ -0,0 +1,59 @@
+"""Tests de la validation à blanc des imports en masse"""
+
+import pytest
+from sqlalchemy import text
+
+from app import db
+from app.services.bulk_validator import bulk_validator
+
+
+@pytest.fixture
+def contacts(app):
+    """Table avec deux clés uniques (code, email) et une ligne existante"""
+    with app.app_context():
+        db.session.execute(text(
+            'CREATE TABLE essai_contacts (id INTEGER PRIMARY KEY, code TEXT UNIQUE, email TEXT UNIQUE)'
+        ))
+        db.session.execute(text("INSERT INTO essai_contacts (code, email) VALUES ('A', 'a@x'), ('B', 'b@x')"))
+        db.session.commit()
+        yield 'essai_contacts'
+        db.session.rollback()
+        db.session.execute(text('DROP TABLE essai_contacts'))
+        db.session.commit()
+
+
+def test_merge_keeps_unique_value_of_the_updated_row(app, contacts):
+    """En fusion, la ligne mise à jour conserve son email : pas de conflit d'unicité"""
+    with app.app_context():
+        result = bulk_validator.validate(contacts, [{'code': 'A', 'email': 'a@x'}], mode='merge', key='code')
+    assert result['invalid_count'] == 0
+    assert result['merge_key'] == ['code']
+
+
+def test_merge_rejects_unique_value_of_another_row(app, contacts):
+    """En fusion, reprendre l'email d'une autre ligne reste un conflit"""
+    with app.app_context():
+        result = bulk_validator.validate(contacts, [{'code': 'A', 'email': 'b@x'}], mode='merge', key='code')
+    assert result['invalid_count'] == 1
+    assert result['errors'][0]['code'] == 'unique'
+    assert result['errors'][0]['column'] == 'email'
+
+
+def test_insert_rejects_existing_unique_value(app, contacts):
+    """En insertion, une valeur unique déjà en base est signalée"""
+    with app.app_context():
+        result = bulk_validator.validate(contacts, [{'code': 'C', 'email': 'a@x'}])
+    assert result['invalid_count'] == 1
+    assert result['errors'][0]['column'] == 'email'
+
+
+def test_dry_run_matches_real_merge(client, contacts):
+    """La validation à blanc et la fusion réelle concordent (ligne mise à jour)"""
+    url = f'/api/database/tables/{contacts}/bulk-insert'
+    body = {'data': [{'code': 'A', 'email': 'a@x'}], 'mode': 'merge', 'key': 'code'}
+    dry_run = client.post(url, json={**body, 'dry_run': True}).get_json()
+    assert dry_run['success'], dry_run
+    assert dry_run['data']['invalid_count'] == 0
+    merged = client.post(url, json=body).get_json()
+    assert merged['success'], merged
+    assert merged['data']['failed_count'] == 0
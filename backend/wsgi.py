@@ -4,20 +4,29 @@
 ATARYS - FICHIER WSGI POUR DÉPLOIEMENT
 Point d'entrée WSGI pour l'application Flask ATARYS
 
+Production : python wsgi.py --production (gunicorn multi-workers)
+
 Auteur: ATARYS Team
 Date: 2025
 Version: 2.0
 """
 
+import sys
+
 from app import create_app
 
 # Création de l'application Flask via Factory pattern
 application = create_app()
 
 if __name__ == '__main__':
-    # Lancement du serveur de développement
-    application.run(
-        host='0.0.0.0',
-        port=5000,
-        debug=False
-    ) 
\ No newline at end of file
+    if '--production' in sys.argv:
+        # Serveur de production multi-workers (gunicorn, app/utils/wsgi_server.py)
+        from app.utils.wsgi_server import run
+        run(application)
+    else:
+        # Lancement du serveur de développement
+        application.run(
+            host='0.0.0.0',
+            port=5000,
+            debug=False
+        ) 
\ No newline at end of file
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { PageLayout } from '../components/Layout';
+import { fetchAllPages } from '../utils/pagination';
 
 const Module9_1 = () => {
   const [salaries, setSalaries] = useState([]);
@@ -44,8 +45,7 @@ const Module9_1 = () => {
 
   const fetchSalaries = async () => {
     try {
-      const response = await fetch('/api/salaries/');
-      const data = await response.json();
+      const data = await fetchAllPages('/api/salaries/');
       if (data.success) {
         setSalaries(data.data);
       }
@@ -56,8 +56,7 @@ const Module9_1 = () => {
 
   const fetchNiveauQualifications = async () => {
     try {
-      const response = await fetch('/api/niveau_qualification/');
-      const data = await response.json();
+      const data = await fetchAllPages('/api/niveau_qualification/');
       if (data.success) {
         setNiveauQualifications(data.data);
       }
@@ -68,8 +67,7 @@ const Module9_1 = () => {
 
   const fetchFamilleOuvrages = async () => {
     try {
-      const response = await fetch('/api/famille_ouvrages/');
-      const data = await response.json();
+      const data = await fetchAllPages('/api/famille_ouvrages/');
       if (data.success) {
         setFamilleOuvrages(data.data);
       }
@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { PageLayout, Card } from '../components/Layout';
 import { useMenu } from '../contexts/MenuContext';
+import { fetchAllPages } from '../utils/pagination';
 
 // Suppression des données hardcodées - remplacées par un appel API dynamique
 
@@ -112,8 +113,7 @@ function PlanningSalaries() {
         setLoading(true);
         setError(null);
         
-        const response = await fetch('/api/salaries/?actif=true');
-        const data = await response.json();
+        const data = await fetchAllPages('/api/salaries/?actif=true&fields=id,nom,date_entree,date_sortie,colonne_planning');
         
         if (data.success) {
           setSalaries(data.data);
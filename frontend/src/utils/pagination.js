@@ -0,0 +1,25 @@
+// Routes de liste paginées (backend/app/utils/pagination.py) : au plus `limit` éléments
+// par réponse, page suivante via pagination.next_cursor
+
+// Plafond côté serveur (MAX_LIMIT) : le moins de requêtes possible
+const PAGE_LIMIT = 1000;
+
+// Charger toutes les pages d'une route de liste, réponse { success, data } comme une page unique
+export const fetchAllPages = async (url) => {
+  const items = [];
+  let cursor = null;
+  do {
+    const params = new URLSearchParams({ limit: PAGE_LIMIT });
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    const response = await fetch(`${url}${url.includes('?') ? '&' : '?'}${params}`);
+    const data = await response.json();
+    if (!data.success) {
+      return data;
+    }
+    items.push(...data.data);
+    cursor = data.pagination?.next_cursor;
+  } while (cursor);
+  return { success: true, data: items };
+};